@@ -0,0 +1,118 @@
+"""
+Benchmark: every converter on synthetic statements (see synthetic.py)
+
+Each layout is converted in a fresh process, so the peak RSS reported is that
+of converting one statement: detection plus the converter, with the rows
+consumed as they stream out (no CSV is written). The transaction count is
+checked against what was generated, so a converter that stops parsing the
+synthetic layout fails loudly instead of looking fast.
+
+    python benchmarks/bench_converters.py [--pages N] [--repeat N] [--layouts anz cba ...]
+    python benchmarks/bench_converters.py --save baseline.json
+    python benchmarks/bench_converters.py --compare baseline.json   # exit 1 on a regression
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+
+
+"""Peak RSS of this process in MB, or None where the resource module is missing (Windows)"""
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KB elsewhere
+
+
+"""Convert pdf_path repeat times in this process and print the results as JSON (run by the parent)"""
+def worker(pdf_path: str, repeat: int):
+    from bank_statement_converter import StatementDocument, detect_bank
+    from bank_statement_converter.registry import extract_rows
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            with StatementDocument(pdf_path) as statement:
+                pages = statement.raw.page_count
+                bank, account_type = detect_bank(statement)
+                rows = sum(1 for _ in extract_rows(statement, bank, account_type))
+        times.append(time.perf_counter() - start)
+    print(json.dumps({"bank": bank, "account_type": account_type, "pages": pages,
+                      "transactions": rows - 1, "seconds": min(times), "peak_rss_mb": peak_rss_mb()}))
+
+
+def run_layout(layout: str, pdf_path: str, count: int, repeat: int) -> dict:
+    res = subprocess.run([sys.executable, __file__, "--worker", pdf_path, str(repeat)],
+                         capture_output=True, text=True)
+    if res.returncode != 0:
+        raise RuntimeError(f"{layout}: conversion failed\n{res.stderr}")
+    result = json.loads(res.stdout)
+    if result["transactions"] != count:
+        raise RuntimeError(f"{layout}: {result['transactions']} transactions converted, {count} generated")
+    result["pages_per_sec"] = result["pages"] / result["seconds"]
+    return result
+
+
+"""Layouts whose pages/sec dropped by more than threshold (a fraction) compared to baseline"""
+def regressions(results: dict, baseline: dict, threshold: float) -> list:
+    slower = []
+    for layout, result in results.items():
+        before = baseline.get(layout)
+        if before and result["pages_per_sec"] < before["pages_per_sec"] * (1 - threshold):
+            slower.append(f"{layout}: {before['pages_per_sec']:.1f} -> {result['pages_per_sec']:.1f} pages/sec")
+    return slower
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--pages", type=int, default=20, help="About how many pages per statement")
+    p.add_argument("--repeat", type=int, default=3, help="Conversions per layout (best is reported)")
+    p.add_argument("--layouts", nargs="+", choices=sorted(synthetic.LAYOUTS), default=sorted(synthetic.LAYOUTS))
+    p.add_argument("--save", metavar="JSON", help="Write the results to this file, e.g. as a baseline")
+    p.add_argument("--compare", metavar="JSON", help="Compare pages/sec with results saved by --save")
+    p.add_argument("--threshold", type=float, default=0.2,
+                   help="Fraction pages/sec may drop before --compare reports a regression (default: 0.2)")
+    p.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.worker:
+        worker(args.worker[0], int(args.worker[1]))
+        return
+
+    results = {}
+    print(f"{'layout':<14}{'pages':>6}{'trans.':>8}{'seconds':>10}{'pages/s':>10}{'peak RSS':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout in args.layouts:
+            pdf_path, count = synthetic.make_statement(layout, os.path.join(tmp, f"{layout}.pdf"), args.pages)
+            result = results[layout] = run_layout(layout, pdf_path, count, args.repeat)
+            rss = "n/a" if result["peak_rss_mb"] is None else f"{result['peak_rss_mb']:.0f} MB"
+            print(f"{layout:<14}{result['pages']:>6}{result['transactions']:>8}{result['seconds']:>10.3f}"
+                  f"{result['pages_per_sec']:>10.1f}{rss:>12}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            slower = regressions(results, json.load(f), args.threshold)
+        if slower:
+            print("Slower than the baseline:")
+            for line in slower:
+                print(" ", line)
+            sys.exit(1)
+        print("No regressions compared to the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark: date checks and reformatting, old path vs dates.py
+
+Simulates what the converters do for a statement: every line / cell is tested
+with is_datetime() and every transaction date goes through reformat_date().
+
+    python benchmarks/bench_dates.py [--lines N] [--repeat N]
+"""
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from dateutil import parser as dateutil_parser
+
+from bank_statement_converter import dates
+
+
+def old_is_datetime(line, date_format):
+    try:
+        datetime.strptime(line, date_format)
+        return True
+    except ValueError:
+        return False
+
+
+def old_reformat_date(date, output_format="%d/%m/%Y"):
+    try:
+        dt = dateutil_parser.parse(date, dayfirst=True)
+    except (ValueError, OverflowError):
+        return None
+    return dt.strftime(output_format)
+
+
+"""A year of statement lines: a date every few lines, the rest details and amounts"""
+def statement_lines(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    lines = []
+    while len(lines) < count:
+        day = start + timedelta(days=rng.randint(0, 365))
+        lines.append(day.strftime("%d %b %Y"))
+        lines.append(f"EFTPOS PURCHASE {rng.randint(1000, 9999)} SYDNEY AU")
+        lines.append(f"{rng.randint(1, 5000)}.{rng.randint(0, 99):02d}")
+    return lines[:count]
+
+
+def run(check, reformat, lines, date_format):
+    for line in lines:
+        if check(line, date_format):
+            reformat(line)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--lines", type=int, default=30_000, help="Statement lines per run")
+    p.add_argument("--repeat", type=int, default=5, help="Runs per timing (best is reported)")
+    args = p.parse_args()
+
+    lines = statement_lines(args.lines)
+    date_format = "%d %b %Y"
+
+    # Both paths must agree before timing them
+    for line in lines:
+        assert (dates.parse_date(line, date_format) is not None) == old_is_datetime(line, date_format)
+        if old_is_datetime(line, date_format):
+            assert dates.reformat_date(line) == old_reformat_date(line)
+
+    def new_check(line, fmt):
+        return dates.parse_date(line, fmt) is not None
+
+    def new_cold():
+        dates.parse_date.cache_clear()
+        dates.reformat_date.cache_clear()
+        run(new_check, dates.reformat_date, lines, date_format)
+
+    timings = {
+        "old (strptime + dateutil)": lambda: run(old_is_datetime, old_reformat_date, lines, date_format),
+        "new, cold cache": new_cold,
+        "new, warm cache": lambda: run(new_check, dates.reformat_date, lines, date_format),
+    }
+    old = None
+    print(f"{len(lines)} lines, best of {args.repeat}")
+    for name, func in timings.items():
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        old = old or best
+        print(f"  {name:<28}{best * 1000:9.1f} ms  {old / best:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
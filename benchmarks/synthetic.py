@@ -0,0 +1,455 @@
+"""
+Synthetic statement generator used by the benchmarks.
+
+Every layout draws the text and line art that the matching converter expects
+(column positions, ruling, balance summaries), so the generated PDFs go
+through detection, parsing and the balance checks exactly like a real
+statement would. Amounts and descriptions come from a seeded RNG, so the same
+arguments always produce the same file.
+
+    python benchmarks/synthetic.py OUT_DIR [--pages N] [--layouts anz cba ...]
+"""
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+import fitz
+
+PAGE_W, PAGE_H = 595, 842
+FONT_SIZE = 7
+
+MERCHANTS = [
+    'COFFEE HOUSE SYDNEY', 'OFFICE SUPPLIES PTY', 'FUEL STATION 221', 'CLIENT PAYMENT INV',
+    'TELCO MONTHLY BILL', 'PAYROLL RUN', 'COURIER SERVICES', 'SOFTWARE SUBSCRIPTION',
+    'HARDWARE STORE', 'CATERING CO', 'INSURANCE PREMIUM', 'RENT MELBOURNE',
+]
+
+
+def money(cents: int, sep: str = ',') -> str:
+    """Format cents as an unsigned amount string such as '1,234.56'"""
+    dollars, rem = divmod(abs(cents), 100)
+    return f"{dollars:,}.{rem:02d}".replace(',', sep)
+
+
+def balance_text(cents: int) -> str:
+    """Format a balance as '$1,234.56 CR', or DR when overdrawn"""
+    return f"${money(cents)} {'DR' if cents < 0 else 'CR'}"
+
+
+class Ledger:
+    """Seeded list of (date, description, cents) with running balances"""
+    def __init__(self, count: int, seed: int = 0, opening: int | None = None, start=date(2024, 1, 1)):
+        rng = random.Random(seed)
+        if opening is None:
+            # debits are more frequent, so long statements need more money to
+            # start with to never go overdrawn (most layouts only write CR balances)
+            opening = 50_000_000 + 60_000 * count
+        self.opening = opening
+        self.rows = []
+        day = start
+        balance = opening
+        for i in range(count):
+            if rng.random() < 0.3:
+                day += timedelta(days=1)
+            if day.year != start.year:
+                day = date(start.year, 12, 31)
+            cents = rng.randint(100, 250_000)
+            if rng.random() < 0.6:
+                cents = -cents
+            balance += cents
+            self.rows.append((day, f"{rng.choice(MERCHANTS)} {i:05d}", cents, balance))
+        self.closing = balance
+        self.credits = sum(c for _, _, c, _ in self.rows if c > 0)
+        self.debits = -sum(c for _, _, c, _ in self.rows if c < 0)
+        self.start = start
+        self.end = self.rows[-1][0] if self.rows else start
+
+
+class Writer:
+    """Tiny helper that writes lines of text onto consecutive pages"""
+    def __init__(self):
+        self.doc = fitz.open()
+        self.page = None
+
+    def new_page(self):
+        self.page = self.doc.new_page(width=PAGE_W, height=PAGE_H)
+        return self.page
+
+    def text(self, x, y, s, color=(0, 0, 0)):
+        self.page.insert_text((x, y), s, fontsize=FONT_SIZE, color=color)
+
+    def shade(self, x0, y0, x1, y1):
+        self.page.draw_rect(fitz.Rect(x0, y0, x1, y1), color=None, fill=(0.9, 0.9, 0.9))
+
+    def hline(self, x0, x1, y):
+        self.page.draw_line(fitz.Point(x0, y), fitz.Point(x1, y))
+
+    def flow(self, lines, first_top, top, bottom=800, x=60, step=10):
+        """Write lines one under the other, starting new pages as needed"""
+        y = first_top
+        for line in lines:
+            if y > bottom:
+                self.new_page()
+                y = top
+            self.text(x, y, line)
+            y += step
+
+    def save(self, path):
+        self.doc.save(path)
+        self.doc.close()
+        return path
+
+
+def paginate(rows, first, rest):
+    """Split rows into pages holding `first` rows on page one and `rest` after"""
+    pages = [rows[:first]]
+    for i in range(first, len(rows), rest):
+        pages.append(rows[i:i + rest])
+    return pages
+
+
+# -------------------------------------------------------------------
+# Text-flow layouts
+# -------------------------------------------------------------------
+
+def make_cba(path, count, seed=0, opening=None):
+    ledger = Ledger(count, seed, opening)
+    w = Writer()
+    w.new_page()
+    w.text(60, 60, 'Access your statements by logging on to the CommBank App or NetBank.')
+    w.text(60, 72, 'Business Transaction Account')
+    w.text(350, 100, 'Period')
+    w.text(350, 112, f"{ledger.start:%d %b %Y} - {ledger.end:%d %b %Y}")
+    lines = [f"{ledger.start:%d %b %Y} OPENING BALANCE", balance_text(ledger.opening)]
+    for day, desc, cents, running in ledger.rows:
+        lines.append(f"{day:%d %b} {desc}")
+        lines.append('Card xx1234 Value Date')
+        if cents < 0:
+            lines += [money(cents), '$']
+        else:
+            lines.append(f"${money(cents)}")
+        lines.append(balance_text(running))
+    lines += [f"{ledger.end:%d %b %Y} CLOSING BALANCE", balance_text(ledger.closing)]
+    w.flow(lines, 510, 110)
+    return w.save(path)
+
+
+def make_zel(path, count, seed=0, opening=None):
+    ledger = Ledger(count, seed, opening)
+    w = Writer()
+    w.new_page()
+    lines = ['ABN 14 649 001 383 AFSL 534281', 'Transaction Account Statement',
+             'Date', f"{ledger.start:%d %b %Y} - {ledger.end:%d %b %Y}",
+             'Opening Balance', balance_text(ledger.opening),
+             'Closing Balance', balance_text(ledger.closing),
+             'Total Credit', f"${money(ledger.credits)}",
+             'Total Debit', f"${money(ledger.debits)}"]
+    for day, desc, cents, _ in ledger.rows:
+        lines += [f"{day:%d %b}", desc, ('-$' if cents < 0 else '$') + money(cents)]
+    w.flow(lines, 60, 60)
+    return w.save(path)
+
+
+def make_wbc_recent(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    w.new_page()
+    lines = ['Westpac Banking Corporation ABN 33 007 457 141', 'Statement of recent transactions']
+    for day, desc, cents, _ in ledger.rows:
+        lines += [f"{day:%d %b %Y}", desc, ('-$' if cents < 0 else '$') + money(cents)]
+    w.flow(lines, 60, 60)
+    return w.save(path)
+
+
+# -------------------------------------------------------------------
+# Ruled / shaded table layouts
+# -------------------------------------------------------------------
+
+def make_anz(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    w.new_page()
+    w.text(60, 60, 'WELCOME TO YOUR ANZ ACCOUNT AT A GLANCE SUMMARY')
+    w.text(60, 72, 'BUSINESS ADVANTAGE STATEMENT')
+    blank = (1, 1, 1)
+    pages = paginate(ledger.rows, 36, 36)
+    for n, rows in enumerate(pages):
+        w.new_page()
+        w.text(45, 70, 'Date')
+        w.text(80, 70, 'Transaction Details')
+        w.text(325, 70, 'Withdrawals ($)')
+        w.text(412, 70, 'Deposits ($)')
+        w.text(505, 70, 'Balance ($)')
+        y = 80
+        table = []
+        if n == 0:
+            table.append((f"{ledger.start.year}", 'OPENING BALANCE', None, None, money(ledger.opening)))
+        for day, desc, cents, balance in rows:
+            table.append((f"{day:%d %b}".upper(), desc, money(cents) if cents < 0 else None,
+                          money(cents) if cents > 0 else None, money(balance)))
+        if n == len(pages) - 1:
+            table.append(('', 'TOTALS AT END OF PERIOD', None, None, ('CLOSING BAL', '$' + money(ledger.closing))))
+        else:
+            table.append(('', 'TOTALS AT END OF PAGE', None, None, ''))
+        for cells in table:
+            w.hline(41, 563, y)
+            height = 18
+            for x, s in zip((43, 78, 323, 411, 503), cells):
+                if s is None:
+                    w.text(x, y + 12, 'blank', color=blank)
+                elif isinstance(s, tuple):  # balance cell wrapped over two lines
+                    w.text(x, y + 10, s[0])
+                    w.text(x, y + 20, s[1])
+                    height = 26
+                elif s:
+                    w.text(x, y + 12, s)
+            y += height
+        w.hline(41, 563, y)
+    return w.save(path)
+
+
+def make_ben(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    footer = 'Bendigo and Adelaide Bank Limited ABN 11 068 049 178 AFSL/Australian Credit Licence 237879'
+    w = Writer()
+    pages = paginate(ledger.rows, 18, 31)
+    for n, rows in enumerate(pages):
+        w.new_page()
+        top = 80
+        if n == 0:
+            w.text(60, 40, 'Business Basic Account')
+            for i, s in enumerate([f"Opening balance on {ledger.start:%d %b %Y}", f"${money(ledger.opening)}",
+                                   'Deposits & credits', f"${money(ledger.credits)}",
+                                   'Withdrawals & debits', f"${money(ledger.debits)}",
+                                   f"Closing Balance on {ledger.end:%d %b %Y}", f"${money(ledger.closing)}"]):
+                w.text(60, 100 + 12 * i, s)
+            top = 380
+        w.text(45, top - 6, 'Date        Transaction                       Withdrawals   Deposits   Balance')
+        y = top
+        for i, (day, desc, cents, balance) in enumerate(rows):
+            if i % 2 == 0:
+                w.shade(40, y, 580, y + 22)
+            w.text(42, y + 15, f"{day:%d %b %y}")
+            w.text(100, y + 15, desc)
+            w.text(445 if cents > 0 else 325, y + 15, '$' + money(cents))
+            w.text(515, y + 15, '$' + money(balance))
+            y += 22
+        w.text(40, 820, footer)
+    return w.save(path)
+
+
+def make_mqg(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    w.new_page()
+    w.text(60, 60, 'Macquarie Platinum Transaction Account')
+    for i, s in enumerate(['Opening balance', '- Total debits', '+ Total credits', '= Closing balance',
+                           f"${money(ledger.opening)} CR", f"${money(ledger.debits)}",
+                           f"${money(ledger.credits)}", f"${money(ledger.closing)} CR"]):
+        w.text(60, 400 + 12 * i, s)
+    pages = paginate(ledger.rows, 36, 36)
+    month = None
+    for rows in pages:
+        w.new_page()
+        w.text(25, 60, 'Date    Transaction    Debits    Credits    Balance')
+        y = 80
+        for day, desc, cents, balance in rows:
+            if (day.year, day.month) != month:
+                month = (day.year, day.month)
+                w.hline(20, 570, y)
+                w.text(22, y + 12, f"{day:%b %Y}")
+                y += 18
+            w.hline(20, 570, y)
+            w.text(22, y + 12, f"{day:%b %d}")
+            name, ref = desc.rsplit(' ', 1)
+            w.text(82, y + 12, name)
+            w.text(202, y + 12, 'REF ' + ref)
+            w.text(445 if cents > 0 else 385, y + 12, money(cents))
+            w.text(502, y + 12, money(balance) + ' CR')
+            y += 18
+        w.hline(20, 570, y)
+    return w.save(path)
+
+
+def make_nab_acc(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    pages = paginate(ledger.rows, 40, 45)
+    for n, rows in enumerate(pages):
+        w.new_page()
+        title = 120
+        if n == 0:
+            w.text(40, 30, 'National Australia Bank Limited ABN 12 004 044 937 AFSL and Australian Credit Licence 230686')
+            w.text(40, 42, 'Transaction Account')
+            for i, s in enumerate(['Opening Balance', f"${money(ledger.opening)} Cr",
+                                   'Total Credits', f"${money(ledger.credits)}",
+                                   'Total Debits', f"${money(ledger.debits)}",
+                                   'Closing Balance', f"${money(ledger.closing)} Cr"]):
+                w.text(40, 60 + 10 * i, s)
+            title = 160
+        w.text(40, title, 'Transaction Details')
+        for x, s in ((40, 'Date'), (100, 'Particulars'), (330, 'Debits'), (400, 'Credits'), (480, 'Balance')):
+            w.text(x, title + 12, s)
+        y = title + 24
+        for i, (day, desc, cents, balance) in enumerate(rows):
+            if i % 2 == 0:
+                w.shade(35, y, 560, y + 14)
+            w.text(40, y + 10, f"{day:%d %b %y}")
+            w.text(100, y + 10, desc)
+            w.text(402 if cents > 0 else 332, y + 10, money(cents))
+            w.text(482, y + 10, f"${money(balance)} Cr")
+            y += 14
+        w.text(40, 790, 'Important information about your account')
+    return w.save(path)
+
+
+def make_nab_everyday(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    pages = paginate(ledger.rows, 40, 42)
+    last_day = None
+    for n, rows in enumerate(pages):
+        w.new_page()
+        title = 120
+        if n == 0:
+            w.text(40, 30, 'National Australia Bank Limited ABN 12 004 044 937 AFSL and Australian Credit Licence 230686')
+            w.text(40, 42, 'BUSINESS EVERYDAY AC')
+            for i, s in enumerate(['Opening Balance', f"${money(ledger.opening)} Cr",
+                                   'Total Credits', f"${money(ledger.credits)}",
+                                   'Total Debits', f"${money(ledger.debits)}",
+                                   'Closing Balance', f"${money(ledger.closing)} Cr"]):
+                w.text(40, 60 + 10 * i, s)
+            title = 160
+        w.text(40, title, 'Transaction Details')
+        w.text(40, title + 15, 'Date          Particulars                    Debits      Credits     Balance')
+        y = title + 45
+        for day, desc, cents, balance in rows:
+            if day != last_day:
+                w.text(40, y, f"{day:%d %b %Y}")
+                last_day = day
+            w.text(100, y, desc + ' ' + '.' * 12)
+            w.text(422 if cents > 0 else 332, y, money(cents))
+            w.text(490, y, f"{money(balance)} Cr")
+            y += 14
+        w.text(40, 790, 'Important information about your account')
+    return w.save(path)
+
+
+def make_wbc_search(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    pages = paginate(ledger.rows, 22, 22)
+    for n, rows in enumerate(pages):
+        w.new_page()
+        if n == 0:
+            w.text(40, 40, 'Westpac Banking Corporation ABN 33 007 457 141')
+            w.text(40, 52, 'Transaction Search')
+        w.text(40, 100, 'Date          Account          Narrative                 Debit      Credit')
+        y = 120
+        for day, desc, cents, _ in rows:
+            w.shade(40, y, 500, y + 24)
+            w.text(42, y + 17, f"{day:%d %b %Y}")
+            w.text(220, y + 17, desc)
+            if cents < 0:
+                w.text(367, y + 17, '-$' + money(cents, sep=''))
+            else:
+                w.text(412, y + 17, '$' + money(cents, sep=''))
+            y += 30
+        w.text(40, 815, 'Copyright Westpac Banking Corporation')
+    return w.save(path)
+
+
+def make_wbc_acc(path, count, seed=0):
+    ledger = Ledger(count, seed)
+    w = Writer()
+    pages = paginate(ledger.rows, 12, 24)
+    for n, rows in enumerate(pages):
+        w.new_page()
+        head = 100
+        if n == 0:
+            w.text(40, 30, 'Westpac Banking Corporation ABN 33 007 457 141')
+            w.text(40, 42, 'Electronic Statement')
+            for i, s in enumerate(['Opening Balance', f"+${money(ledger.opening)}",
+                                   'Total Credits', f"+${money(ledger.credits)}",
+                                   'Total Debits', f"-${money(ledger.debits)}",
+                                   'Closing Balance', f"+${money(ledger.closing)}"]):
+                w.text(40, 60 + 12 * i, s)
+            head = 370
+        w.text(112, head, 'TRANSACTION DESCRIPTION')
+        y = head + 10
+        table = []
+        if n == 0:
+            table.append((ledger.start, 'STATEMENT OPENING BALANCE', None, ledger.opening))
+        table += [(day, desc, cents, balance) for day, desc, cents, balance in rows]
+        for day, desc, cents, balance in table:
+            w.shade(60, y, 560, y + 20)
+            w.text(62, y + 13, f"{day:%d/%m/%y}")
+            w.text(112, y + 13, desc)
+            if cents is not None:
+                w.text(417 if cents > 0 else 330, y + 13, money(cents))
+            w.text(485, y + 13, money(balance))
+            y += 26
+        if n == len(pages) - 1:
+            y += 12
+            w.text(62, y, f"{ledger.end:%d/%m/%y}")
+            w.text(112, y, 'CLOSING BALANCE')
+            w.text(485, y, money(ledger.closing))
+        w.text(40, 790, f"Statement No. {n + 1}")
+    return w.save(path)
+
+
+LAYOUTS = {
+    'anz': make_anz,
+    'ben': make_ben,
+    'cba': make_cba,
+    'mqg': make_mqg,
+    'nab_acc': make_nab_acc,
+    'nab_everyday': make_nab_everyday,
+    'wbc_acc': make_wbc_acc,
+    'wbc_search': make_wbc_search,
+    'wbc_recent': make_wbc_recent,
+    'zel': make_zel,
+}
+
+# About how many transactions fit on a page of each layout, to make statements
+# of a given number of pages
+ROWS_PER_PAGE = {
+    'anz': 36,
+    'ben': 31,
+    'cba': 14,
+    'mqg': 35,
+    'nab_acc': 45,
+    'nab_everyday': 42,
+    'wbc_acc': 24,
+    'wbc_search': 22,
+    'wbc_recent': 24,
+    'zel': 24,
+}
+
+
+def make_statement(layout: str, path, pages: int | None = None, count: int | None = None, seed: int = 0):
+    """Write a statement of about `pages` pages, or with `count` transactions; returns (path, count)"""
+    if count is None:
+        count = ROWS_PER_PAGE[layout] * (pages or 1)
+    LAYOUTS[layout](os.fspath(path), count, seed)
+    return path, count
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("out_dir", help="Folder to write the PDFs to")
+    p.add_argument("--pages", type=int, default=10, help="About how many pages per statement")
+    p.add_argument("--layouts", nargs="+", choices=sorted(LAYOUTS), default=sorted(LAYOUTS))
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for layout in args.layouts:
+        path, count = make_statement(layout, os.path.join(args.out_dir, f"{layout}.pdf"), args.pages, seed=args.seed)
+        with fitz.open(path) as doc:
+            print(f"{path}: {doc.page_count} pages, {count} transactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,51 @@
-from .bank_detector import detect_bank
-from .csv2qif       import csv_to_qif
-from .anz_converter import convert_anz
-from .ben_converter import convert_ben
-from .cba_converter import convert_cba
-from .mqg_converter import convert_mqg
-from .nab_converter import convert_nab
-from .wbc_converter import convert_wbc
-from .zel_converter import convert_zel
+from importlib import import_module
+
+TYPE_CHECKING = False  # same as typing.TYPE_CHECKING, without importing typing
+
+# Public names are imported on first use (PEP 562), so that e.g. `bstc csv2qif`
+# doesn't pay for importing PyMuPDF and every converter
+_LAZY = {
+    'StatementDocument': '.document',
+    'detect_bank':       '.bank_detector',
+    'rank_banks':        '.bank_detector',
+    'AmbiguousBankError': '.bank_detector',
+    'csv_to_qif':        '.csv2qif',
+    'convert_anz':       '.anz_converter',
+    'convert_ben':       '.ben_converter',
+    'convert_cba':       '.cba_converter',
+    'convert_mqg':       '.mqg_converter',
+    'convert_nab':       '.nab_converter',
+    'convert_wbc':       '.wbc_converter',
+    'convert_zel':       '.zel_converter',
+    'find_converter':    '.registry',
+    'register_converter': '.registry',
+    'convert':           '.api',
+    'StatementResult':   '.api',
+}
+
+if TYPE_CHECKING:  # for type checkers, IDEs and PyInstaller's import analysis
+    from .document      import StatementDocument
+    from .bank_detector import detect_bank, rank_banks, AmbiguousBankError
+    from .csv2qif       import csv_to_qif
+    from .anz_converter import convert_anz
+    from .ben_converter import convert_ben
+    from .cba_converter import convert_cba
+    from .mqg_converter import convert_mqg
+    from .nab_converter import convert_nab
+    from .wbc_converter import convert_wbc
+    from .zel_converter import convert_zel
+    from .registry      import find_converter, register_converter
+    from .api           import convert, StatementResult
 
 __version__ = "0.3.4"
-__all__ = ['convert_cba', 'convert_anz', 'convert_nab', 'convert_wbc', 'csv_to_qif', 'convert_ben', 'convert_zel', 'detect_bank', 'convert_mqg']
\ No newline at end of file
+__all__ = ['convert_cba', 'convert_anz', 'convert_nab', 'convert_wbc', 'csv_to_qif', 'convert_ben', 'convert_zel', 'detect_bank', 'rank_banks', 'AmbiguousBankError', 'convert_mqg', 'StatementDocument', 'find_converter', 'register_converter', 'convert', 'StatementResult']
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value  # only look it up once
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,15 +1,50 @@
-import fitz
 import os.path
-from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, remove_annots, check_page_rotation
+from .utils import export_to_csv, is_datetime, reformat_date, csv_rename
+from .document import open_statement
+from .table import extract_cells
+from .events import emit
+from .dates import date_ordinal
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows
+
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
 
 """
-Get the transactions
+Extract the text of the table cells of one page, or None if it has no table
 """
-def get_transactions(pdf_path: str):        
-    doc = check_page_rotation(pdf_path)
+def page_cells(statement, page):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+    # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
+    line_art = statement.line_art(page)  # extract page's line art
+    if not line_art:
+        return None
+
+    # the column coordinates are given ... by someone
+    x_values = set([41,75,320,408,500,563])
+
+    y_values = list(line_art.item_ys)  # these need to be computed now: the y of each line
+
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = sorted(list(x_values))
+    y_values = sorted(list(y_values))
+
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
 
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+"""
+Get the transactions
+Yields the transactions as they are read, in a TransactionBatch per page
+"""
+def get_transactions(statement):
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     running_balance = 0
+    opening_balance = closing_balance = None
     t_line = 0
     years = ['2023', '2024', '2025', '2026']
     year = ''
@@ -17,57 +52,32 @@ def get_transactions(pdf_path: str):
     closing_flag = False
     end_flag = False
               
-    for page in doc[1:]:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        if not page.get_drawings():
-            continue
+    for _, cells in statement.map_pages(page_cells, start=1):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
-        paths = page.get_drawings()  # extract page's line art
-
-        # the column coordinates are given ... by someone
-        x_values = set([41,75,320,408,500,563])
-
-        y_values = []  # these need to be computed now
-        for path in paths:
-            for item in path['items']:
-                p1 = item[1]
-                y_values.append(p1.y)
-
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        y_values = sorted(list(y_values))
-
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
+        if cells is None:  # empty page, or no table on it
+            continue
 
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if text[:4] in years:
                         year = text[:4]
                         if not opening_flag: # For the date if on the same line of the year
                             if is_datetime(text[-6:] + ' ' + year, "%d %b %Y"):
-                                comb_data[t_line+1].append(reformat_date(text + ' ' + year))
+                                ordinal = date_ordinal(text + ' ' + year)
+                                row_data.append(reformat_date(text + ' ' + year))
                                 continue
                         continue
                     if is_datetime(text + ' ' + year, "%d %b %Y"): # For the year
-                        comb_data[t_line+1].append(reformat_date(text + ' ' + year))
+                        ordinal = date_ordinal(text + ' ' + year)
+                        row_data.append(reformat_date(text + ' ' + year))
                     continue
                 
                 if j == 1: # For transaction details
@@ -79,7 +89,7 @@ def get_transactions(pdf_path: str):
                     if text == 'TOTALS AT END OF PERIOD':
                         closing_flag = True
                         continue
-                    comb_data[t_line+1].append(text)
+                    row_data.append(text)
                     continue
                 
                 if j == 2:
@@ -87,8 +97,9 @@ def get_transactions(pdf_path: str):
                         continue
                     if text != 'blank':
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
                     continue
                 
                 if j == 3:
@@ -96,38 +107,40 @@ def get_transactions(pdf_path: str):
                         continue
                     if text != 'blank':
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_balance += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_balance += cents
                     continue
                 
                 if j == 4:
                     if closing_flag:
-                        closing_balance = round(float(text[12:].replace(',', '').replace('$','').strip()), 2)
-                        print(f"Obtained closing balance: ${closing_balance}")
-                        print(f"-------------------------------------------------")
-                        if round(running_balance, 2) == closing_balance:
-                            print('Running balance and closing balance match.')
-                            print(f"-------------------------------------------------")
+                        closing_balance = parse_cents(text[12:])
+                        emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
+                        emit('section')
+                        if running_balance == closing_balance:
+                            emit('check', 'Running balance and closing balance match.')
+                            emit('section')
                             end_flag = True
                             break
                         else:
-                            raise (ValueError(f"Running balance and closing balance do not match: {running_balance}, {closing_balance} \n \
+                            raise (ValueError(f"Running balance and closing balance do not match: {dollars(running_balance)}, {dollars(closing_balance)} \n \
                                         Find at line: {t_line}"))
-                    if text[-2:] == 'DR': # If the given balance is negative it has 'DR' suffix
-                        given_balance = -round(float(text[:-2].replace(',', '').strip()), 2)  
-                    else:                      
-                        given_balance = round(float(text.replace(',', '').strip()), 2)
+                    given_balance = parse_cents(text) # If the given balance is negative it has 'DR' suffix
                     if opening_flag:
-                        running_balance = given_balance
-                        print(f"Obtained opening balance: ${running_balance}")
+                        running_balance = opening_balance = given_balance
+                        emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
                         opening_flag = False
                         break
-                    if round(running_balance, 2) == given_balance:
+                    if running_balance == given_balance:
                         continue
                     else:
-                        raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                        raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                     Find at line: {t_line}"))
                         
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
+
             if end_flag:
                 break    
             t_line += 1
@@ -135,14 +148,24 @@ def get_transactions(pdf_path: str):
         if end_flag:
             break
                 
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated closing balance: ${round(running_balance, 2)}")
+    batch.opening, batch.closing = opening_balance, closing_balance  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
     
-    return comb_data_clean
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated closing balance: ${cents!d}", name='closing', source='calculated', cents=running_balance)
+
+"""
+Get the transactions as TransactionBatch objects, yielded as they are read.
+account_type is only there to match the other converters, this bank has one
+statement type
+"""
+def extract_anz(statement, account_type: str | None = None):
+    return get_transactions(statement)
 
-def convert_anz(pdf_path: str):
-    data = get_transactions(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+def convert_anz(pdf_path):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(get_transactions(statement)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
\ No newline at end of file
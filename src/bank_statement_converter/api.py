@@ -0,0 +1,156 @@
+import csv
+import io
+import json
+import os
+from .bank_detector import detect_bank
+from .csv2qif import qif_records
+from .document import StatementDocument
+from .registry import extract_transactions
+from .transactions import RowLayout, TransactionBatch, csv_rows, format_cents
+
+"""
+In-process conversion: PDF in, transactions out, nothing written to disk.
+
+    from bank_statement_converter import convert
+
+    result = convert(uploaded_bytes)       # or a path, or a binary file object
+    result.bank, result.account_type      # 'nab', 'Transaction Account'
+    result.opening, result.closing        # balances in cents, None if not on the statement
+    for t in result:                      # Transaction objects, see transactions.py
+        t.date, t.cents, t.description
+    result.to_csv()                       # same text `bstc file` writes to the CSV
+    result.to_qif("statement.qif")        # same as csv_to_qif() of that CSV
+
+The converters' balance checks run as usual: convert() raises ValueError when
+they fail, or when the bank can't be detected.
+"""
+
+class StatementResult:
+    """The transactions and balances of a converted statement"""
+    def __init__(self, bank: str, account_type: str | None, batches: list):
+        self.bank = bank
+        self.account_type = account_type
+        self.batches = batches
+        self.opening = next((b.opening for b in batches if b.opening is not None), None)
+        self.closing = next((b.closing for b in reversed(batches) if b.closing is not None), None)
+
+    def __len__(self):
+        return sum(len(batch) for batch in self.batches)
+
+    def __iter__(self):
+        for batch in self.batches:
+            yield from batch
+
+    def __repr__(self):
+        return f"StatementResult({self.bank!r}, {self.account_type!r}, {len(self)} transactions)"
+
+    @property
+    def transactions(self) -> list:
+        return list(self)
+
+    @property
+    def credits(self) -> int:
+        """Sum of the credits in cents"""
+        return sum(c for batch in self.batches for c in batch.cents if c > 0)
+
+    @property
+    def debits(self) -> int:
+        """Sum of the debits in cents (negative)"""
+        return sum(c for batch in self.batches for c in batch.cents if c < 0)
+
+    @property
+    def total(self) -> int:
+        """Net amount of all transactions in cents"""
+        return sum(batch.total() for batch in self.batches)
+
+    def rows(self):
+        """The CSV rows, header first, as the converter made them"""
+        return csv_rows(self.batches)
+
+    def to_csv(self, target=None):
+        """Write the CSV to a path or text file object; returns it as a string without a target"""
+        return _serialize(self._write_csv, target, newline='')
+
+    def to_qif(self, target=None):
+        """Write the QIF to a path or text file object; returns it as a string without a target"""
+        return _serialize(self._write_qif, target)
+
+    def to_json(self, target=None):
+        """
+        Write the statement as JSON (bank, account type, balances and transactions,
+        amounts as strings such as '-12.50') to a path or text file object;
+        returns it as a string without a target
+        """
+        return _serialize(self._write_json, target)
+
+    def _write_csv(self, f):
+        csv.writer(f).writerows(self.rows())
+
+    def _write_qif(self, f):
+        f.write("!Type:Bank \n")
+        f.writelines(qif_records(self.rows()))
+
+    def _write_json(self, f):
+        def cents(value):
+            return None if value is None else format_cents(value)
+
+        transactions = []
+        for t in self:
+            item = {
+                'date': t.date.isoformat() if t.date else None,
+                'amount': format_cents(t.cents) if t.ordinal else None,
+                'description': t.description if t.ordinal else None,
+            }
+            if t.row is not None:  # the row as the converter wrote it, see RowLayout.parse()
+                item['row'] = list(t.row)
+            transactions.append(item)
+        json.dump({
+            'bank': self.bank,
+            'account_type': self.account_type,
+            'opening': cents(self.opening),
+            'closing': cents(self.closing),
+            'transactions': transactions,
+        }, f, indent=2)
+
+"""Run write(file) on target (a path or a text file object), or return what it writes as a string"""
+def _serialize(write, target, newline=None):
+    if target is None:
+        buffer = io.StringIO(newline=newline)
+        write(buffer)
+        return buffer.getvalue()
+    if hasattr(target, 'write'):
+        write(target)
+        return None
+    with open(os.fspath(target), 'w', newline=newline) as f:
+        write(f)
+    return None
+
+"""
+Convert a statement in memory. source is a path, the PDF as bytes, or a binary
+file object (e.g. an upload). bank and account_type skip detection.
+Returns a StatementResult; raises ValueError if the bank can't be detected or
+the statement fails its balance checks.
+"""
+def convert(source, bank: str | None = None, account_type: str | None = None) -> StatementResult:
+    with StatementDocument(source) as statement:
+        if bank is None:
+            bank_info = detect_bank(statement)  # AmbiguousBankError if it matches several banks
+            if not bank_info:
+                raise ValueError("Could not detect bank from PDF")
+            bank, account_type = bank_info
+        batches = _as_batches(extract_transactions(statement, bank, account_type))
+    return StatementResult(bank, account_type, batches)
+
+"""Materialize a converter's batches; CSV rows from converters written before batches existed are read into one"""
+def _as_batches(items) -> list:
+    items = list(items)
+    if not items or all(isinstance(item, TransactionBatch) for item in items):
+        return items
+    header, *rows = items
+    try:
+        batch = TransactionBatch(RowLayout(header))
+    except ValueError:
+        raise (ValueError(f"Converter CSV needs Date, Transaction Details and Amount columns: {header}"))
+    for row in rows:
+        batch.append_row(row)
+    return [batch]
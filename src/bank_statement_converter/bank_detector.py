@@ -1,4 +1,8 @@
-import fitz
+import re
+from typing import NamedTuple
+
+from .document import open_statement
+from .profiling import span
 
 # Map keywords for the banks
 BANK_KEYWORDS = {
@@ -26,34 +30,145 @@ BANK_KEYWORDS = {
             'Macquarie Platinum Transaction Account']
 }
 
-def extract_first_page_text(pdf_path: str) -> str:
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(0)
-    text = page.get_text("text")
-    doc.close()
-    return text
+# Document information fields read before falling back to the first page's text
+METADATA_FIELDS = ('title', 'subject', 'keywords', 'author', 'creator', 'producer')
+
+"""
+Accepts a path or an open StatementDocument; the text is cached on the document.
+clip limits the text to a rect of the page.
+"""
+def extract_first_page_text(pdf_path, clip=None) -> str:
+    with open_statement(pdf_path) as statement:
+        return statement.text(statement.page(0, raw=True), clip)
+
+"""
+The document information (title, producer, ...) as one string, one field per line.
+Free to read: it doesn't need any page to be parsed.
+"""
+def extract_metadata_text(pdf_path) -> str:
+    with open_statement(pdf_path) as statement:
+        metadata = statement.raw.metadata or {}
+        return "\n".join(metadata.get(field) or "" for field in METADATA_FIELDS)
+
+# Confidence of a match: the bank's identifying phrase plus an account type
+# phrase is 1.0; a phrase that only occurs as part of a longer keyword of
+# another bank (e.g. NAB 'Transaction Account' inside ZEL 'Transaction Account
+# Statement') counts for less, and the bank phrase alone can't pick a converter
+BANK_PHRASE_SCORE = 0.6
+ACCOUNT_PHRASE_SCORE = 0.4
+SHADOWED_PHRASE_SCORE = 0.1
+
+
+class BankMatch(NamedTuple):
+    bank: str
+    account_type: str | None  # None if only the bank's phrase was found
+    confidence: float
+    shadowed: bool = False    # account type phrase only found inside another bank's keyword
+
+
+class AmbiguousBankError(ValueError):
+    """The first page matches more than one bank equally well"""
+    def __init__(self, matches):
+        self.matches = matches
+        found = ", ".join(f"{m.bank.upper()} ({m.account_type})" for m in matches)
+        super().__init__(f"Statement matches more than one bank: {found}")
+
+
+_scanner = None  # (compiled pattern, {keyword: [keywords it starts with]}) for BANK_KEYWORDS
+
+"""
+One regex that finds every keyword in a single scan of the text.
+The alternatives are longest first inside a lookahead, so at each position the
+longest keyword starting there is matched without consuming it; the shorter
+keywords that are a prefix of it are looked up instead of matched again.
+"""
+def _compile_keywords(keywords) -> tuple:
+    keywords = sorted(set(keywords), key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, keywords)) + "))")
+    prefixes = {k: [p for p in keywords if k.startswith(p)] for k in keywords}
+    return pattern, prefixes
+
+"""
+Every keyword occurrence in text in one pass: {keyword: [(start, end), ...]}
+"""
+def find_keywords(text: str) -> dict:
+    global _scanner
+    if _scanner is None:
+        _scanner = _compile_keywords(p for phrases in BANK_KEYWORDS.values() for p in phrases)
+    pattern, prefixes = _scanner
+    found = {}
+    for m in pattern.finditer(text):
+        start = m.start()
+        for keyword in prefixes[m.group(1)]:
+            found.setdefault(keyword, []).append((start, start + len(keyword)))
+    return found
+
+"""True if every occurrence of phrase lies inside a longer keyword that isn't one of own_phrases"""
+def _shadowed(phrase: str, found: dict, own_phrases) -> bool:
+    others = [span for keyword, spans in found.items()
+              if len(keyword) > len(phrase) and keyword not in own_phrases for span in spans]
+    return all(any(s <= start and end <= e for s, e in others) for start, end in found[phrase])
+
+"""
+Score every bank against the first page text, best match first.
+Only banks whose identifying phrase is on the page are listed; equal scores
+keep the order of BANK_KEYWORDS and of each bank's phrases.
+"""
+def rank_text(text: str) -> list:
+    found = find_keywords(text)
+    matches = []
+    for bank_key, phrases in BANK_KEYWORDS.items():
+        if phrases[0] not in found:
+            continue
+        types = [p for p in dict.fromkeys(phrases[1:]) if p in found]
+        if not types:
+            matches.append(BankMatch(bank_key, None, BANK_PHRASE_SCORE))
+        for phrase in types:
+            shadowed = _shadowed(phrase, found, phrases)
+            score = SHADOWED_PHRASE_SCORE if shadowed else ACCOUNT_PHRASE_SCORE
+            matches.append(BankMatch(bank_key, phrase, round(BANK_PHRASE_SCORE + score, 2), shadowed))
+    matches.sort(key=lambda m: -m.confidence)  # stable: ties stay in BANK_KEYWORDS order
+    return matches
+
+"""
+Ranked matches for a PDF (path or open StatementDocument), see rank_text().
+The PDF's metadata is tried first; the first page is only extracted when that
+doesn't identify a bank and account type on its own.
+"""
+def rank_banks(pdf_path) -> list:
+    with open_statement(pdf_path) as statement:
+        matches = rank_text(extract_metadata_text(statement))
+        try:
+            if best_match(matches) is not None:
+                return matches
+        except AmbiguousBankError:
+            pass
+        return rank_text(extract_first_page_text(statement))
+
+"""
+The best match from rank_text() that has an account type, or None.
+Raises AmbiguousBankError if another bank scores just as high.
+"""
+def best_match(matches: list) -> BankMatch | None:
+    usable = [m for m in matches if m.account_type is not None]
+    if not usable:
+        return None
+    best = usable[0]
+    tied = [m for m in usable if m.confidence == best.confidence and m.bank != best.bank]
+    if tied:
+        raise AmbiguousBankError([best] + tied)
+    return best
 
 """
 The first phrase in the dictionary is to detect the bank. 
 The rest of the phrases are specific to the different statements of the same bank.
-Returns the bank_key [0] and bank statement type [1]
+Returns the bank_key [0] and bank statement type [1], or None if no bank matched.
+Raises AmbiguousBankError if the page matches more than one bank equally well.
 """
-def detect_bank(pdf_path: str) -> str | None:
-    text = extract_first_page_text(pdf_path)
-    bank_info = []
-    for bank_key, phrases in BANK_KEYWORDS.items():
-        i = 0
-        for phrase in phrases:
-            # If can't find phrase specific to bank move on to next bank
-            if i == 0:
-                if phrase in text:
-                    bank_info.append(bank_key)
-                else:
-                    break
-            else:
-                # Return once specific transaction account is found as banks may have different pdf formats
-                if phrase in text:
-                    bank_info.append(phrase)
-                    return bank_info
-            i += 1
-    return None
\ No newline at end of file
+def detect_bank(pdf_path) -> list | None:
+    with span('detection') as s:
+        best = best_match(rank_banks(pdf_path))
+        if best is None:
+            return None
+        s.info.update(bank=best.bank, account_type=best.account_type)
+    return [best.bank, best.account_type]
@@ -1,18 +1,26 @@
 import fitz
 import os.path
 import re
-from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, check_page_rotation, clean_up_values, remove_annots
+from .utils import export_to_csv, is_datetime, reformat_date, csv_rename
+from .document import open_statement
+from .table import extract_cells, boundaries
+from .events import emit
+from .dates import date_ordinal
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows
+
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
 
 """
 Get the opening and closing balances from the first page and prints them
 Returns the difference in balances to compare to running amount at the end
 """
-def diff_balances(doc):
+def diff_balances(statement):
     
     rect = fitz.Rect(0,10,600,350)
-    page = doc[0]
-    remove_annots(page)
-    text = page.get_text(clip=rect) + "\n"
+    page = statement.page(0)
+    text = statement.text(page, clip=rect) + "\n"
     lines = text.split('\n')
     
     running_balance = 0
@@ -34,115 +42,118 @@ def diff_balances(doc):
             balance_flag = True
             continue
         if balance_flag == True:
-            running_balance = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained opening balance: ${running_balance}")
+            running_balance = parse_cents(line[1:])
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
             balance_flag = False
             continue
         if line == 'Deposits & credits':
             credits_flag = True
             continue
         if credits_flag == True:
-            credits = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total credits: ${credits}")
+            credits = parse_cents(line[1:])
+            emit('balance', "Obtained total credits: ${cents!d}", name='credits', source='statement', cents=credits)
             credits_flag = False
             continue
         if line == 'Withdrawals & debits':
             debits_flag = True
             continue
         if debits_flag == True:
-            debits = -round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total debits: ${debits}")
+            debits = -parse_cents(line[1:])
+            emit('balance', "Obtained total debits: ${cents!d}", name='debits', source='statement', cents=debits)
             debits_flag = False
             continue
         if line[:18] == 'Closing Balance on':
             closing_flag = True
             continue
         if closing_flag == True:
-            closing_balance = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained closing balance: ${closing_balance}")
+            closing_balance = parse_cents(line[1:])
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
             closing_flag = False            
-            diff_amount = round(closing_balance - running_balance, 2)
-            print(f"Obtained difference between opening and closing balance: ${diff_amount}")
-            print(f"-------------------------------------------------")
+            diff_amount = closing_balance - running_balance
+            emit('balance', "Obtained difference between opening and closing balance: ${cents!d}", name='difference', source='statement', cents=diff_amount)
+            emit('section')
             break
     
-    return (round(credits, 2), round(debits, 2), diff_amount, running_balance, closing_balance)
+    return (credits, debits, diff_amount, running_balance, closing_balance)
 
-"""Get the transactions"""
-def get_transactions(pdf_path: str):        
-    doc = check_page_rotation(pdf_path)
-    
-    amnt_checks = diff_balances(doc)
+"""
+Extract the text of the table cells of one page, or None if it has no table
+"""
+def page_cells(statement, page):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+    # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
+    line_art = statement.line_art(page)  # extract page's line art
+    if not line_art:
+        return None
+
+    # make list of row shading rectangles
+    # they must be large enough (width & height) and have a fill color
+    grids = [  # subselect shading rectangles
+        r for r in line_art.boxes if r.width > 80 and r.height > 20 and r.fill
+    ]
+    # the column coordinates are given ... by someone
+    x_values = set([40,96,320,440,510,580])
+
+    y_values = set()  # these need to be computed now
+
+    for r in grids:  # walk through shading rectangles
+        # and add their coordinates to what we have
+        x_values.add(round(r.x0))  # left of shading
+        x_values.add(round(r.x1))  # right of shading
+        y_values.add(round(r.y0))  # top of shading
+        y_values.add(round(r.y1))  # bottom of shading
+
+    # the page top and bottom needs to be added as y-coordinate as well
+    # top transaction otherwise will not be found if first transaction is not shaded
+    r = page.search_for("Bendigo and Adelaide Bank Limited ABN 11 068 049 178 AFSL/Australian Credit Licence 237879")[0]  # do not include footer line
+    y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
+
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = boundaries(x_values)
+    y_values = boundaries(y_values)
+
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
+
+"""
+Get the transactions
+Yields the transactions as they are read, in a TransactionBatch per page
+"""
+def get_transactions(statement):
+    amnt_checks = diff_balances(statement)
     init_credits, init_debits = amnt_checks[0], amnt_checks[1]
     diff_amount, running_balance, closing_balance = amnt_checks[2], amnt_checks[3], amnt_checks[4]
     
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     t_line = 0     
     tot_credit = 0
     tot_debit = 0
     tot_running = 0
     summary_flag = False
               
-    for page in doc:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        if not page.get_drawings():
-            continue
+    for _, cells in statement.map_pages(page_cells):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
-        paths = page.get_drawings()  # extract page's line art
-
-        # make list of row shading rectangles
-        # they must be large enough (width & height) and have a fill color
-        grids = [  # subselect shading rectangles
-            p for p in paths if p["rect"].width > 80 and p["rect"].height > 20 and p["fill"]
-        ]
-        # the column coordinates are given ... by someone
-        x_values = set([40,96,320,440,510,580])
-
-        y_values = set()  # these need to be computed now
-
-        for p in grids:  # walk through shading rectangles
-            # and add their coordinates to what we have
-            r = p["rect"]
-            x_values.add(round(r.x0))  # left of shading
-            x_values.add(round(r.x1))  # right of shading
-            y_values.add(round(r.y0))  # top of shading
-            y_values.add(round(r.y1))  # bottom of shading
-
-        # the page top and bottom needs to be added as y-coordinate as well
-        # top transaction otherwise will not be found if first transaction is not shaded
-        r = page.search_for("Bendigo and Adelaide Bank Limited ABN 11 068 049 178 AFSL/Australian Credit Licence 237879")[0]  # do not include footer line
-        y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
-
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        x_values = clean_up_values(x_values)
-        y_values = sorted(list(y_values))
-        y_values = clean_up_values(y_values)
-
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
+        if cells is None:  # empty page, or no table on it
+            continue
 
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if is_datetime(text, "%d %b %y"):
-                        comb_data[t_line+1].append(reformat_date(text))
+                        ordinal = date_ordinal(text)
+                        row_data.append(reformat_date(text))
                         continue
                     else:
                         break
@@ -154,64 +165,81 @@ def get_transactions(pdf_path: str):
                         # Only works if multiple of same amount; LIKELY FOR BUG TO OCCUR HERE
                         match_str = str(round(float(match[0]) * float(match[2]), 2))
                         summary_flag = True
-                    comb_data[t_line+1].append(text.strip())
+                    row_data.append(text.strip())
                     continue
                 if j == 2:
                     if text and (summary_flag == True):
-                        comb_data[t_line+1].append('-' + match_str)
-                        running_balance -= float(match_str)
-                        tot_running -= float(match_str)
-                        tot_debit -= float(match_str)     
+                        row_data.append('-' + match_str)
+                        cents = -parse_cents(match_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                         summary_flag = False                  
                     elif text:
                         amount_str = str(text.replace(',', '').replace('$', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                     continue
                 if j == 3:
                     if text and (summary_flag == True):
-                        comb_data[t_line+1].append(match_str)
-                        running_balance += float(match_str)
-                        tot_running += float(match_str)
-                        tot_debit += float(match_str)     
+                        row_data.append(match_str)
+                        cents = parse_cents(match_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                         summary_flag = False    
                     elif text:
                         amount_str = str(text.replace(',', '').replace('$', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_balance += float(amount_str)
-                        tot_running += float(amount_str)
-                        tot_credit += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_credit += cents
                     continue
                 if j == 4:
-                    given_balance = round(float(text.replace(',', '').replace('$', '').strip()), 2)
-                    if round(running_balance, 2) == given_balance:
+                    given_balance = parse_cents(text)
+                    if running_balance == given_balance:
                         continue
                     else:
-                        raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                        raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                     Find at row: {i}"))
                     
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
             t_line += 1
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated closing balance: ${round(running_balance, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    batch.opening, batch.closing = amnt_checks[3], amnt_checks[4]  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
+    
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated closing balance: ${cents!d}", name='closing', source='calculated', cents=running_balance)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
             
-    if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits) and \
-        (round(running_balance, 2) == round(closing_balance, 2)):
-        print('Running balance, closing balance and difference between total credits and total debits same.')
-        print(f"-------------------------------------------------")
+    if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits) and \
+        (running_balance == closing_balance):
+        emit('check', 'Running balance, closing balance and difference between total credits and total debits same.')
+        emit('section')
     else:
-        raise (ValueError(f"Running balance and difference between total credits and total debits do not match: {running_balance}, {diff_amount}"))
-
-    return comb_data_clean
+        raise (ValueError(f"Running balance and difference between total credits and total debits do not match: {dollars(running_balance)}, {dollars(diff_amount)}"))
             
-def convert_ben(pdf_path: str):
-    data = get_transactions(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+"""
+Get the transactions as TransactionBatch objects, yielded as they are read.
+account_type is only there to match the other converters, this bank has one
+statement type
+"""
+def extract_ben(statement, account_type: str | None = None):
+    return get_transactions(statement)
+
+def convert_ben(pdf_path):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(get_transactions(statement)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+"""
+On-disk cache of finished conversions.
+
+Entries are keyed on the SHA-256 of the PDF's bytes together with the package
+version and a fingerprint of the converter code, and hold the detected bank,
+account type and the rows that were written to the CSV. A PDF that was already
+converted can then be written out again without opening it in PyMuPDF at all.
+The cache is a single SQLite file; once it grows past max_bytes the least
+recently used entries are evicted.
+"""
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE = "conversions.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversions (
+    key          TEXT PRIMARY KEY,
+    bank         TEXT NOT NULL,
+    account_type TEXT,
+    rows         BLOB NOT NULL,
+    size         INTEGER NOT NULL,
+    created      REAL NOT NULL,
+    last_used    REAL NOT NULL
+)
+"""
+
+"""
+Directory of the cache: $BSTC_CACHE_DIR, else $XDG_CACHE_HOME/bstc, else ~/.cache/bstc
+"""
+def default_cache_dir() -> Path:
+    if os.environ.get("BSTC_CACHE_DIR"):
+        return Path(os.environ["BSTC_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "bstc"
+
+"""SHA-256 of a file's contents, read in chunks"""
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+_fingerprint = None
+
+# the modules that produce the rows; the CLI, the services around it and the cache itself don't
+ROW_MODULES = ("document.py", "table.py", "dates.py", "money.py", "utils.py", "transactions.py",
+               "registry.py", "bank_detector.py")
+
+"""
+Identity of the conversion code: the package version, a hash of the modules
+that produce the rows, and the distributions (name and version) that add
+converters through entry points, so editing or upgrading a converter
+invalidates what it produced before
+"""
+def converter_identity() -> str:
+    global _fingerprint
+    if _fingerprint is None:
+        from importlib.metadata import entry_points
+        from . import __version__
+        from .registry import ENTRY_POINT_GROUP
+        digest = hashlib.sha256()
+        package_dir = Path(__file__).parent
+        sources = sorted([*package_dir.glob("*_converter.py"), *(package_dir / name for name in ROW_MODULES)])
+        for source in sources:
+            digest.update(source.name.encode())
+            digest.update(source.read_bytes())
+        plugins = {f"{ep.name}={ep.value}@{ep.dist.name} {ep.dist.version}" if ep.dist else f"{ep.name}={ep.value}"
+                   for ep in entry_points(group=ENTRY_POINT_GROUP)}
+        for plugin in sorted(plugins):
+            digest.update(plugin.encode())
+        _fingerprint = f"{__version__}:{digest.hexdigest()[:16]}"
+    return _fingerprint
+
+
+class ConversionCache:
+    """
+    SQLite-backed store of conversion results, see the module docstring.
+    Safe to use from several processes at once (e.g. `bstc folder --jobs`).
+    """
+    def __init__(self, directory=None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory) if directory is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / CACHE_FILE
+        self._db = sqlite3.connect(self.path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def key(self, pdf_path) -> str:
+        return f"{file_digest(pdf_path)}:{converter_identity()}"
+
+    def get(self, key: str):
+        """Return (bank, account_type, rows) for key, or None on a miss"""
+        row = self._db.execute(
+            "SELECT bank, account_type, rows FROM conversions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            self._db.execute("UPDATE conversions SET last_used = ? WHERE key = ?", (time.time(), key))
+        bank, account_type, blob = row
+        return bank, account_type, json.loads(zlib.decompress(blob))
+
+    def put(self, key: str, bank: str, account_type, rows):
+        """Store rows (any iterable, e.g. a converter's generator) under key"""
+        writer = self.writer(key, bank, account_type)
+        for row in rows:
+            writer.write(row)
+        writer.close()
+
+    def writer(self, key: str, bank: str, account_type):
+        """
+        A sink (see sinks.py) that compresses rows as they are written and
+        stores them under key when closed, so a conversion can be streamed to
+        the CSV and into the cache at the same time
+        """
+        return _CacheWriter(self, key, bank, account_type)
+
+    def _store(self, key: str, bank: str, account_type, blob: bytes):
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO conversions VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, bank, account_type, blob, len(blob), now, now),
+            )
+        self.prune()
+
+    def size(self) -> tuple:
+        """(number of entries, total bytes of stored rows)"""
+        count, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM conversions").fetchone()
+        return count, total
+
+    def prune(self, max_bytes: int | None = None) -> int:
+        """
+        Evict least recently used entries until the stored rows fit in
+        max_bytes (default: the cache's own limit). Returns the number removed.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        _, total = self.size()
+        if total <= limit:
+            return 0
+        removed = []
+        for key, size in self._db.execute("SELECT key, size FROM conversions ORDER BY last_used").fetchall():
+            if total <= limit:
+                break
+            removed.append((key,))
+            total -= size
+        with self._db:
+            self._db.executemany("DELETE FROM conversions WHERE key = ?", removed)
+        return len(removed)
+
+    def clear(self) -> int:
+        with self._db:
+            return self._db.execute("DELETE FROM conversions").rowcount
+
+
+class _CacheWriter:
+    """Rows compressed into a JSON list as they arrive, see ConversionCache.writer()"""
+    def __init__(self, cache: ConversionCache, key: str, bank: str, account_type):
+        self._cache = cache
+        self._entry = (key, bank, account_type)
+        self._compressor = zlib.compressobj()
+        self._chunks = [self._compressor.compress(b"[")]
+        self._separator = b""
+
+    def write(self, row):
+        data = self._separator + json.dumps(row, separators=(",", ":")).encode()
+        self._chunks.append(self._compressor.compress(data))
+        self._separator = b","
+
+    def close(self):
+        self._chunks.append(self._compressor.compress(b"]"))
+        self._chunks.append(self._compressor.flush())
+        self._cache._store(*self._entry, b"".join(self._chunks))
+
+    def abort(self):
+        self._chunks.clear()
@@ -1,35 +1,31 @@
 import os.path
 import fitz
-from datetime import datetime
-from .utils import is_datetime, export_to_csv, csv_rename, remove_annots
+from .utils import is_datetime, export_to_csv, csv_rename
+from .dates import parse_date
+from .events import emit
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows, BATCH_SIZE
+from .document import open_statement
 
-# Function to extract text from a rectangular area on a PDF page
-def text_from_area(pdf_path: str):
-    doc = fitz.open(pdf_path)
-    
-    text = ''
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Amount', 'Transaction Details'), date_format="%d-%b-%y")
+
+# Function to extract the lines of text from a rectangular area on each PDF page,
+# one page at a time
+def lines_from_area(statement):
     rect = fitz.Rect(50,100,600,1200)
     
-    for page_number in range(doc.page_count):
-        if page_number == 0:
-            page = doc[0]
-            remove_annots(page)
-            rect0 = fitz.Rect(50,500,600,1200)
-            text += page.get_text(clip=fitz.Rect(50,500,600,1200)) + "\n"
+    for page in statement.pages(raw=True):
+        if page.number == 0:
+            yield from statement.text(page, clip=fitz.Rect(50,500,600,1200)).split('\n')
             continue
-        page = doc[page_number]
-        remove_annots(page)
-        text += page.get_text(clip=rect) + "\n"
-        
-    return text
+        yield from statement.text(page, clip=rect).split('\n')
 
 # Function to return the range of the years in the statement period
-def statement_years(pdf_path: str):
-    doc = fitz.open(pdf_path)
+def statement_years(statement):
     rect = fitz.Rect(300,10,600,350)
-    page = doc[0]
-    remove_annots(page)
-    text = page.get_text(clip=rect) + "\n"
+    page = statement.page(0, raw=True)
+    text = statement.text(page, clip=rect) + "\n"
     lines = text.split('\n')
     years = ['2022', '2023', '2024', '2025', '2026', '2027']
     period_flag = False
@@ -45,18 +41,23 @@ def statement_years(pdf_path: str):
 
     return period_years
     
-def get_transactions(pdf_path: str):
+"""
+Yield the transactions in TransactionBatch objects as they are read.
+Raises ValueError after the last row if the balances don't add up.
+"""
+def get_transactions(statement):
     yr_rollover_flag = False
-    period_years = statement_years(pdf_path)
-    print(f"Number of year in the statement period: {len(period_years)}")
+    period_years = statement_years(statement)
+    emit('count', "Number of year in the statement period: {years}", years=len(period_years))
     if len(period_years) == 1:
         year = period_years[0]
     else:
         year = period_years[0]
         yr_rollover_flag = True
+    
+    batch = TransactionBatch(CSV_LAYOUT)
         
-    text = text_from_area(pdf_path)
-    lines = text.split('\n')
+    lines = lines_from_area(statement)
     
     # Need this to get amount if line detection puts transaction and amount in same line
     prev_line = ''
@@ -65,14 +66,16 @@ def get_transactions(pdf_path: str):
     date_format = "%d %b %Y"
     new_datef = "%d-%b-%y"
     date_flag = False
-    dates = []
+    date = ''
+    day = None
+    n_dates = 0
     
     transaction = ''
-    transactions = []
+    n_transactions = 0
     
-    amounts = []
+    n_amounts = 0
     
-    running_balance = 0
+    running_balance = opening_balance = 0
     balance_flag = False
     closing_balance = 0
     closing_flag = False
@@ -88,11 +91,11 @@ def get_transactions(pdf_path: str):
             continue
         if balance_flag == True:
             if line == 'Nil':
-                print(f"Obtained opening balance: ${running_balance}")
+                emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
                 balance_flag = False
                 continue
-            running_balance = round(float(line[1:-2].replace(',', '').strip()), 2)
-            print(f"Obtained opening balance: ${running_balance}")
+            running_balance = opening_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
             balance_flag = False
             continue
         
@@ -102,13 +105,13 @@ def get_transactions(pdf_path: str):
             continue
         if closing_flag == True:
             if line == 'Nil':
-                print(f"Obtained closing balance: ${closing_balance}")
-                print(f"-------------------------------------------------")
+                emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
+                emit('section')
                 closing_flag = False
                 break
-            closing_balance = round(float(line[1:-2].replace(',', '').strip()), 2)
-            print(f"Obtained closing balance: ${closing_balance}")
-            print(f"-------------------------------------------------")
+            closing_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
+            emit('section')
             closing_flag = False
             break
         
@@ -116,15 +119,21 @@ def get_transactions(pdf_path: str):
         if line[0] == '$' and date_flag == True:
             if line == '$':
                 amount = prev_line.replace(',', '').strip()
-                running_balance -= round(float(amount), 2)
-                amounts.append('-' + str(amount))
+                cents = -parse_cents(amount)
+                amount = '-' + str(amount)
                 transaction = transaction[:-len(prev_line)] # Remove amount from transaction text
             else:
                 amount = line[1:].replace(',', '').strip()
-                running_balance += round(float(amount), 2)
-                amounts.append(str(amount))
+                cents = parse_cents(amount)
+                amount = str(amount)
+            running_balance += cents
+            n_amounts += 1
 
-            transactions.append(transaction.strip())
+            n_transactions += 1
+            batch.append_row([date, amount, transaction.strip()], day.toordinal(), cents)
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = TransactionBatch(CSV_LAYOUT)
             date_flag = False
             transaction = ''
             continue
@@ -134,7 +143,7 @@ def get_transactions(pdf_path: str):
             if line == 'DEBIT INTEREST CHARGED on this account':
                 date_flag = False
                 transaction = ''
-                dates.pop()
+                n_dates -= 1
                 continue
             transaction = transaction + ' ' + line
             prev_line = line
@@ -142,12 +151,11 @@ def get_transactions(pdf_path: str):
         
         # Check whether running balance is equal to given line balance
         if line[0] == '$' and line[-3:] == ' CR':
-            given_balance = round(float(line[1:-2].replace(',', '').strip()), 2)
-            running_balance = round(running_balance, 2)
+            given_balance = parse_cents(line)
             if running_balance == given_balance:
                 continue
             else:
-                raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                     Find at line: {line}"))
         
         # Checks the first instance of ' JAN ' and if year rollover flag is raised; if so then update year
@@ -157,32 +165,42 @@ def get_transactions(pdf_path: str):
             
         # Checks whether line is a date using datetime function; also adds start of transaction name
         if is_datetime(str(line[:6] + " " + year), date_format):
-            dates.append((datetime.strptime((line[:6] + " " + year), date_format).strftime(new_datef)))
+            day = parse_date(line[:6] + " " + year, date_format)
+            date = day.strftime(new_datef)
+            n_dates += 1
             date_flag = True
             transaction = line[7:].strip()
             prev_line = line
             continue
     
-    if (len(dates) == len(transactions)) and (len(transactions) == len(amounts)):
-        print(f"Number of transactions match: {len(dates)}")
+    batch.opening, batch.closing = opening_balance, closing_balance  # balances as the statement gives them
+    yield batch  # the rest, possibly empty: converters yield at least one batch
+    
+    if (n_dates == n_transactions) and (n_transactions == n_amounts):
+        emit('count', "Number of transactions match: {transactions}", transactions=n_dates)
     else:
-        raise (ValueError(f"Length of transactions does not match: \n Dates: {len(dates)} \n \
-                            Transactions: {len(transactions)} \n Amounts: {len(amounts)}"))
+        raise (ValueError(f"Length of transactions does not match: \n Dates: {n_dates} \n \
+                            Transactions: {n_transactions} \n Amounts: {n_amounts}"))
         
-    # Combine the data into a single array so it is easier to convert to csv
+    # The rows were already yielded; check them now that the closing balance is known
     if running_balance == closing_balance:
-        print('Running balance and closing balance match.')
-        print(f"-------------------------------------------------")
-        comb_data = [['Date', 'Amount', 'Transaction Details']]
-        for i in range(len(dates)):
-            comb_data.append([dates[i], amounts[i], transactions[i]])
+        emit('check', 'Running balance and closing balance match.')
+        emit('section')
     else:
-        raise (ValueError(f"Running balance and closing balance do not match: {running_balance}, {closing_balance}"))
-
-    return comb_data
+        raise (ValueError(f"Running balance and closing balance do not match: {dollars(running_balance)}, {dollars(closing_balance)}"))
         
-def convert_cba(pdf_path: str):
-    data = get_transactions(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+"""
+Get the transactions as TransactionBatch objects, yielded as they are read.
+account_type is only there to match the other converters, this bank has one
+statement type
+"""
+def extract_cba(statement, account_type: str | None = None):
+    return get_transactions(statement)
+
+def convert_cba(pdf_path):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(get_transactions(statement)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
\ No newline at end of file
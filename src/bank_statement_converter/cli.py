@@ -1,55 +1,317 @@
 import argparse
 import os
-from pathlib import Path
-
-from bank_statement_converter import detect_bank, csv_to_qif, convert_anz, \
-    convert_ben, convert_cba, convert_mqg, convert_nab, convert_wbc, convert_zel
-
-def pdf2csv_qif(pdf_path: str, do_qif: bool, rm_csv: bool):
-    bank_info = detect_bank(pdf_path)
-    bank = bank_info[0]
-    account_type = bank_info[1]
-    
-    if not bank:
-        raise ValueError(f"Could not detect bank from PDF: {pdf_path!r}")
-    print(f"Detected bank: {bank.upper()}")
-    print(f"Detected account type: {account_type.upper()}")
-    print("-------------------------------------------------")
-
-    # dispatch to the correct converter
-    if bank == 'cba':
-        csv_path = convert_cba(pdf_path)
-    elif bank == 'nab':
-        csv_path = convert_nab(pdf_path, account_type)
-    elif bank == 'anz':
-        csv_path = convert_anz(pdf_path)
-    elif bank == 'wbc':
-        csv_path = convert_wbc(pdf_path, account_type)
-    elif bank == 'ben':
-        csv_path = convert_ben(pdf_path)
-    elif bank == 'zel':
-        csv_path = convert_zel(pdf_path)
-    elif bank == 'mqg':
-        csv_path = convert_mqg(pdf_path)
-    else:
-        raise ValueError(f"No converter implemented for bank {bank!r}")
+import sys
+from typing import NamedTuple
+
+# PyMuPDF, the converters and the cache are imported where they are used, so
+# that startup stays fast for `bstc --help` and `bstc csv2qif`
+
+def open_cache():
+    """The conversion cache, or None (with a warning) if it can't be opened"""
+    import sqlite3
+    from bank_statement_converter.cache import ConversionCache
+    from bank_statement_converter.events import emit
+    try:
+        return ConversionCache()
+    except (OSError, sqlite3.Error) as e:
+        emit('warning', "WARNING: conversion cache unavailable ({error}); converting without it", error=str(e))
+        return None
+
+
+def pdf2csv_qif(pdf_path: str, do_qif: bool, rm_csv: bool, use_cache: bool = True, page_jobs: int = 1,
+                listener=None):
+    """
+    Convert a PDF to CSV and/or QIF next to it; returns the paths written.
+    Progress goes to listener as events (see events.py), printed if there is none.
+    """
+    from bank_statement_converter.events import job, print_event
+    with job(pdf_path, listener or print_event):
+        return _pdf2csv_qif(pdf_path, do_qif, rm_csv, use_cache, page_jobs)
+
+
+def _pdf2csv_qif(pdf_path: str, do_qif: bool, rm_csv: bool, use_cache: bool, page_jobs: int):
+    from pathlib import Path
+    from bank_statement_converter import detect_bank, StatementDocument
+    from bank_statement_converter.events import emit
+    from bank_statement_converter.registry import extract_rows
+    from bank_statement_converter.sinks import CsvSink, QifSink, write_rows
+    from bank_statement_converter.utils import csv_rename
+
+    csv_path = csv_rename(pdf_path)
+    qif_path = str(Path(pdf_path).with_suffix(".qif"))
+    # the QIF is made from the same rows as the CSV, so with rm_csv no CSV is written at all
+    outputs = [] if do_qif and rm_csv else [csv_path]
+    if do_qif:
+        outputs.append(qif_path)
+
+    def file_sinks():
+        sinks = []
+        if csv_path in outputs:
+            sinks.append(CsvSink(csv_path))
+        if do_qif:
+            sinks.append(QifSink(qif_path))
+        return sinks
+
+    cache = open_cache() if use_cache else None
+    try:
+        key = cache.key(pdf_path) if cache else None
+        cached = cache.get(key) if cache else None
+
+        if cached is not None:
+            # unchanged PDF converted before: no need to open it at all
+            bank, account_type, rows = cached
+            emit('detected', DETECTED, bank=bank, account_type=account_type, pages=None)
+            emit('section')
+            emit('cached', "Using cached conversion (PDF unchanged since it was last converted)")
+            emit('section')
+            write_rows(rows, file_sinks())
+        else:
+            # open the PDF once; detection and the converter share the document
+            with StatementDocument(pdf_path, page_jobs=page_jobs) as statement:
+                bank_info = detect_bank(statement)  # AmbiguousBankError if it matches several banks
+                if not bank_info:
+                    raise ValueError(f"Could not detect bank from PDF: {pdf_path!r}")
+                bank, account_type = bank_info
+
+                emit('detected', DETECTED, bank=bank, account_type=account_type, pages=statement.raw.page_count)
+                emit('section')
 
-    print(f"Created CSV: {csv_path}")
+                # dispatch to the correct converter (imported on first use); its
+                # rows go to the CSV and/or QIF (and the cache) as they are read
+                rows = extract_rows(statement, bank, account_type)
+                sinks = file_sinks()
+                if cache:
+                    sinks.append(cache.writer(key, bank, account_type))
+                write_rows(rows, sinks)
+    finally:
+        if cache:
+            cache.close()
 
+    if csv_path in outputs:
+        emit('output', "Created CSV: {path}", path=csv_path)
     if do_qif:
-        print("-------- Converting CSV to QIF --------")
-        qif_path = csv_to_qif(csv_path)
-        print(f"Created QIF: {qif_path}")
-        
-        if rm_csv:
-            print("---------- Removing CSV File ----------")
-            os.remove(csv_path)
-            print(f"Removed CSV: {csv_path}")
-            return [qif_path]
-        
-        return [csv_path, qif_path]
+        emit('output', "Created QIF: {path}", path=qif_path)
+    return outputs
+
+DETECTED = "Detected bank: {bank!u}\nDetected account type: {account_type!u}"
+
+
+def convert_profiled(pdf_path: str, do_qif: bool, rm_csv: bool, use_cache: bool = True, page_jobs: int = 1,
+                     dump_dir: str | None = None, profiler: str = 'cprofile', listener=None):
+    """
+    pdf2csv_qif() with its stages timed, and profiled into dump_dir if given.
+    Returns (outputs, stage times as StageTimes.as_dict()).
+    """
+    from bank_statement_converter.profiling import StageTimes, dump_profile
+    with StageTimes(path=pdf_path) as times, dump_profile(dump_dir, pdf_path, profiler):
+        outputs = pdf2csv_qif(pdf_path, do_qif, rm_csv, use_cache, page_jobs, listener)
+    return outputs, times.as_dict()
+
+
+class JobResult(NamedTuple):
+    """What convert_job() returns"""
+    outputs: list
+    log: str                 # the messages, as the CLI prints them
+    error: str | None
+    times: dict | None       # stage times (StageTimes.as_dict()) with profile
+    pages: int | None        # pages of the PDF, None if it came from the cache or couldn't be read
+    seconds: float
+
+
+def convert_job(pdf_path: str, do_qif: bool, rm_csv: bool, use_cache: bool = True,
+                profile: bool = False, dump_dir: str | None = None, profiler: str = 'cprofile') -> JobResult:
+    """
+    Run pdf2csv_qif for one file of a batch, in a worker process or thread.
+    Its messages are collected so they can be printed in order by the parent;
+    errors are returned instead of raised so one bad PDF does not stop the batch.
+    """
+    from bank_statement_converter.events import RULE
+    lines = []
+    info = {'pages': None, 'seconds': 0.0}
+
+    def collect(event):
+        if event.kind == 'section':
+            lines.append(RULE)
+        elif event.template:
+            lines.append(event.message)
+        if event.kind == 'detected':
+            info['pages'] = event.data.get('pages')
+        elif event.kind == 'finished':
+            info['seconds'] = event.data['seconds']
+
+    times = None
+    error = None
+    outs = []
+    try:
+        if profile:
+            outs, times = convert_profiled(pdf_path, do_qif, rm_csv, use_cache,
+                                           dump_dir=dump_dir, profiler=profiler, listener=collect)
+        else:
+            outs = pdf2csv_qif(pdf_path, do_qif, rm_csv, use_cache, listener=collect)
+    except Exception as e:
+        error = str(e)
+    log = "".join(line + "\n" for line in lines)
+    return JobResult(outs, log, error, times, info['pages'], info['seconds'])
+
+
+def map_isolated(fn, jobs: int, calls: list, failed):
+    """
+    Run fn(*args) for each args in calls on a pool of jobs worker processes and
+    yield the results in input order. No more calls are in flight than there
+    are workers, so a worker that dies (a crash in PyMuPDF on a hostile PDF, the
+    OOM killer) only takes the calls running beside it: failed(error) stands in
+    for their results and the rest go on in a new pool.
+    """
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from concurrent.futures.process import BrokenProcessPool
+
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    running = {}          # future -> (index in calls, pool it runs on)
+    results = {}          # index -> result, until the ones before it are yielded
+    submitted = yielded = 0
+    try:
+        while yielded < len(calls):
+            while submitted < len(calls) and len(running) < jobs:
+                running[pool.submit(fn, *calls[submitted])] = (submitted, pool)
+                submitted += 1
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, ran_on = running.pop(future)
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    results[index] = failed(str(e))
+                    if isinstance(e, BrokenProcessPool) and ran_on is pool:  # its workers are gone already
+                        pool.shutdown(cancel_futures=True)
+                        pool = ProcessPoolExecutor(max_workers=jobs)
+            while yielded in results:
+                yield results.pop(yielded)
+                yielded += 1
+    finally:
+        pool.shutdown(cancel_futures=True)
 
-    return [csv_path]
+
+def watch_folder(folder: str, do_qif: bool, rm_csv: bool, use_cache: bool = True, jobs: int = 1,
+                 interval: float = 1.0, settle: float = 2.0, once: bool = False):
+    """
+    Convert the PDFs that arrive in folder as they settle, on a pool of jobs
+    worker processes (kept warm between files), until interrupted; with once,
+    stop when everything new has been converted. Returns the paths written.
+    """
+    import time
+    from collections import deque
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    from bank_statement_converter.watch import FolderWatcher
+
+    watcher = FolderWatcher(folder, settle=settle)
+    queue = deque()       # settled PDFs waiting for a worker
+    running = {}          # future -> (path, submitted at)
+    all_out = []
+    print(f"Watching {folder} for new PDFs (Ctrl+C to stop)")
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        while True:
+            for path in watcher.poll():
+                if path not in queue:
+                    queue.append(path)
+            # no more files in flight than workers, the rest waits here
+            while queue and len(running) < jobs:
+                path = queue.popleft()
+                running[pool.submit(convert_job, path, do_qif, rm_csv, use_cache)] = (path, time.perf_counter())
+
+            if once and not (queue or running or watcher.pending):
+                break
+            if not running:
+                time.sleep(interval)
+                continue
+            done, _ = wait(running, timeout=interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, submitted = running.pop(future)
+                outs, log, error, *_ = future.result()
+                name = os.path.basename(path)
+                print(f"\n=== Processing {name} ===")
+                print(log, end='')
+                if error is not None:
+                    print(f"ERROR on {name}: {error}")
+                else:
+                    print(f"Converted {name} in {time.perf_counter() - submitted:.1f} s")
+                all_out.extend(outs)
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return all_out
+
+
+def print_profile(profiles: list, json_path: str | None, summary: bool):
+    """
+    Report the stage times of the converted files (StageTimes.as_dict() each):
+    a table per file and one for all of them, and/or JSON to json_path ('-' for stdout)
+    """
+    import json
+    from bank_statement_converter.profiling import StageTimes
+    total = StageTimes()
+    for times in profiles:
+        total.add(times)
+    if summary:
+        for times in profiles:
+            labels = times['labels']
+            single = StageTimes(**labels)
+            single.add(times)
+            pages = labels.get('pages')
+            rate = f", {pages / times['wall_seconds']:.1f} pages/sec" if pages and times['wall_seconds'] else ""
+            print("-------------------------------------------------")
+            print(f"Profile: {os.path.basename(labels['path'])} "
+                  f"({str(labels.get('bank', 'cached')).upper()}, {labels.get('account_type', '-')}, "
+                  f"{pages or '?'} pages{rate})")
+            print(single.summary())
+        if len(profiles) > 1:
+            print("-------------------------------------------------")
+            print(f"Profile: all {len(profiles)} files")
+            print(total.summary())
+    if json_path is not None:
+        report = json.dumps({'files': profiles, 'total': total.as_dict()}, indent=2)
+        if json_path == '-':
+            print(report)
+        else:
+            with open(json_path, 'w') as f:
+                f.write(report + "\n")
+            print(f"Profile written to {json_path}")
+
+
+def csv2qif_job(csv_path: str):
+    """Convert one CSV of `bstc csv2qif --folder`; returns (qif_path, error) so it can run in a worker process"""
+    from bank_statement_converter import csv_to_qif
+    try:
+        return csv_to_qif(csv_path), None
+    except Exception as e:
+        return None, str(e)
+
+
+def detect_job(pdf_path: str):
+    """
+    Rank the banks a PDF matches, for `bstc detect`; only the metadata and the
+    first page are read. Returns (matches, error) so it can run in a worker process.
+    """
+    from bank_statement_converter import rank_banks
+    try:
+        return rank_banks(pdf_path), None
+    except Exception as e:
+        return [], str(e)
+
+
+def describe_detection(matches: list) -> tuple:
+    """The best match from rank_banks() (or None) and a one line summary of it"""
+    from bank_statement_converter.bank_detector import best_match, AmbiguousBankError
+    try:
+        best = best_match(matches)
+    except AmbiguousBankError as e:
+        return None, f"AMBIGUOUS - {e}"
+    if best is None:
+        if matches:  # bank phrase without any known account type
+            return None, f"{matches[0].bank.upper()} - unknown account type"
+        return None, "could not detect bank"
+    return best, f"{best.bank.upper()} - {best.account_type} (confidence {best.confidence:.2f})"
 
 
 def main():
@@ -57,6 +319,22 @@ def main():
         prog='bstc',
         description='Convert bank PDF → CSV (and optional QIF), or CSV → QIF'
     )
+    p.add_argument(
+        '--profile', action='store_true',
+        help="Time the stages of each conversion (file, folder) and print a summary"
+    )
+    p.add_argument(
+        '--profile-json', metavar='PATH',
+        help="Write the stage times as JSON to PATH ('-' for stdout); implies --profile"
+    )
+    p.add_argument(
+        '--profile-dump', metavar='DIR',
+        help="Also run a profiler on each conversion and save its output in DIR"
+    )
+    p.add_argument(
+        '--profiler', choices=['cprofile', 'pyinstrument'], default='cprofile',
+        help="Profiler for --profile-dump: cProfile .prof files or pyinstrument HTML (default: cprofile)"
+    )
     subs = p.add_subparsers(dest='cmd')
 
     # file: auto-detect PDF → CSV(/QIF)
@@ -67,11 +345,19 @@ def main():
     file_p.add_argument('pdf_path', help="Path to the input PDF")
     file_p.add_argument(
         '-q', '--qif', action='store_true',
-        help="Also convert the resulting CSV to QIF"
+        help="Also write a QIF"
     )
     file_p.add_argument(
         '-r', '--rm_csv', action='store_true',
-        help="Remove intermediary CSV after conversion to QIF (use in conjunction with -q)"
+        help="Only write the QIF, no CSV (use in conjunction with -q)"
+    )
+    file_p.add_argument(
+        '--no-cache', dest='use_cache', action='store_false',
+        help="Always re-convert the PDF instead of reusing a cached conversion"
+    )
+    file_p.add_argument(
+        '-j', '--page-jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of processes reading the pages of a long statement in parallel (default: number of CPUs)"
     )
 
     # folder: batch-convert all PDFs in a folder
@@ -82,25 +368,161 @@ def main():
     fld_p.add_argument('folder_path', help="Path to folder containing PDFs")
     fld_p.add_argument(
         '-q', '--qif', action='store_true',
-        help="Also convert each CSV to QIF"
+        help="Also write a QIF for each PDF"
     )
     fld_p.add_argument(
         '-r', '--rm_csv', action='store_true',
-        help="Remove intermediary CSV after conversion to QIF (use in conjunction with -q)"
+        help="Only write the QIF, no CSV (use in conjunction with -q)"
+    )
+    fld_p.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of PDFs to convert in parallel (default: number of CPUs)"
+    )
+    fld_p.add_argument(
+        '--no-cache', dest='use_cache', action='store_false',
+        help="Always re-convert the PDFs instead of reusing cached conversions"
     )
 
-    # csv2qif: single CSV → QIF
+    # detect: only detect the bank of each PDF, e.g. to sort incoming statements
+    det_p = subs.add_parser(
+        'detect',
+        help='Detect the bank and account type of a PDF, or of all PDFs in a folder, without converting'
+    )
+    det_p.add_argument('path', help="Path to a PDF or a folder containing PDFs")
+    det_p.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of PDFs to read in parallel (default: number of CPUs)"
+    )
+
+    # watch: convert PDFs as they arrive in a folder
+    watch_p = subs.add_parser(
+        'watch',
+        help='Watch a folder and convert new or changed PDFs → CSV (optional QIF) as they arrive'
+    )
+    watch_p.add_argument('folder_path', help="Path to the folder to watch")
+    watch_p.add_argument(
+        '-q', '--qif', action='store_true',
+        help="Also write a QIF for each PDF"
+    )
+    watch_p.add_argument(
+        '-r', '--rm_csv', action='store_true',
+        help="Only write the QIF, no CSV (use in conjunction with -q)"
+    )
+    watch_p.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of PDFs to convert in parallel (default: number of CPUs)"
+    )
+    watch_p.add_argument(
+        '--interval', type=float, default=1.0, metavar='SECONDS',
+        help="How often to look for new PDFs (default: 1)"
+    )
+    watch_p.add_argument(
+        '--settle', type=float, default=2.0, metavar='SECONDS',
+        help="How long a PDF must stay unchanged before it is converted, so half written files are skipped (default: 2)"
+    )
+    watch_p.add_argument(
+        '--once', action='store_true',
+        help="Convert the new PDFs and exit instead of watching"
+    )
+    watch_p.add_argument(
+        '--no-cache', dest='use_cache', action='store_false',
+        help="Always re-convert PDFs instead of reusing cached conversions"
+    )
+
+    # serve: local HTTP conversion service
+    serve_p = subs.add_parser(
+        'serve',
+        help='Run a local HTTP service converting uploaded PDFs'
+    )
+    serve_p.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    serve_p.add_argument('--port', type=int, default=8765, help="Port to listen on (default: 8765)")
+    serve_p.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of worker processes converting PDFs (default: number of CPUs)"
+    )
+    serve_p.add_argument(
+        '--max-queue', type=int, default=100,
+        help="Number of jobs that may wait for a worker before uploads are refused (default: 100)"
+    )
+    serve_p.add_argument(
+        '--max-upload', type=float, default=50, metavar='MB',
+        help="Largest PDF accepted, in megabytes (default: 50)"
+    )
+
+    # daemon: keep the converters loaded for file/folder/csv2qif
+    daemon_p = subs.add_parser(
+        'daemon',
+        help='Keep the converters loaded in the background so bstc file/folder/csv2qif start instantly'
+    )
+    daemon_action = daemon_p.add_mutually_exclusive_group()
+    daemon_action.add_argument('--stop', action='store_true', help="Stop the running daemon")
+    daemon_action.add_argument('--status', action='store_true', help="Show whether a daemon is running")
+
+    # csv2qif: CSV → QIF, one file or every CSV in a folder
     csv_p = subs.add_parser(
         'csv2qif',
-        help='Convert one CSV → QIF'
+        help='Convert one CSV → QIF, or all CSVs in a folder'
+    )
+    csv_p.add_argument('csv_path', nargs='?', help="Path to the input CSV")
+    csv_p.add_argument(
+        '--folder', dest='csv_folder', metavar='FOLDER',
+        help="Convert every CSV in this folder instead of a single file"
+    )
+    csv_p.add_argument(
+        '-j', '--jobs', type=int, default=os.cpu_count() or 1,
+        help="Number of CSVs to convert in parallel with --folder (default: number of CPUs)"
+    )
+
+    # cache: manage the cache of converted PDFs
+    cache_p = subs.add_parser(
+        'cache',
+        help='Manage the cache of converted PDFs'
+    )
+    cache_subs = cache_p.add_subparsers(dest='cache_cmd')
+    prune_p = cache_subs.add_parser(
+        'prune',
+        help='Evict least recently used conversions from the cache'
+    )
+    prune_p.add_argument(
+        '--max-size', type=float, default=None, metavar='MB',
+        help="Shrink the cache to at most this many megabytes (default: the cache's size limit)"
+    )
+    prune_p.add_argument(
+        '--all', action='store_true',
+        help="Remove every cached conversion"
+    )
+    cache_subs.add_parser(
+        'info',
+        help='Show where the cache is and how big it is'
     )
-    csv_p.add_argument('csv_path', help="Path to the input CSV")
 
     args = p.parse_args()
+    profile = args.profile or args.profile_json is not None or args.profile_dump is not None
+    if args.profiler == 'pyinstrument' and args.profile_dump is not None:
+        import importlib.util
+        if importlib.util.find_spec('pyinstrument') is None:
+            p.error("--profiler pyinstrument needs pyinstrument (pip install pyinstrument)")
+    profiles = []
+
+    if args.cmd in ('file', 'folder', 'csv2qif'):
+        # run in the daemon if one is running (see daemon.py)
+        from bank_statement_converter.daemon import forward
+        code = forward(sys.argv[1:])
+        if code is not None:
+            sys.exit(code)
+
     if args.cmd == 'file':
-        outputs = pdf2csv_qif(args.pdf_path, args.qif, args.rm_csv)
+        if args.page_jobs < 1:
+            p.error("--page-jobs must be at least 1")
+        if profile:
+            outputs, times = convert_profiled(args.pdf_path, args.qif, args.rm_csv, args.use_cache, args.page_jobs,
+                                              args.profile_dump, args.profiler)
+            profiles.append(times)
+        else:
+            outputs = pdf2csv_qif(args.pdf_path, args.qif, args.rm_csv, args.use_cache, args.page_jobs)
 
     elif args.cmd == 'folder':
+        from pathlib import Path
         folder = Path(args.folder_path)
         if not folder.is_dir():
             p.error(f"{folder!r} is not a directory")
@@ -108,27 +530,186 @@ def main():
         if not pdfs:
             print(f"No PDFs found in {folder}")
             return
+        if args.jobs < 1:
+            p.error("--jobs must be at least 1")
 
         all_out = []
-        for pdf in pdfs:
-            print(f"\n=== Processing {pdf.name} ===")
-            try:
-                outs = pdf2csv_qif(str(pdf), args.qif, args.rm_csv)
+        if args.jobs == 1 or len(pdfs) == 1:
+            for pdf in pdfs:
+                print(f"\n=== Processing {pdf.name} ===")
+                try:
+                    if profile:
+                        outs, times = convert_profiled(str(pdf), args.qif, args.rm_csv, args.use_cache,
+                                                       dump_dir=args.profile_dump, profiler=args.profiler)
+                        profiles.append(times)
+                    else:
+                        outs = pdf2csv_qif(str(pdf), args.qif, args.rm_csv, args.use_cache)
+                    all_out.extend(outs)
+                except Exception as e:
+                    print(f"ERROR on {pdf.name}: {e}")
+        else:
+            # PyMuPDF holds the GIL, so convert in processes
+            calls = [(str(pdf), args.qif, args.rm_csv, args.use_cache, profile, args.profile_dump, args.profiler)
+                     for pdf in pdfs]
+            results = map_isolated(convert_job, min(args.jobs, len(pdfs)), calls,
+                                   lambda error: JobResult([], '', error, None, None, 0.0))
+            for pdf, (outs, log, error, times, *_) in zip(pdfs, results):
+                print(f"\n=== Processing {pdf.name} ===")
+                print(log, end='')
+                if error is not None:
+                    print(f"ERROR on {pdf.name}: {error}")
+                if times is not None:
+                    profiles.append(times)
                 all_out.extend(outs)
-            except Exception as e:
-                print(f"ERROR on {pdf.name}: {e}")
 
         print("\nBatch complete. Files generated:")
         for f in all_out:
             print(" ", f)
 
+    elif args.cmd == 'watch':
+        if not os.path.isdir(args.folder_path):
+            p.error(f"{args.folder_path!r} is not a directory")
+        if args.jobs < 1:
+            p.error("--jobs must be at least 1")
+        if args.interval <= 0 or args.settle < 0:
+            p.error("--interval must be positive and --settle not negative")
+        watch_folder(args.folder_path, args.qif, args.rm_csv, args.use_cache, args.jobs,
+                     args.interval, args.settle, args.once)
+
+    elif args.cmd == 'serve':
+        if args.jobs < 1 or args.max_queue < 1:
+            p.error("--jobs and --max-queue must be at least 1")
+        from bank_statement_converter.server import ConversionService, make_server
+        service = ConversionService(workers=args.jobs, max_queue=args.max_queue)
+        try:
+            server = make_server(service, args.host, args.port, int(args.max_upload * 1024 * 1024))
+        except OSError as e:
+            service.close()
+            p.error(f"can't listen on {args.host}:{args.port}: {e}")
+        print(f"Serving on http://{args.host}:{server.server_port} with {args.jobs} worker(s) (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopping")
+        finally:
+            server.server_close()
+            service.close()
+
+    elif args.cmd == 'daemon':
+        from bank_statement_converter import daemon
+        if args.status or args.stop:
+            info = daemon.status()
+            if info is None:
+                print(f"No daemon running on {daemon.socket_path()}")
+                sys.exit(1)
+            if args.stop:
+                daemon.stop()
+                print(f"Stopped daemon (pid {info['pid']})")
+            else:
+                import time
+                print(f"Daemon running (pid {info['pid']}) on {info['socket']} since "
+                      f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(info['started']))}, "
+                      f"{info['commands']} request(s) served")
+            return
+        if not daemon.SUPPORTED:
+            p.error("the daemon needs a system with fork() and Unix sockets")
+        try:
+            daemon.serve(ready=lambda: print(f"Daemon listening on {daemon.socket_path()} (Ctrl+C to stop)",
+                                             flush=True))
+        except RuntimeError as e:
+            p.error(str(e))
+        print("\nStopped daemon")
+
+    elif args.cmd == 'detect':
+        import time
+        from pathlib import Path
+        path = Path(args.path)
+        if path.is_dir():
+            pdfs = sorted(path.glob("*.pdf"))
+        elif path.is_file():
+            pdfs = [path]
+        else:
+            p.error(f"{args.path!r} does not exist")
+        if not pdfs:
+            print(f"No PDFs found in {path}")
+            return
+        if args.jobs < 1:
+            p.error("--jobs must be at least 1")
+
+        start = time.perf_counter()
+        if args.jobs > 1 and len(pdfs) >= 2 * args.jobs:  # not worth starting workers for a few PDFs
+            results = map_isolated(detect_job, args.jobs, [(str(pdf),) for pdf in pdfs], lambda error: ([], error))
+        else:
+            results = map(detect_job, map(str, pdfs))
+        detected = 0
+        for pdf, (matches, error) in zip(pdfs, results):
+            if error is not None:
+                print(f"{pdf.name}: ERROR: {error}")
+                continue
+            best, line = describe_detection(matches)
+            detected += best is not None
+            print(f"{pdf.name}: {line}")
+        took = time.perf_counter() - start
+        print("-------------------------------------------------")
+        print(f"Detected {detected} of {len(pdfs)} PDF(s) in {took:.2f} s ({len(pdfs) / max(took, 1e-9):.0f} PDFs/sec)")
+
     elif args.cmd == 'csv2qif':
-        qif = csv_to_qif(args.csv_path)
-        print(f"Created QIF: {qif}")
+        if (args.csv_path is None) == (args.csv_folder is None):
+            p.error("give either a CSV file or --folder")
+        if args.csv_path is not None:
+            from bank_statement_converter import csv_to_qif
+            qif = csv_to_qif(args.csv_path)
+            print(f"Created QIF: {qif}")
+            return
+
+        from pathlib import Path
+        folder = Path(args.csv_folder)
+        if not folder.is_dir():
+            p.error(f"{args.csv_folder!r} is not a directory")
+        csvs = sorted(folder.glob("*.csv"))
+        if not csvs:
+            print(f"No CSVs found in {folder}")
+            return
+        if args.jobs < 1:
+            p.error("--jobs must be at least 1")
+
+        if args.jobs > 1 and len(csvs) > 1:
+            results = map_isolated(csv2qif_job, min(args.jobs, len(csvs)), [(str(csv),) for csv in csvs],
+                                   lambda error: (None, error))
+        else:
+            results = map(csv2qif_job, map(str, csvs))
+        all_out = []
+        for csv_file, (qif, error) in zip(csvs, results):
+            if error is not None:
+                print(f"ERROR on {csv_file.name}: {error}")
+                continue
+            print(f"Created QIF: {qif}")
+            all_out.append(qif)
+        print(f"\nConverted {len(all_out)} of {len(csvs)} CSV(s)")
+
+    elif args.cmd == 'cache':
+        if args.cache_cmd is None:
+            cache_p.print_help()
+            return
+        from bank_statement_converter.cache import ConversionCache
+        with ConversionCache() as cache:
+            if args.cache_cmd == 'prune':
+                if args.all:
+                    removed = cache.clear()
+                else:
+                    limit = None if args.max_size is None else int(args.max_size * 1024 * 1024)
+                    removed = cache.prune(limit)
+                print(f"Removed {removed} cached conversion(s)")
+            count, total = cache.size()
+            print(f"Cache: {cache.path}")
+            print(f"{count} conversion(s), {total / (1024 * 1024):.1f} MB (limit {cache.max_bytes / (1024 * 1024):.0f} MB)")
 
     else:
         p.print_help()
 
+    if profiles:
+        print_profile(profiles, args.profile_json, args.profile or args.profile_json is None)
+
 
 if __name__ == '__main__':
     main()
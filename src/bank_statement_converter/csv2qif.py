@@ -1,67 +1,140 @@
+import codecs
 import csv
-import itertools
+import locale
 from pathlib import Path
-from .utils import reformat_date
+from .dates import reformat_date
 
+"""
+CSV → QIF.
+
+The CSV is read once, row by row: the header (if any) is looked at once to
+find the columns, and the QIF records are written out in batches, so memory
+stays flat and a bank export with hundreds of thousands of rows converts in
+seconds. Dates are reformatted once per distinct date string, since a
+statement repeats the same few hundred dates over and over.
+
+Works with the CSVs the converters write (Date, Transaction Details, Amount or
+Date, Amount, Transaction Details) and with CSVs exported by the banks or
+saved from Excel: a 'Description' column is used for the details if there is
+one, and a CSV without a 'Date' header is read as date, amount, details.
+"""
+
+# QIF records written per write() call
+WRITE_BATCH = 1000
+
+# A UTF-8 byte order mark as it reads when the CSV is decoded as cp1252 (utf-8-sig
+# takes care of it otherwise)
+_BOM_CP1252 = 'ï»¿'
+
+class QifRecords:
+    """
+    Turns CSV rows into QIF records (date, amount and details lines) one row
+    at a time, working out the columns from the first row. Used by
+    qif_records() for CSV files and by QifSink for a converter's rows as they
+    are read.
+    """
+    def __init__(self):
+        self._dates = {}      # date as in the CSV -> QIF date
+        self._record = None   # set by the first row
+
+    def __call__(self, row) -> str:
+        """The QIF record of a row; '' for the header and blank lines"""
+        if not row:
+            return ''
+        if self._record is None:
+            return self._first(row)
+        return self._record(row)
+
+    @property
+    def record(self):
+        """
+        The record builder for the rows after the first: a function of a
+        (non-empty) row returning its QIF record, or None until the first row
+        has been seen
+        """
+        return self._record
+
+    def _date(self, text):
+        date = self._dates.get(text)
+        if date is None:
+            date = self._dates[text] = reformat_date(text)
+        return date
+
+    def _first(self, first) -> str:
+        if first[0].startswith(_BOM_CP1252):
+            first = [first[0][len(_BOM_CP1252):]] + list(first[1:])
+        if 'Date' not in first:
+            self._record = self._plain
+            return self._plain(first)
+
+        # header row; like csv.DictReader the last column of a name wins
+        columns = {name: i for i, name in enumerate(first)}
+        if 'Amount' not in columns:
+            raise (ValueError(f"CSV has a 'Date' column but no 'Amount' column: {first}"))
+        details = columns.get('Description', columns.get('Transaction Details'))
+        if details is None:
+            raise (ValueError(f"CSV has no 'Transaction Details' or 'Description' column: {first}"))
+        date_i, amount_i = columns['Date'], columns['Amount']
+        width = max(date_i, amount_i, details) + 1
+
+        def record(row):
+            if len(row) < width:
+                row = list(row) + [None] * (width - len(row))  # missing cells, as DictReader fills them in
+            return f"D{self._date(row[date_i])}\nT{row[amount_i]}\nP{row[details]}\n^\n"
+        self._record = record
+        return ''
+
+    def _plain(self, row) -> str:
+        # no header: date, amount, details; a leading '+' is dropped from amounts
+        if len(row) < 3:
+            raise (ValueError(f"Expected date, amount and details in CSV row: {row}"))
+        amount = row[1]
+        if amount[:1] == '+':
+            amount = amount[1:]
+        return f"D{self._date(row[0])}\nT{amount}\nP{row[2]}\n^\n"
+
+"""
+Yield the QIF record (date, amount and details lines) for every row of a CSV
+reader, working out the columns from the first row
+"""
+def qif_records(rows):
+    make = QifRecords()
+    rows = iter(rows)
+    for row in rows:
+        record = make(row)
+        if record:
+            yield record
+        if make.record is not None:
+            break
+    record = make.record  # columns are known now, skip the first-row check
+    for row in rows:
+        if row:
+            yield record(row)
+
+def _convert(csv_filename, qif_filename, encoding: str):
+    with open(csv_filename, 'r', newline='', encoding=encoding) as csv_file, \
+         open(qif_filename, 'w') as qif_file:
+        qif_file.write("!Type:Bank \n")
+        batch = []
+        for record in qif_records(csv.reader(csv_file)):
+            batch.append(record)
+            if len(batch) == WRITE_BATCH:
+                qif_file.write(''.join(batch))
+                batch.clear()
+        qif_file.write(''.join(batch))
+
+"""
+Convert a CSV to a QIF next to it (same name, .qif extension); returns the QIF path.
+CSVs are read as UTF-8 (with or without a byte order mark), falling back to
+the system's encoding for e.g. cp1252 files saved by Excel.
+"""
 def csv_to_qif(csv_filename: str):
-    
-    with open(csv_filename, 'r', newline='') as csv_file:
-        csv_read = csv.DictReader(csv_file)
-        
-        # Make copy of csv to check first row as iteration will skip
-        csv_read, read_copy = itertools.tee(csv_read)
-        
-        # Check whether the date
-        date_flag = False
-        encode_flag = False
-        try:
-            first_row = next(read_copy)
-            if 'ï»¿Date' in first_row:
-                date_flag = True
-                encode_flag = True
-            elif 'Date' in first_row:  # May have issues here if csv doesn't have 'Date' header for date
-                date_flag = True
-        except StopIteration:
-            pass 
-        
-        with open(Path(csv_filename).with_suffix(".qif"), 'w') as qif_file:
-            qif_file.write(f"!Type:Bank \n")    
-            
-            if date_flag == False:
-                csv_file.seek(0)
-                csv_read_list = csv.reader(csv_file)
-                for row in csv_read_list:
-                    # For beginning of UTF-8 encoding BOM added by default in windows when converting from xlsx to csv UTF-8
-                    if row[0][:3] == 'ï»¿':
-                        date = reformat_date(row[0][3:])
-                    else:
-                        date = reformat_date(row[0])
-                    if row[1][0] == '+':
-                        amount = row[1][1:]
-                    else:
-                        amount = row[1]
-                    details = row[2]
- 
-                    qif_file.write(f"D{date}\n")    
-                    qif_file.write(f"T{amount}\n")
-                    qif_file.write(f"P{details}\n")
-                    qif_file.write(f"^\n")
-                    
-            else:
-                for row in csv_read:
-                    if encode_flag == True:
-                        date = reformat_date(row['ï»¿Date'])
-                    else:
-                        date = reformat_date(row['Date'])
-                    amount = row['Amount']
-                    if 'Transaction Details' in row:
-                        details = row['Transaction Details']
-                    if 'Description' in row:
-                        details = row['Description']
-                                        
-                    qif_file.write(f"D{date}\n")    
-                    qif_file.write(f"T{amount}\n")
-                    qif_file.write(f"P{details}\n")
-                    qif_file.write(f"^\n")
-                    
-    return str(Path(csv_filename).with_suffix(".qif"))
\ No newline at end of file
+    qif_filename = Path(csv_filename).with_suffix(".qif")
+    try:
+        _convert(csv_filename, qif_filename, 'utf-8-sig')
+    except UnicodeDecodeError:
+        fallback = locale.getpreferredencoding(False)
+        if codecs.lookup(fallback).name == 'utf-8':
+            raise
+        _convert(csv_filename, qif_filename, fallback)
+    return str(qif_filename)
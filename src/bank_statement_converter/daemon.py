@@ -0,0 +1,312 @@
+import contextlib
+import json
+import os
+import signal
+import socket
+import stat
+import struct
+import sys
+import time
+
+"""
+`bstc daemon`: keeps Python, PyMuPDF and the converters loaded so that
+`bstc file`, `bstc folder` and `bstc csv2qif` don't pay for starting them on
+every call.
+
+The daemon imports everything a conversion needs once and listens on a Unix
+socket. While it is running, the `bstc` command forwards those commands to it:
+it sends its arguments, working directory and the environment variables bstc
+reads (FORWARDED_ENV), with its stdin, stdout and stderr passed over the
+socket as file descriptors. The daemon forks a child that runs the command
+just as `bstc` would have, writing straight to the caller's terminal or pipes,
+and sends back the exit status. Forking the warm daemon takes about a
+millisecond, and every command still gets a process of its own (its own
+directory, environment and Ctrl+C), so several scripts can use the daemon at
+the same time.
+
+When no daemon is running, or it runs other code than the `bstc` calling it
+(e.g. after an upgrade), commands run in-process as before. BSTC_NO_DAEMON=1
+turns forwarding off, BSTC_SOCKET sets the socket's path.
+
+Only a daemon of the same user is trusted: the socket's directory must belong
+to the user and be private (mode 0700), and the process on the other end of
+the socket must run as the user, otherwise commands run in-process.
+
+Needs fork() and file descriptor passing, i.e. Linux or macOS.
+"""
+
+SUPPORTED = hasattr(os, 'fork') and hasattr(socket, 'send_fds') and hasattr(socket, 'AF_UNIX')
+
+"""Environment variables a forwarded command takes from its caller; the rest come from the daemon"""
+FORWARDED_ENV = ('HOME', 'BSTC_CACHE_DIR', 'XDG_CACHE_HOME', 'TZ', 'LANG', 'LC_ALL', 'LC_CTYPE', 'LC_TIME')
+
+"""
+Path of the daemon's socket: $BSTC_SOCKET, else bstc/daemon.sock in
+$XDG_RUNTIME_DIR, else in bstc-<uid> in the temporary directory
+"""
+def socket_path() -> str:
+    if os.environ.get('BSTC_SOCKET'):
+        return os.environ['BSTC_SOCKET']
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'bstc', 'daemon.sock')
+    return os.path.join(os.environ.get('TMPDIR', '/tmp'), f'bstc-{os.getuid()}', 'daemon.sock')
+
+"""Version and newest module of the installed package; the daemon only runs commands of a `bstc` with the same"""
+def code_stamp() -> str:
+    from bank_statement_converter import __version__
+    package_dir = os.path.dirname(__file__)
+    newest = max(entry.stat().st_mtime_ns for entry in os.scandir(package_dir) if entry.name.endswith('.py'))
+    return f"{__version__}:{newest}"
+
+
+def _send(conn, **message):
+    conn.sendall(json.dumps(message).encode() + b'\n')
+
+"""Read one message (a line of JSON) and the file descriptors sent with it"""
+def _receive(conn) -> tuple:
+    data, fds, _, _ = socket.recv_fds(conn, 1 << 16, 3)
+    while not data.endswith(b'\n'):
+        more = conn.recv(1 << 16)
+        if not more:
+            raise (ConnectionError("connection closed in the middle of a message"))
+        data += more
+    return json.loads(data), fds
+
+"""Raise PermissionError unless the directory exists, belongs to this user and only they can use it"""
+def _check_directory(directory: str):
+    info = os.lstat(directory or '.')
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or stat.S_IMODE(info.st_mode) != 0o700:
+        raise (PermissionError(f"{directory} must be a directory owned by you with mode 0700"))
+
+"""User id of the process on the other end of a Unix socket"""
+def _peer_uid(conn) -> int:
+    if hasattr(socket, 'SO_PEERCRED'):  # Linux: struct ucred {pid, uid, gid}
+        creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', creds)[1]
+    if hasattr(socket, 'LOCAL_PEERCRED'):  # macOS: struct xucred {version, uid, ...}, at level SOL_LOCAL (0)
+        creds = conn.getsockopt(0, socket.LOCAL_PEERCRED, struct.calcsize('2I') + 2 + 16 * 4)
+        return struct.unpack_from('2I', creds)[1]
+    raise (PermissionError("can't tell who the daemon runs as on this system"))
+
+"""
+Connect to the daemon's socket. Raises PermissionError if the socket's
+directory or the process listening on it don't belong to this user.
+"""
+def _connect(path: str):
+    _check_directory(os.path.dirname(path))
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+        if _peer_uid(conn) != os.getuid():
+            raise (PermissionError(f"{path} is served by another user"))
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+"""
+Run a `bstc` command (argv without the program name) in the daemon, if one is
+running. Returns its exit status, or None if it should run in this process.
+"""
+def forward(argv: list) -> int | None:
+    if os.environ.get('BSTC_NO_DAEMON') or not SUPPORTED:
+        return None
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        conn = _connect(path)
+    except PermissionError as e:
+        print(f"bstc daemon: not using {path}: {e}", file=sys.stderr)
+        return None
+    except OSError:  # left behind by a daemon that was killed
+        return None
+    with conn:
+        request = {
+            'argv': argv,
+            'cwd': os.getcwd(),
+            'env': {name: os.environ[name] for name in FORWARDED_ENV if name in os.environ},
+            'encoding': getattr(sys.stdout, 'encoding', None),
+            'stamp': code_stamp(),
+        }
+        try:
+            socket.send_fds(conn, [json.dumps(request).encode() + b'\n'], [0, 1, 2])
+        except OSError:  # e.g. stdin is closed
+            return None
+        replies = conn.makefile('rb')
+        reply = _read_reply(replies)
+        if reply is None or 'pid' not in reply:
+            if reply is not None and 'stale' in reply:
+                print("bstc daemon runs another version of bstc, restart it; converting without it", file=sys.stderr)
+            return None
+        pid = reply['pid']
+        while True:
+            try:
+                reply = _read_reply(replies)
+                break
+            except KeyboardInterrupt:
+                # the command runs in the daemon's process group, pass Ctrl+C on
+                os.kill(pid, signal.SIGINT)
+        if reply is None:
+            print("bstc daemon: the command ended without an exit status", file=sys.stderr)
+            return 1
+        return reply['exit']
+
+def _read_reply(replies) -> dict | None:
+    line = replies.readline()
+    return json.loads(line) if line else None
+
+"""Ask the daemon for its status ({'pid', 'socket', 'started', 'commands'}), or None if it isn't running"""
+def status() -> dict | None:
+    return _request(status=True)
+
+"""Stop the daemon; returns its pid, or None if it wasn't running"""
+def stop() -> int | None:
+    reply = _request(stop=True)
+    return reply['pid'] if reply else None
+
+def _request(**message) -> dict | None:
+    if not SUPPORTED:
+        return None
+    try:
+        conn = _connect(socket_path())
+    except OSError:
+        return None
+    with conn:
+        _send(conn, **message)
+        return _read_reply(conn.makefile('rb'))
+
+
+"""Import what the commands need, so the forked children don't have to"""
+def _warm_up():
+    import concurrent.futures.process  # noqa: F401  (folder --jobs)
+    import fitz  # noqa: F401
+    import bank_statement_converter.cli  # noqa: F401
+    from bank_statement_converter import api, cache, csv2qif, dates, sinks  # noqa: F401
+    from bank_statement_converter.registry import BUILTIN_CONVERTERS, find_converter
+    for bank, account_type in BUILTIN_CONVERTERS:
+        find_converter(bank, account_type)
+
+def _listen(path: str):
+    try:
+        _connect(path).close()
+    except OSError:
+        pass
+    else:
+        raise (RuntimeError(f"A daemon is already listening on {path}"))
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    try:
+        _check_directory(directory)
+    except PermissionError as e:
+        raise (RuntimeError(f"Refusing to listen on {path}: {e}")) from None
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(64)
+    return listener
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+"""
+Run the daemon until it is stopped (Ctrl+C, SIGTERM or `bstc daemon --stop`).
+ready() is called once it is listening.
+"""
+def serve(path: str | None = None, ready=None):
+    if not SUPPORTED:
+        raise (RuntimeError("bstc daemon needs a system with fork() and Unix sockets"))
+    import gc
+    path = path or socket_path()
+    _warm_up()
+    listener = _listen(path)
+    stamp = code_stamp()
+    started = time.time()
+    commands = 0
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)  # children are reaped by the system
+    signal.signal(signal.SIGTERM, _stop)
+    gc.freeze()  # keep the warm objects out of collections, so the children share their pages
+    try:
+        if ready is not None:
+            ready()
+        while True:
+            conn, _ = listener.accept()
+            commands += 1
+            if os.fork() == 0:
+                listener.close()
+                _child(conn, {'pid': os.getppid(), 'socket': path, 'started': started, 'commands': commands},
+                       stamp)
+            conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+"""Handle one connection in a forked child of the daemon; never returns"""
+def _child(conn, info: dict, stamp: str):
+    code = 1
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)  # even if the daemon was started with it ignored
+        request, fds = _receive(conn)
+        if request.get('status'):
+            _send(conn, **info)
+            code = 0
+        elif request.get('stop'):
+            _send(conn, pid=info['pid'])
+            os.kill(info['pid'], signal.SIGTERM)
+            code = 0
+        elif request.get('stamp') != stamp or len(fds) != 3:
+            _send(conn, stale=stamp)
+        else:
+            code = _run(conn, request, fds)
+    except BaseException:
+        pass  # the caller sees the connection close without an exit status
+    finally:
+        os._exit(code)
+
+"""Run a forwarded command with the caller's stdin/stdout/stderr, directory and environment"""
+def _run(conn, request: dict, fds: list) -> int:
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+        os.close(fd)
+    encoding = request.get('encoding') or 'utf-8'
+    sys.stdin = open(0, 'r', encoding=encoding, closefd=False)
+    sys.stdout = open(1, 'w', 1 if os.isatty(1) else -1, encoding=encoding, closefd=False)
+    sys.stderr = open(2, 'w', 1, encoding=encoding, errors='backslashreplace', closefd=False)
+    os.chdir(request['cwd'])
+    for name in FORWARDED_ENV:
+        os.environ.pop(name, None)
+    os.environ.update({name: value for name, value in request['env'].items() if name in FORWARDED_ENV})
+    os.environ['BSTC_NO_DAEMON'] = '1'  # don't forward to ourselves
+    sys.argv = ['bstc'] + request['argv']
+    _send(conn, pid=os.getpid())
+
+    from bank_statement_converter.cli import main
+    try:
+        main()
+        code = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            code = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except KeyboardInterrupt:
+        code = 130
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        code = 1
+    for stream in (sys.stdout, sys.stderr):
+        with contextlib.suppress(OSError):
+            stream.flush()
+    _send(conn, exit=code)
+    return code
@@ -0,0 +1,175 @@
+import calendar
+import re
+import time
+from datetime import datetime
+from functools import lru_cache
+
+"""
+Fast date parsing for the statement converters.
+
+The converters test nearly every line / table cell of a statement with
+is_datetime() and reformat every transaction date, and a statement repeats the
+same few dozen dates over and over. So the formats the banks use are turned
+into precompiled regexes once, and every parsed string is kept in an LRU cache.
+Results are the same as datetime.strptime() and dateutil's parse(dayfirst=True),
+anything unusual is simply handed over to those.
+"""
+
+CACHE_SIZE = 4096
+
+# Month abbreviations as strptime's %b matches them (current locale, any case)
+_MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_abbr) if name}
+_MONTH_RE = "|".join(re.escape(name) for name in sorted(_MONTHS, key=len, reverse=True))
+
+# Same sub-patterns as datetime.strptime uses for these directives
+_DIRECTIVES = {
+    'd': r"(?P<d>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])",
+    'm': r"(?P<m>1[0-2]|0[1-9]|[1-9])",
+    'y': r"(?P<y>\d\d)",
+    'Y': r"(?P<Y>\d\d\d\d)",
+    'b': f"(?P<b>{_MONTH_RE})",
+}
+
+"""
+Compile a strptime format into a regex, or return None if it uses a directive
+(or a directive twice) that the fast path doesn't handle
+"""
+@lru_cache(maxsize=None)
+def _compile(date_format: str):
+    pattern = re.sub(r"([\\.^$*+?\(\){}\[\]|])", r"\\\1", date_format)
+    pattern = re.sub(r"\s+", r"\\s+", pattern)
+    parts = pattern.split('%')
+    regex = parts[0]
+    seen = set()
+    for part in parts[1:]:
+        if not part or part[0] not in _DIRECTIVES or part[0] in seen:
+            return None
+        seen.add(part[0])
+        regex += _DIRECTIVES[part[0]] + part[1:]
+    return re.compile(regex, re.IGNORECASE)
+
+"""
+Parse text with a strptime format. Returns the datetime, or None where
+datetime.strptime would raise a ValueError
+"""
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(text: str, date_format: str) -> datetime | None:
+    regex = _compile(date_format)
+    if regex is None:
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            return None
+
+    found = regex.match(text)
+    if found is None or found.end() != len(text):
+        return None
+    fields = found.groupdict()
+    if 'Y' in fields:
+        year = int(fields['Y'])
+    elif 'y' in fields:
+        year = int(fields['y'])
+        year += 2000 if year <= 68 else 1900
+    else:
+        year = None
+    if 'm' in fields:
+        month = int(fields['m'])
+    elif 'b' in fields:
+        month = _MONTHS[fields['b'].lower()]
+    else:
+        month = 1
+    day = int(fields['d']) if 'd' in fields else 1
+    if year is None:
+        year = 1900  # strptime's default, so '29 Feb' is not a date either
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+# dateutil only knows English month names, whatever the locale
+_MONTHS_EN = {name: number for number, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1)}
+
+# Shapes of the dates found in statements and in the CSVs we write: day month
+# year, separated by spaces, '/' or '-', and month name first (Macquarie)
+_DAY_FIRST = re.compile(r"(\d{1,2})([ /-])(\d{1,2}|[A-Za-z]{3})\2(\d{2}|\d{4})")
+_MONTH_FIRST = re.compile(r"([A-Za-z]{3}) (\d{1,2}) (\d{4})")
+
+"""
+Return (year, month, day) for the common statement date shapes, exactly as
+dateutil's parse(dayfirst=True) reads them, or None to let dateutil decide
+"""
+def _quick_ymd(date: str):
+    found = _DAY_FIRST.fullmatch(date)
+    if found:
+        day, _, month, year = found.groups()
+        if month.isdigit():
+            month = int(month)
+            if month > 12 or int(day) > 31:  # dateutil may swap day and month
+                return None
+        else:
+            month = _MONTHS_EN.get(month.lower())
+    else:
+        found = _MONTH_FIRST.fullmatch(date)
+        if found is None:
+            return None
+        month, day, year = found.groups()
+        month = _MONTHS_EN.get(month.lower())
+    if month is None:
+        return None
+    if len(year) == 2:
+        year = _convert_year(int(year))
+    elif year.startswith('00'):  # dateutil treats e.g. '0024' as a short year
+        return None
+    return int(year), month, int(day)
+
+# Year that two digit years are placed around (dateutil takes it when imported)
+_THIS_YEAR = time.localtime().tm_year
+
+"""
+Two digit years are put within 50 years of now, the way dateutil's
+parserinfo.convertyear does it (without having to import dateutil)
+"""
+def _convert_year(year: int) -> int:
+    year += _THIS_YEAR // 100 * 100
+    if year >= _THIS_YEAR + 50:
+        year -= 100
+    elif year < _THIS_YEAR - 50:
+        year += 100
+    return year
+
+"""
+Read a date string the way dateutil's parse(dayfirst=True) reads it; returns
+the datetime, or None if it isn't a date
+"""
+@lru_cache(maxsize=CACHE_SIZE)
+def read_date(date: str) -> datetime | None:
+    ymd = _quick_ymd(date)
+    if ymd is not None:
+        try:
+            return datetime(*ymd)
+        except ValueError:
+            pass  # e.g. 31 Feb, let dateutil have the final say
+
+    from dateutil import parser
+    try:
+        return parser.parse(date, dayfirst=True) # AUS day is first in statements
+    except (ValueError, OverflowError):
+        return None
+
+"""
+The date read_date() reads as a day number (date.toordinal()), or None if it
+isn't a date
+"""
+def date_ordinal(date: str) -> int | None:
+    day = read_date(date)
+    return day.toordinal() if day is not None else None
+
+"""
+Reformat a date string to output_format. Returns None if it isn't a date,
+same as dateutil's parse(dayfirst=True) failing
+"""
+@lru_cache(maxsize=CACHE_SIZE)
+def reformat_date(date: str, output_format: str = "%d/%m/%Y") -> str | None:
+    day = read_date(date)
+    return day.strftime(output_format) if day is not None else None
@@ -0,0 +1,173 @@
+import contextlib
+import os
+import fitz
+from .utils import normalize_page_rotation, remove_annots
+from .profiling import span
+from .table import LineArt
+
+"""Add key to a dict used as a cache, dropping the oldest entry once it holds limit entries"""
+def _remember(cache: dict, key, value, limit: int):
+    if len(cache) >= limit:
+        del cache[next(iter(cache))]
+    cache[key] = value
+
+class StatementDocument:
+    """
+    A PDF statement that is opened once per conversion.
+
+    The same session is handed to bank detection and to the converters, so the
+    file is only read once and pages, the rotation normalization and extracted
+    text are shared instead of being re-parsed by every step.
+    Only the most recently used pages and texts are kept, so memory doesn't
+    grow with the number of pages while converters stream through them.
+    """
+    CACHED_PAGES = 8
+    CACHED_TEXTS = 32  # several clips of the same page can be cached
+    PARALLEL_MIN_PAGES = 16  # shorter statements aren't worth starting worker processes for
+
+    def __init__(self, source, page_jobs: int = 1):
+        """source is the path of the PDF, or its contents as bytes or a binary file object"""
+        with span('open') as s:
+            if hasattr(source, 'read'):
+                source = source.read()
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                self.path = None  # in memory only
+                self.raw = fitz.open(stream=bytes(source), filetype="pdf")
+            else:
+                self.path = os.fspath(source)
+                self.raw = fitz.open(self.path)  # document exactly as stored on disk
+            s.info['pages'] = self.raw.page_count
+        self._doc = None                 # rotation-normalized document, made on first use
+        self._pages = {}
+        self._text = {}
+        self._line_art = {}
+        self.page_jobs = page_jobs       # worker processes map_pages() may use
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def doc(self):
+        """The document with page 0 unrotated (see utils.check_page_rotation)"""
+        if self._doc is None:
+            with span('rotation'):
+                self._doc = normalize_page_rotation(self.raw)
+        return self._doc
+
+    def page(self, number: int, raw: bool = False):
+        """Return a page with its annotations removed; pages are loaded once"""
+        doc = self.raw if raw else self.doc
+        key = (id(doc), number)
+        page = self._pages.get(key)
+        if page is None:
+            page = remove_annots(doc[number])
+            _remember(self._pages, key, page, self.CACHED_PAGES)
+        return page
+
+    def pages(self, start: int = 0, raw: bool = False):
+        doc = self.raw if raw else self.doc
+        for number in range(start, doc.page_count):
+            yield self.page(number, raw)
+
+    def map_pages(self, func, *args, start: int = 0):
+        """
+        Yield (page number, func(statement, page, *args)) for every page from
+        start on, in page order.
+
+        With page_jobs > 1 and a long statement read from a file, the pages after
+        the first are handed out to worker processes that open the PDF themselves, so
+        func has to be a module level function and its arguments and results
+        picklable. func only ever sees its own page: whatever is carried from one
+        page to the next (running balance, year) is up to the caller, which gets
+        the results in order as they come in. An error of func for a page is
+        raised when that page's turn comes, so pages after the last one the
+        caller looks at can't fail the conversion.
+        """
+        count = self.doc.page_count
+        if start >= count:
+            return
+        # the first page is always done here: the converters have usually read
+        # (and possibly changed, see nab_converter.get_x_coords) it already
+        yield start, func(self, self.page(start), *args)
+
+        numbers = range(start + 1, count)
+        jobs = min(self.page_jobs, len(numbers))
+        if jobs < 2 or count - start < self.PARALLEL_MIN_PAGES or self.path is None:
+            for number in numbers:
+                yield number, func(self, self.page(number), *args)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        chunk = max(1, len(numbers) // (jobs * 4))  # a few chunks per worker to even out page costs
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            futures = [pool.submit(_map_pages_job, self.path, func, args, numbers[i:i + chunk])
+                       for i in range(0, len(numbers), chunk)]
+            for future in futures:
+                for number, error, result in future.result():
+                    if error is not None:
+                        raise error
+                    yield number, result
+        finally:
+            pool.shutdown(cancel_futures=True)  # e.g. the caller stopped at the closing balance
+
+    def text(self, page, clip=None) -> str:
+        """Cached page.get_text(), optionally clipped to a rect"""
+        key = (id(page.parent), page.number, tuple(clip) if clip is not None else None)
+        text = self._text.get(key)
+        if text is None:
+            with span('text'):
+                text = page.get_text(clip=clip)
+            _remember(self._text, key, text, self.CACHED_TEXTS)
+        return text
+
+    def line_art(self, page):
+        """The page's drawings as a table.LineArt, read once per page"""
+        key = (id(page.parent), page.number)
+        art = self._line_art.get(key)
+        if art is None:
+            with span('drawings'):
+                art = LineArt(page)
+            _remember(self._line_art, key, art, self.CACHED_PAGES)
+        return art
+
+    def close(self):
+        self._pages.clear()
+        self._text.clear()
+        self._line_art.clear()
+        if self._doc is not None and self._doc is not self.raw:
+            self._doc.close()
+        self._doc = None
+        self.raw.close()
+
+_worker_statement = None  # the statement a map_pages() worker process has open
+
+"""
+Run func on some pages of the PDF at path, in a map_pages() worker process.
+Returns (page number, error, result) for each page.
+"""
+def _map_pages_job(path: str, func, args: tuple, numbers: range) -> list:
+    global _worker_statement
+    if _worker_statement is None or _worker_statement.path != path:
+        if _worker_statement is not None:
+            _worker_statement.close()
+        _worker_statement = StatementDocument(path)
+    results = []
+    for number in numbers:
+        try:
+            results.append((number, None, func(_worker_statement, _worker_statement.page(number), *args)))
+        except Exception as e:
+            results.append((number, e, None))
+    return results
+
+"""
+Use an already open StatementDocument as is, or open one for a path.
+Only documents opened here are closed when the block exits.
+"""
+def open_statement(source):
+    if isinstance(source, StatementDocument):
+        return contextlib.nullcontext(source)
+    return StatementDocument(source)
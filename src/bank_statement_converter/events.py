@@ -0,0 +1,155 @@
+import contextlib
+import contextvars
+import logging
+import string
+import threading
+import time
+from typing import NamedTuple
+
+"""
+Progress of a conversion as structured events.
+
+Converters don't print; they emit() events such as
+
+    emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=123450)
+
+and whoever wants them listens:
+
+    with job(pdf_path, listener=callback):    # only this conversion's events
+        ...
+    subscribe(callback)                       # every event of every conversion
+
+A listener is called with an Event, in the thread that emitted it. Jobs are
+tracked with a context variable, so conversions running at the same time in
+different threads each reach their own listener (threads don't inherit a job,
+start it in the thread that converts). Event.message is only formatted when a
+listener asks for it, and emit() returns straight away when nobody listens.
+
+Kinds of events:
+    'balance'  name ('opening', 'closing', 'credits', 'debits', 'difference',
+               'running'), source ('statement' or 'calculated') and cents
+    'count'    transactions or years
+    'check'    a balance check passed
+    'warning'  the output should be checked by hand
+    'section'  end of a group of messages (the CLI prints a rule)
+    'detected' / 'cached' / 'output'   bank, account type and pages (None
+               when cached), a cached conversion was used, and path of a
+               file written (CLI only)
+    'started' / 'finished'   sent by job(); 'finished' has seconds and
+               error (None if the conversion went through)
+
+to_logging() is a listener that passes events on to the 'bank_statement_converter'
+logger, for applications that use the logging module.
+"""
+
+class _Formatter(string.Formatter):
+    """
+    str.format() plus two conversions: '!d' for cents as dollars (e.g. 123450 ->
+    1234.5) and '!u' for upper case
+    """
+    def convert_field(self, value, conversion):
+        if conversion == 'd':
+            return value / 100  # same as money.dollars()
+        if conversion == 'u':
+            return str(value).upper()
+        return super().convert_field(value, conversion)
+
+_formatter = _Formatter()
+
+
+class Event(NamedTuple):
+    kind: str
+    template: str           # message with the data as format fields, '' if there's no message
+    data: dict
+    job: str | None         # name given to job(), e.g. the PDF path
+
+    @property
+    def message(self) -> str:
+        return _formatter.vformat(self.template, (), self.data) if self.template else ''
+
+
+class _Job(NamedTuple):
+    name: str
+    listeners: tuple
+
+_listeners = ()   # replaced, never changed in place, so it can be read without the lock
+_lock = threading.Lock()
+_current = contextvars.ContextVar('bank_statement_converter_job', default=None)
+
+"""Call listener(event) for every event, of every job, from any thread"""
+def subscribe(listener):
+    global _listeners
+    with _lock:
+        _listeners = _listeners + (listener,)
+
+def unsubscribe(listener):
+    global _listeners
+    with _lock:
+        listeners = list(_listeners)
+        if listener in listeners:
+            listeners.remove(listener)
+        _listeners = tuple(listeners)
+
+"""Send an event to the listeners of the current job and to the subscribers"""
+def emit(kind: str, template: str = '', **data):
+    current = _current.get()
+    listeners = _listeners + current.listeners if current is not None else _listeners
+    if not listeners:
+        return
+    event = Event(kind, template, data, current.name if current is not None else None)
+    for listener in listeners:
+        listener(event)
+
+"""
+Run a conversion as a job: the events emitted in this thread until the block
+exits go to listener (if given) as well as to the subscribers, tagged with
+name, starting with 'started' and ending with 'finished'.
+"""
+@contextlib.contextmanager
+def job(name: str, listener=None):
+    token = _current.set(_Job(name, (listener,) if listener is not None else ()))
+    start = time.perf_counter()
+    error = None
+    try:
+        emit('started')
+        yield
+    except BaseException as e:
+        error = str(e)
+        raise
+    finally:
+        try:
+            emit('finished', seconds=time.perf_counter() - start, error=error)
+        finally:
+            _current.reset(token)
+
+"""Name of the job running in this thread (see job()), or None"""
+def current_job() -> str | None:
+    current = _current.get()
+    return current.name if current is not None else None
+
+
+_LOG_LEVELS = {'warning': logging.WARNING, 'started': logging.DEBUG, 'finished': logging.DEBUG}
+
+"""
+Listener that logs events to the 'bank_statement_converter' logger (warnings as
+WARNING, the rest as INFO, job start and end as DEBUG), with the event as
+`event` on the record; use it with subscribe()
+"""
+def to_logging(event: Event):
+    logger = logging.getLogger('bank_statement_converter')
+    level = _LOG_LEVELS.get(event.kind, logging.INFO)
+    if event.kind == 'section' or not logger.isEnabledFor(level):
+        return
+    message = event.message or f"{event.kind} {event.data}"
+    if event.job is not None:
+        message = f"{event.job}: {message}"
+    logger.log(level, message, extra={'event': event})
+
+RULE = "-------------------------------------------------"
+
+"""Listener printing each message on a line of its own and a rule for 'section', as the CLI shows them"""
+def print_event(event: Event):
+    if event.kind == 'section':
+        print(RULE)
+    elif event.template:
+        print(event.message)
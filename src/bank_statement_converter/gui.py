@@ -1,243 +1,342 @@
-import sys, os
+import sys, os, time
+import queue
+from collections import deque
+from html import escape
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 os.environ['QT_API'] = 'pyside6'
 from qtpy import QtGui, QtWidgets, QtCore
-from qtpy.QtCore    import QObject, QThread, Signal, Slot, QUrl
+from qtpy.QtCore    import (
+    QObject, QThread, Signal, Slot, QUrl, QTimer, Qt,
+    QAbstractListModel, QAbstractTableModel, QModelIndex
+)
 from qtpy.QtWidgets import (
     QApplication, QMainWindow, QWidget,
     QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton,
-    QTextEdit, QCheckBox, QListWidget, QListWidgetItem,
-    QFileDialog, QMessageBox, QTabWidget
+    QPlainTextEdit, QCheckBox, QListView, QTableView, QHeaderView,
+    QFileDialog, QMessageBox, QTabWidget, QSpinBox, QProgressBar
 )
-from qtpy.QtGui     import QDesktopServices
+from qtpy.QtGui     import QDesktopServices, QTextCursor, QTextBlockFormat, QTextCharFormat
 
-from bank_statement_converter import detect_bank, csv_to_qif, convert_anz, \
-    convert_ben, convert_cba, convert_mqg, convert_nab, convert_wbc, convert_zel
+from bank_statement_converter.cli import convert_job, csv2qif_job
 
 # -------------------------------------------------------------------
 # Helpers & Workers
 # -------------------------------------------------------------------
 
-class EmittingStream:
-    """Redirect print() into a Qt signal."""
-    def __init__(self, signal):
-        self.signal = signal
-    def write(self, text):
-        text = text.rstrip()
-        if text:
-            self.signal.emit(f"  {text}")
-    def flush(self):
-        pass
+class ResultCollector(QThread):
+    """
+    Passes the results of a pool's futures on to the GUI thread: everything
+    that finished since the last time goes out in one signal. Qt signals
+    aren't emitted from the pool's own threads, which Qt doesn't know about.
+    """
+    collected = Signal(list)        # [(row, what the job returned or the exception it raised)]
 
+    def __init__(self):
+        super().__init__()
+        self.results = queue.SimpleQueue()
 
-class PdfWorker(QObject):
-    log      = Signal(str)
-    error    = Signal(str)
-    finished = Signal(list)
+    def add(self, row, future):
+        future.add_done_callback(lambda f: self.results.put((row, f)))
 
-    def __init__(self, pdf_path, do_qif, rm_csv):
-        super().__init__()
-        self.pdf_path = pdf_path
-        self.do_qif   = do_qif
-        self.rm_csv   = rm_csv
+    def stop(self):
+        self.results.put(None)
+        self.wait()
 
-    @Slot()
     def run(self):
-        # capture print()
-        old_out, old_err = sys.stdout, sys.stderr
-        sys.stdout = EmittingStream(self.log)
-        sys.stderr = EmittingStream(self.log)
-        outputs = []
-        try:
-            self.log.emit(f"--- {os.path.basename(self.pdf_path)} ---")
-            bank_info = detect_bank(self.pdf_path)
-            bank = bank_info[0]
-            account_type = bank_info[1]
-            if not bank:
-                raise RuntimeError("Bank could not be detected")
-            
-            self.log.emit(f"  Detected bank: {bank.upper()}")
-            self.log.emit(f"  Detected account type: {account_type.upper()}")
-
-            print("Converting to CSV…")
-            if bank == 'cba':
-                csv_path = convert_cba(self.pdf_path)
-            elif bank == 'nab':
-                csv_path = convert_nab(self.pdf_path, account_type)
-            elif bank == 'anz':
-                csv_path = convert_anz(self.pdf_path)
-            elif bank == 'wbc':
-                csv_path = convert_wbc(self.pdf_path, account_type)
-            elif bank == 'ben':
-                csv_path = convert_ben(self.pdf_path)
-            elif bank == 'zel':
-                csv_path = convert_zel(self.pdf_path)
-            elif bank == 'mqg':
-                csv_path = convert_mqg(self.pdf_path)
+        while True:
+            items = [self.results.get()]
+            while True:
+                try:
+                    items.append(self.results.get_nowait())
+                except queue.Empty:
+                    break
+            collected = []
+            for item in items:
+                if item is None:
+                    continue
+                row, future = item
+                try:
+                    collected.append((row, future.result()))
+                except Exception as e:  # e.g. a worker process died
+                    collected.append((row, e))
+            if collected:
+                self.collected.emit(collected)
+            if None in items:
+                return
+
+
+class BatchRunner(QObject):
+    """
+    Run job(path, *args) for each file on a pool of worker processes, at most
+    `jobs` files at a time, so Cancel only has to drop the files still waiting.
+    PyMuPDF holds the GIL, so threads wouldn't convert in parallel; a single
+    file (or jobs=1) runs on one thread, without starting any processes.
+    Results arrive in the GUI thread through the signals.
+    """
+    started  = Signal(int)          # row of a file handed to a worker
+    done     = Signal(int, object)  # row, what job returned (or the exception it raised)
+    finished = Signal(bool)         # True if the batch was cancelled
+
+    def __init__(self, job, paths, args=(), jobs=1):
+        super().__init__()
+        self.job       = job
+        self.args      = args
+        self.total     = len(paths)
+        self.jobs      = max(1, min(jobs, len(paths)))
+        self.queue     = deque(enumerate(paths))
+        self.running   = 0
+        self.cancelled = False
+        self.pool      = None
+        self.collector = ResultCollector()
+        self.collector.collected.connect(self._on_collected)
+
+    def start(self):
+        executor = ProcessPoolExecutor if self.jobs > 1 else ThreadPoolExecutor
+        self.pool = executor(max_workers=self.jobs)
+        self.collector.start()
+        self._fill()
+
+    def cancel(self):
+        """Drop the files that haven't started; returns their rows. Running ones finish."""
+        self.cancelled = True
+        rows = [row for row, _ in self.queue]
+        self.queue.clear()
+        self._check_finished()
+        return rows
+
+    def shutdown(self):
+        self.cancel()
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.collector.stop()
+
+    def _fill(self):
+        while self.queue and self.running < self.jobs:
+            row, path = self.queue.popleft()
+            future = self.pool.submit(self.job, path, *self.args)
+            self.running += 1
+            self.started.emit(row)
+            self.collector.add(row, future)
+
+    @Slot(list)
+    def _on_collected(self, results):
+        for row, result in results:
+            self.running -= 1
+            self.done.emit(row, result)
+        self._fill()
+        self._check_finished()
+
+    def _check_finished(self):
+        if self.running or self.queue or self.pool is None:
+            return
+        self.pool.shutdown(wait=False)
+        self.pool = None
+        self.collector.stop()
+        self.finished.emit(self.cancelled)
+
+
+class LogView(QPlainTextEdit):
+    """
+    Read-only log that doesn't flood the event loop when many files finish at
+    once: append() only queues a line, and a timer adds everything queued in
+    one edit a few times a second. Only the last max_lines lines are kept, and
+    the view follows new lines only while it is scrolled to the bottom.
+    """
+    def __init__(self, max_lines=5000, interval_ms=100):
+        super().__init__()
+        self.setReadOnly(True)
+        self.setMaximumBlockCount(max_lines)
+        self.pending = []         # (text, is_html)
+        self.timer   = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.flush)
+
+    def append(self, text):
+        """Queue a line of plain text"""
+        self._queue(text, False)
+
+    def append_html(self, html):
+        """Queue a line of rich text, e.g. <b>Done.</b>"""
+        self._queue(html, True)
+
+    def _queue(self, line, is_html):
+        self.pending.append((line, is_html))
+        if not self.timer.isActive():
+            self.timer.start()
+
+    def flush(self):
+        if not self.pending:
+            return
+        lines = self.pending[-self.maximumBlockCount():]  # the rest would be dropped straight away
+        self.pending = []
+        bar = self.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        for line, is_html in lines:
+            if not self.document().isEmpty():
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            if is_html:
+                cursor.insertHtml(line)
             else:
-                raise RuntimeError(f"No converter for bank '{bank}'")
-            self.log.emit(f"  → CSV: {csv_path}")
-            outputs.append(csv_path)
-
-            if self.do_qif:
-                self.log.emit("  Converting CSV → QIF…")
-                qif_path = csv_to_qif(csv_path)
-                self.log.emit(f"  → QIF: {qif_path}")
-                outputs.append(qif_path)
-                
-            if self.rm_csv:
-                self.log.emit("  Removing CSV files…")
-                os.remove(csv_path)
-                outputs.remove(csv_path)
-
-            self.log.emit(" ")
-            self.finished.emit(outputs)
-
-        except Exception as e:
-            self.error.emit(str(e))
-        finally:
-            sys.stdout, sys.stderr = old_out, old_err
-
-
-class FolderWorker(QObject):
-    """Batch‐convert all PDFs in a folder."""
-    log      = Signal(str)
-    error    = Signal(str)
-    finished = Signal(list)
-
-    def __init__(self, folder, do_qif, rm_csv):
+                cursor.insertText(line, QTextCharFormat())
+        cursor.endEditBlock()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def clear(self):
+        self.pending = []
+        super().clear()
+
+
+class OutputsModel(QAbstractListModel):
+    """Paths of the files written, for a QListView (which only draws the rows in sight)"""
+    def __init__(self):
         super().__init__()
-        self.folder = folder
-        self.do_qif = do_qif
-        self.rm_csv = rm_csv
+        self.paths = []
+
+    def add(self, paths):
+        if not paths:
+            return
+        self.beginInsertRows(QModelIndex(), len(self.paths), len(self.paths) + len(paths) - 1)
+        self.paths.extend(paths)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.paths = []
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.ToolTipRole):
+            return self.paths[index.row()]
+        return None
 
-    @Slot()
-    def run(self):
-        # capture print
-        old_out, old_err = sys.stdout, sys.stderr
-        sys.stdout = EmittingStream(self.log)
-        sys.stderr = EmittingStream(self.log)
-        outputs = []
-        try:
-            pdfs = sorted(
-                os.path.join(self.folder, f)
-                for f in os.listdir(self.folder)
-                if f.lower().endswith('.pdf')
-            )
-            if not pdfs:
-                raise RuntimeError("No PDFs found in folder")
-
-            for pdf in pdfs:
-                self.log.emit(f"--- {os.path.basename(pdf)} ---")
-                bank_info = detect_bank(pdf)
-                bank = bank_info[0]
-                account_type = bank_info[1]
-                if not bank:
-                    self.log.emit("  ERROR: could not detect bank")
-                    continue
-                self.log.emit(f"  Detected bank: {bank.upper()}")
-                self.log.emit(f"  Detected account type: {account_type.upper()}")
-
-                if bank == 'cba':
-                    csv_path = convert_cba(pdf)
-                elif bank == 'nab':
-                    csv_path = convert_nab(pdf, account_type)
-                elif bank == 'anz':
-                    csv_path = convert_anz(pdf)
-                elif bank == 'wbc':
-                    csv_path = convert_wbc(pdf, account_type)
-                elif bank == 'ben':
-                    csv_path = convert_ben(pdf)
-                elif bank == 'zel':
-                    csv_path = convert_zel(pdf)
-                elif bank == 'mqg':
-                    csv_path = convert_mqg(pdf)
-                else:
-                    self.log.emit(f"  ERROR: no converter for '{bank}'")
-                    continue
 
-                self.log.emit(f"  → CSV: {csv_path}")
-                outputs.append(csv_path)
-
-                if self.do_qif:
-                    self.log.emit("  Converting CSV → QIF…")
-                    qif_path = csv_to_qif(csv_path)
-                    self.log.emit(f"  → QIF: {qif_path}")
-                    outputs.append(qif_path)
-                    
-                if self.rm_csv:
-                    self.log.emit("  Removing CSV files…")
-                    os.remove(csv_path)
-                    outputs.remove(csv_path)
-                    
-                self.log.emit(" ")
-
-            self.finished.emit(outputs)
-        except Exception as e:
-            self.error.emit(str(e))
-        finally:
-            sys.stdout, sys.stderr = old_out, old_err
-
-
-class CsvWorker(QObject):
-    log      = Signal(str)
-    error    = Signal(str)
-    finished = Signal(list)
-
-    def __init__(self, csv_path):
+class BatchModel(QAbstractTableModel):
+    """A row per file of a batch, for a QTableView (which only asks for the rows in sight)"""
+    def __init__(self, columns):
         super().__init__()
-        self.csv_path = csv_path
+        self.columns = columns
+        self.rows    = []
 
-    @Slot()
-    def run(self):
-        old_out, old_err = sys.stdout, sys.stderr
-        sys.stdout = EmittingStream(self.log)
-        sys.stderr = EmittingStream(self.log)
-        try:
-            print(f"Converting {self.csv_path} → QIF…")
-            qif = csv_to_qif(self.csv_path)
-            print(f"Created QIF: {qif}")
-            self.log.emit(" ")
-            self.finished.emit([qif])
-        except Exception as e:
-            self.error.emit(str(e))
-        finally:
-            sys.stdout, sys.stderr = old_out, old_err
-
-
-class CsvFolderWorker(QObject):
-    """Batch‐convert all CSVs in a folder → QIF."""
-    log      = Signal(str)
-    error    = Signal(str)
-    finished = Signal(list)
-
-    def __init__(self, folder):
+    def reset(self, names):
+        self.beginResetModel()
+        self.rows = [[name, "Queued"] + [""] * (len(self.columns) - 2) for name in names]
+        self.endResetModel()
+
+    def update(self, row, **values):
+        """Set some columns of a row, e.g. update(3, Status="Done", Seconds="0.52")"""
+        cells = self.rows[row]
+        for column, text in values.items():
+            cells[self.columns.index(column)] = text
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole:
+            return self.rows[index.row()][index.column()]
+        if role == Qt.TextAlignmentRole and index.column() >= 2:  # pages and seconds
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section]
+        return None
+
+
+class BatchView(QWidget):
+    """Progress of a batch: a row per file, a progress bar, throughput and a Cancel button"""
+    COLUMNS = ["File", "Status", "Pages", "Seconds"]
+
+    def __init__(self, pages=True):
         super().__init__()
-        self.folder = folder
+        self.pages        = pages
+        self.bar          = QProgressBar()
+        self.lbl_rate     = QLabel()
+        self.btn_cancel   = QPushButton("Cancel")
+        self.btn_cancel.setEnabled(False)
+        self.model        = BatchModel(self.COLUMNS if pages else [c for c in self.COLUMNS if c != "Pages"])
+        self.tbl_files    = QTableView()
+        self.tbl_files.setModel(self.model)
+        self.tbl_files.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.tbl_files.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.tbl_files.verticalHeader().setVisible(False)
+        # fixed row height: the view doesn't have to measure every row
+        self.tbl_files.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.clear()
 
-    @Slot()
-    def run(self):
-        outputs = []
-        try:
-            csvs = sorted(
-                os.path.join(self.folder, f)
-                for f in os.listdir(self.folder)
-                if f.lower().endswith('.csv')
-            )
-            if not csvs:
-                raise RuntimeError("No CSVs found in folder")
-
-            for csv_path in csvs:
-                self.log.emit(f"--- {os.path.basename(csv_path)} ---")
-                self.log.emit("Converting → QIF…")
-                qif = csv_to_qif(csv_path)
-                self.log.emit(f"  → QIF: {qif}")
-                outputs.append(qif)
-                
-                self.log.emit(" ")
-            
-            self.finished.emit(outputs)
-        except Exception as e:
-            self.error.emit(str(e))
+        v = QVBoxLayout(self)
+        v.setContentsMargins(0, 0, 0, 0)
+        h = QHBoxLayout()
+        h.addWidget(self.bar, 1)
+        h.addWidget(self.lbl_rate)
+        h.addWidget(self.btn_cancel)
+        v.addLayout(h)
+        v.addWidget(self.tbl_files)
+
+    def clear(self):
+        self.model.reset([])
+        self.bar.setRange(0, 1)
+        self.bar.setValue(0)
+        self.lbl_rate.clear()
+        self.btn_cancel.setEnabled(False)
+
+    def begin(self, paths):
+        self.model.reset([os.path.basename(path) for path in paths])
+        self.bar.setRange(0, len(paths))
+        self.bar.setValue(0)
+        self.files = 0
+        self.failed = 0
+        self.page_count = 0
+        self.start = time.perf_counter()
+        self.btn_cancel.setEnabled(True)
+        self._show_rate()
+
+    def running(self, row):
+        self.model.update(row, Status="Converting…")
+
+    def cancelled(self, rows):
+        for row in rows:
+            self.model.update(row, Status="Cancelled")
+        self.btn_cancel.setEnabled(False)
+
+    def done(self, row, error=None, pages=None, seconds=None):
+        self.files += 1
+        self.failed += error is not None
+        self.page_count += pages or 0
+        values = {'Status': "Done" if error is None else f"ERROR: {error}"}
+        if pages is not None:
+            values['Pages'] = str(pages)
+        if seconds is not None:
+            values['Seconds'] = f"{seconds:.2f}"
+        self.model.update(row, **values)
+        self.bar.setValue(self.files)
+        self._show_rate()
+
+    def end(self):
+        self.btn_cancel.setEnabled(False)
+        self._show_rate()
+
+    def _show_rate(self):
+        took = max(time.perf_counter() - self.start, 1e-9)
+        text = f"{self.files} of {self.bar.maximum()} files, {self.files / took:.1f} files/sec"
+        if self.pages:
+            text += f", {self.page_count / took:.1f} pages/sec"
+        if self.failed:
+            text += f", {self.failed} failed"
+        self.lbl_rate.setText(text)
 
 
 # -------------------------------------------------------------------
@@ -260,12 +359,20 @@ class PdfTab(QWidget):
         self.chk_qif.setChecked(True)
         self.rm_csv           = QCheckBox("Remove CSV after conversion")
         self.rm_csv.setChecked(True)
+        self.spn_jobs         = QSpinBox()
+        self.spn_jobs.setRange(1, 64)
+        self.spn_jobs.setValue(os.cpu_count() or 1)
         self.btn_reset        = QPushButton("Reset")
         self.btn_reset.setEnabled(False)
         self.btn_reset.clicked.connect(self.on_reset)
 
-        self.txt_log          = QTextEdit(readOnly=True)
-        self.lst_out          = QListWidget()
+        self.batch            = BatchView(pages=True)
+        self.txt_log          = LogView()
+        self.outputs          = OutputsModel()
+        self.lst_out          = QListView()
+        self.lst_out.setModel(self.outputs)
+        self.lst_out.setUniformItemSizes(True)
+        self.runner           = None
 
         # Layout
         v = QVBoxLayout(self)
@@ -291,11 +398,15 @@ class PdfTab(QWidget):
         opts.addWidget(QLabel("Options:"))
         opts.addWidget(self.chk_qif)
         opts.addWidget(self.rm_csv)
+        opts.addWidget(QLabel("Parallel jobs:"))
+        opts.addWidget(self.spn_jobs)
         opts.addStretch()
         opts.addWidget(self.btn_reset)
         v.addLayout(opts)
 
-        # Log & outputs
+        # Progress, log & outputs
+        v.addWidget(QLabel("Progress:"))
+        v.addWidget(self.batch, 1)
         v.addWidget(QLabel("Log:"))
         v.addWidget(self.txt_log, 1)
         v.addWidget(QLabel("Outputs (double-click to open):"))
@@ -306,7 +417,8 @@ class PdfTab(QWidget):
         self.btn_conv_pdf.clicked.connect(self.on_convert_pdf)
         self.btn_browse_fld.clicked.connect(self.on_browse_folder)
         self.btn_conv_folder.clicked.connect(self.on_convert_folder)
-        self.lst_out.itemDoubleClicked.connect(self.open_file)
+        self.batch.btn_cancel.clicked.connect(self.on_cancel)
+        self.lst_out.doubleClicked.connect(self.open_file)
 
     def on_reset(self):
         # clear all inputs
@@ -316,8 +428,9 @@ class PdfTab(QWidget):
         self.rm_csv.setChecked(True)
 
         # clear results
+        self.batch.clear()
         self.txt_log.clear()
-        self.lst_out.clear()
+        self.outputs.clear()
 
         # re-enable convert buttons
         self.btn_conv_pdf.setEnabled(True)
@@ -346,8 +459,7 @@ class PdfTab(QWidget):
             QMessageBox.warning(self, "No PDF", "Please select a valid PDF.")
             return
         self._reset_ui_single()
-        # start worker
-        self._start_pdf_worker(pdf, self.chk_qif.isChecked(), self.rm_csv.isChecked())
+        self._start_batch([pdf])
 
     def on_convert_folder(self):
         fld = self.le_folder_pdf.text().strip()
@@ -355,76 +467,83 @@ class PdfTab(QWidget):
             QMessageBox.warning(self, "No folder", "Please select a valid folder.")
             return
         self._reset_ui_single()
-        # start folder worker
-        self._start_folder_worker(fld, self.chk_qif.isChecked(), self.rm_csv.isChecked())
+        pdfs = sorted(
+            os.path.join(fld, f)
+            for f in os.listdir(fld)
+            if f.lower().endswith('.pdf')
+        )
+        if not pdfs:
+            self._on_error("No PDFs found in folder")
+            return
+        self._start_batch(pdfs)
+
+    def on_cancel(self):
+        if self.runner is not None:
+            self.batch.cancelled(self.runner.cancel())
 
     def _reset_ui_single(self):
+        self.batch.clear()
         self.txt_log.clear()
-        self.lst_out.clear()
+        self.outputs.clear()
         self.btn_conv_pdf.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
 
-    def _start_pdf_worker(self, pdf, do_qif, rm_csv):
-        self.thread = QThread()
-        self.worker = PdfWorker(pdf, do_qif, rm_csv)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.log.connect(self.txt_log.append)
-        self.worker.error.connect(self._on_error_pdf)
-        self.worker.finished.connect(self._on_finished_pdf)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
-
-    def _start_folder_worker(self, fld, do_qif, rm_csv):
-        self.thread = QThread()
-        self.worker = FolderWorker(fld, do_qif, rm_csv)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.log.connect(self.txt_log.append)
-        self.worker.error.connect(self._on_error_folder)
-        self.worker.finished.connect(self._on_finished_folder)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
-
-    def _on_finished_pdf(self, outputs):
-        self.txt_log.append("<b>Done.</b>")
-        for f in outputs:
-            self.lst_out.addItem(QListWidgetItem(f))
+    def _start_batch(self, pdfs):
+        # convert_job(pdf, do_qif, rm_csv, use_cache=True) returns a JobResult
+        # with the page count and seconds of each file
+        self.pdfs = pdfs
+        self.errors = []
+        self.runner = BatchRunner(convert_job, pdfs, (self.chk_qif.isChecked(), self.rm_csv.isChecked(), True),
+                                  self.spn_jobs.value())
+        self.runner.started.connect(self.batch.running)
+        self.runner.done.connect(self._on_file_done)
+        self.runner.finished.connect(self._on_finished)
+        self.batch.begin(pdfs)
+        self.runner.start()
+
+    def _on_file_done(self, row, result):
+        if isinstance(result, Exception):
+            outputs, log, error, pages, seconds = [], "", str(result), None, None
+        else:
+            outputs, log, error, _, pages, seconds = result
+        self.txt_log.append(f"--- {os.path.basename(self.pdfs[row])} ---")
+        for line in log.splitlines():
+            self.txt_log.append(f"  {line}")
+        if error is not None:
+            self.errors.append(error)
+            self.txt_log.append_html(f"<span style='color:red'>ERROR: {escape(error)}</span>")
+        self.txt_log.append(" ")
+        self.outputs.add(outputs)
+        self.batch.done(row, error, pages, seconds)
+
+    def _on_finished(self, cancelled):
+        self.runner = None
+        self.batch.end()
+        if cancelled:
+            self.txt_log.append_html("<b>Cancelled.</b>")
+        elif len(self.pdfs) == 1 and self.errors:
+            QMessageBox.critical(self, "Error", self.errors[0])
+        else:
+            self.txt_log.append_html("<b>Done.</b>" if len(self.pdfs) == 1 else "<b>Batch Done.</b>")
         # disable convert until user hits Reset
         self.btn_conv_pdf.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
         self.btn_reset.setEnabled(True)
 
-    def _on_finished_folder(self, outputs):
-        self.txt_log.append("<b>Batch Done.</b>")
-        for f in outputs:
-            self.lst_out.addItem(QListWidgetItem(f))
-        self.btn_conv_pdf.setEnabled(False)
-        self.btn_conv_folder.setEnabled(False)
-        self.btn_reset.setEnabled(True)
-
-    def _on_error_pdf(self, msg):
+    def _on_error(self, msg):
         QMessageBox.critical(self, "Error", msg)
-        self.txt_log.append(f"<span style='color:red'>ERROR: {msg}</span>")
+        self.txt_log.append_html(f"<span style='color:red'>ERROR: {escape(msg)}</span>")
         # allow Retry or Reset
         self.btn_conv_pdf.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
         self.btn_reset.setEnabled(True)
 
-    def _on_error_folder(self, msg):
-        QMessageBox.critical(self, "Error", msg)
-        self.txt_log.append(f"<span style='color:red'>ERROR: {msg}</span>")
-        self.btn_conv_pdf.setEnabled(False)
-        self.btn_conv_folder.setEnabled(False)
-        self.btn_reset.setEnabled(True)
-
+    def shutdown(self):
+        if self.runner is not None:
+            self.runner.shutdown()
 
-    def open_file(self, item):
-        path = item.text()
+    def open_file(self, index):
+        path = index.data()
         if os.path.exists(path):
             QDesktopServices.openUrl(QUrl.fromLocalFile(path))
         else:
@@ -442,12 +561,20 @@ class CsvTab(QWidget):
         self.btn_browse_fld   = QPushButton("Browse Folder…")
         self.btn_conv_folder  = QPushButton("Convert Folder")
         
+        self.spn_jobs         = QSpinBox()
+        self.spn_jobs.setRange(1, 64)
+        self.spn_jobs.setValue(os.cpu_count() or 1)
         self.btn_reset        = QPushButton("Reset")
         self.btn_reset.setEnabled(False)
         self.btn_reset.clicked.connect(self.on_reset)
-        # Log & Outputs
-        self.txt_log          = QTextEdit(readOnly=True)
-        self.lst_out          = QListWidget()
+        # Progress, Log & Outputs
+        self.batch            = BatchView(pages=False)
+        self.txt_log          = LogView()
+        self.outputs          = OutputsModel()
+        self.lst_out          = QListView()
+        self.lst_out.setModel(self.outputs)
+        self.lst_out.setUniformItemSizes(True)
+        self.runner           = None
         
 
         # Layout
@@ -471,11 +598,15 @@ class CsvTab(QWidget):
         # Options
         opts = QHBoxLayout()
         opts.addWidget(QLabel("Options:"))
+        opts.addWidget(QLabel("Parallel jobs:"))
+        opts.addWidget(self.spn_jobs)
         opts.addStretch()
         opts.addWidget(self.btn_reset)
         v.addLayout(opts)
         
-        # Log & Outputs
+        # Progress, Log & Outputs
+        v.addWidget(QLabel("Progress:"))
+        v.addWidget(self.batch, 1)
         v.addWidget(QLabel("Log:"))
         v.addWidget(self.txt_log, 1)
         v.addWidget(QLabel("Outputs (double-click to open):"))
@@ -486,7 +617,8 @@ class CsvTab(QWidget):
         self.btn_browse_fld.clicked.connect(self.on_browse_folder)
         self.btn_conv_csv.clicked.connect(self.on_convert_csv)
         self.btn_conv_folder.clicked.connect(self.on_convert_folder)
-        self.lst_out.itemDoubleClicked.connect(self.open_file)
+        self.batch.btn_cancel.clicked.connect(self.on_cancel)
+        self.lst_out.doubleClicked.connect(self.open_file)
 
     def on_browse_csv(self):
         path, _ = QFileDialog.getOpenFileName(
@@ -508,7 +640,7 @@ class CsvTab(QWidget):
             QMessageBox.warning(self, "No CSV", "Please select a valid CSV.")
             return
         self._reset_ui_single()
-        self._start_csv_worker(csv)
+        self._start_batch([csv])
 
     def on_convert_folder(self):
         fld = self.le_folder_csv.text().strip()
@@ -516,82 +648,90 @@ class CsvTab(QWidget):
             QMessageBox.warning(self, "No folder", "Please select a valid folder.")
             return
         self._reset_ui_single()
-        self._start_csv_folder_worker(fld)
+        csvs = sorted(
+            os.path.join(fld, f)
+            for f in os.listdir(fld)
+            if f.lower().endswith('.csv')
+        )
+        if not csvs:
+            self._on_error("No CSVs found in folder")
+            return
+        self._start_batch(csvs)
+
+    def on_cancel(self):
+        if self.runner is not None:
+            self.batch.cancelled(self.runner.cancel())
 
     def _reset_ui_single(self):
+        self.batch.clear()
         self.txt_log.clear()
-        self.lst_out.clear()
+        self.outputs.clear()
         self.btn_conv_csv.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
     
     def on_reset(self):
         self.le_csv.clear()
         self.le_folder_csv.clear()
+        self.batch.clear()
         self.txt_log.clear()
-        self.lst_out.clear()
+        self.outputs.clear()
         self.btn_conv_csv.setEnabled(True)
         self.btn_conv_folder.setEnabled(True)
         self.btn_reset.setEnabled(False)
 
-
-    def _start_csv_worker(self, csv):
-        self.thread = QThread()
-        self.worker = CsvWorker(csv)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.log.connect(self.txt_log.append)
-        self.worker.error.connect(self._on_error_csv)
-        self.worker.finished.connect(self._on_finished_csv)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
-
-    def _start_csv_folder_worker(self, fld):
-        self.thread = QThread()
-        self.worker = CsvFolderWorker(fld)
-        self.worker.moveToThread(self.thread)
-        self.thread.started.connect(self.worker.run)
-        self.worker.log.connect(self.txt_log.append)
-        self.worker.error.connect(self._on_error_folder)
-        self.worker.finished.connect(self._on_finished_folder)
-        self.worker.finished.connect(self.thread.quit)
-        self.worker.finished.connect(self.worker.deleteLater)
-        self.thread.finished.connect(self.thread.deleteLater)
-        self.thread.start()
-
-    def _on_error_csv(self, msg):
-        QMessageBox.critical(self, "Error", msg)
-        self.txt_log.append(f"<span style='color:red'>ERROR: {msg}</span>")
-        self.btn_conv_csv.setEnabled(False)
-        self.btn_conv_folder.setEnabled(False)
-        self.btn_reset.setEnabled(True)
-
-    def _on_finished_csv(self, outputs):
-        self.txt_log.append("<b>Done.</b>")
-        for f in outputs:
-            self.lst_out.addItem(QListWidgetItem(f))
+    def _start_batch(self, csvs):
+        self.csvs = csvs
+        self.errors = []
+        self.started = {}
+        self.runner = BatchRunner(csv2qif_job, csvs, jobs=self.spn_jobs.value())
+        self.runner.started.connect(self._on_file_started)
+        self.runner.done.connect(self._on_file_done)
+        self.runner.finished.connect(self._on_finished)
+        self.batch.begin(csvs)
+        self.runner.start()
+
+    def _on_file_started(self, row):
+        self.started[row] = time.perf_counter()
+        self.batch.running(row)
+
+    def _on_file_done(self, row, result):
+        qif, error = (None, str(result)) if isinstance(result, Exception) else result
+        self.txt_log.append(f"--- {os.path.basename(self.csvs[row])} ---")
+        if error is not None:
+            self.errors.append(error)
+            self.txt_log.append_html(f"<span style='color:red'>ERROR: {escape(error)}</span>")
+        else:
+            self.txt_log.append(f"  → QIF: {qif}")
+            self.outputs.add([qif])
+        self.txt_log.append(" ")
+        self.batch.done(row, error, seconds=time.perf_counter() - self.started.pop(row))
+
+    def _on_finished(self, cancelled):
+        self.runner = None
+        self.batch.end()
+        if cancelled:
+            self.txt_log.append_html("<b>Cancelled.</b>")
+        elif len(self.csvs) == 1 and self.errors:
+            QMessageBox.critical(self, "Error", self.errors[0])
+        else:
+            self.txt_log.append_html("<b>Done.</b>" if len(self.csvs) == 1 else "<b>Batch Done.</b>")
         self.btn_conv_csv.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
         self.btn_reset.setEnabled(True)
 
-    def _on_error_folder(self, msg):
+    def _on_error(self, msg):
         QMessageBox.critical(self, "Error", msg)
-        self.txt_log.append(f"<span style='color:red'>ERROR: {msg}</span>")
+        self.txt_log.append_html(f"<span style='color:red'>ERROR: {escape(msg)}</span>")
         self.btn_conv_csv.setEnabled(False)
         self.btn_conv_folder.setEnabled(False)
         self.btn_reset.setEnabled(True)
 
-    def _on_finished_folder(self, outputs):
-        self.txt_log.append("<b>Batch Done.</b>")
-        for f in outputs:
-            self.lst_out.addItem(QListWidgetItem(f))
-        self.btn_conv_csv.setEnabled(False)
-        self.btn_conv_folder.setEnabled(False)
-        self.btn_reset.setEnabled(True)
+    def shutdown(self):
+        if self.runner is not None:
+            self.runner.shutdown()
 
-    def open_file(self, item):
-        path = item.text()
+    def open_file(self, index):
+        path = index.data()
         if os.path.exists(path):
             QDesktopServices.openUrl(QUrl.fromLocalFile(path))
         else:
@@ -607,10 +747,18 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Bank Converter GUI")
         tabs = QTabWidget()
-        tabs.addTab(PdfTab(), "PDF → CSV/QIF")
-        tabs.addTab(CsvTab(), "CSV → QIF")
+        self.tab_pdf = PdfTab()
+        self.tab_csv = CsvTab()
+        tabs.addTab(self.tab_pdf, "PDF → CSV/QIF")
+        tabs.addTab(self.tab_csv, "CSV → QIF")
         self.setCentralWidget(tabs)
 
+    def closeEvent(self, event):
+        # files still waiting aren't started; those being converted finish
+        self.tab_pdf.shutdown()
+        self.tab_csv.shutdown()
+        super().closeEvent(event)
+
 
 def main():
     app = QApplication(sys.argv)
@@ -0,0 +1,54 @@
+import re
+
+"""
+Money amounts as integer cents.
+
+Balances are reconciled by adding up every transaction on a statement, so they
+are kept as whole cents instead of floats: sums are exact, and nothing has to
+be rounded before comparing a running balance with the one the bank printed.
+"""
+
+_AMOUNT = re.compile(r"""
+    (?P<open>\()?\s*
+    (?P<sign>[+-])?\s*
+    \$?\s*
+    (?P<sign_after>[+-])?\s*
+    (?P<whole>[\d,]*)
+    (?:\.(?P<frac>\d*))?
+    \s*(?P<close>\))?
+    \s*(?P<suffix>CR|DR)?
+    """, re.IGNORECASE | re.VERBOSE)
+
+"""
+Parse an amount string straight into integer cents, e.g.
+    '$1,234.56 CR' -> 123456, '1,000.00DR' -> -100000, '-12.00' -> -1200,
+    '(5.00)' -> -500, '0.4' -> 40
+A '-' sign, brackets or a 'DR' suffix make the amount negative. More than two
+decimals are rounded half to even, like round(x, 2).
+Raises ValueError if the text isn't an amount, same as float() would.
+"""
+def parse_cents(text: str) -> int:
+    found = _AMOUNT.fullmatch(text.strip())
+    if found is None or bool(found['open']) != bool(found['close']) or (found['sign'] and found['sign_after']):
+        raise ValueError(f"could not convert string to amount: {text!r}")
+    whole = found['whole'].replace(',', '')
+    frac = found['frac'] or ''
+    if not whole and not frac:
+        raise ValueError(f"could not convert string to amount: {text!r}")
+
+    cents = int(whole or 0) * 100 + int(frac[:2].ljust(2, '0'))
+    rest = frac[2:]
+    if rest.strip('0'):  # more than two decimals: round half to even
+        half = '5'.ljust(len(rest), '0')
+        if rest > half or (rest == half and cents % 2):
+            cents += 1
+
+    sign = found['sign'] or found['sign_after']
+    negative = sign == '-' or found['open'] or (found['suffix'] or '').upper() == 'DR'
+    return -cents if negative else cents
+
+"""
+Cents as dollars for printing, e.g. 123450 -> 1234.5 (what round(x, 2) printed)
+"""
+def dollars(cents: int) -> float:
+    return cents / 100
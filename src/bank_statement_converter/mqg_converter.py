@@ -1,19 +1,26 @@
 import fitz
 import os.path
-from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, remove_annots, \
-    check_page_rotation, clean_up_values
+from .utils import export_to_csv, is_datetime, reformat_date, csv_rename
+from .document import open_statement
+from .table import extract_cells, boundaries
+from .events import emit
+from .dates import date_ordinal
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows
+
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
 
 """
 Get the total credits/debits and their difference, and opening and closing balances from the first page and prints them
 Returns the total credits [0], total debits [1] and their difference [2].
 Also returns the opening balance [3] and closing balance [4]
 """
-def diff_balances(doc):
+def diff_balances(statement):
     
     rect = fitz.Rect(0, 350, 570, 800)
-    page = doc[0]
-    remove_annots(page)
-    text = page.get_text(clip=rect) + "\n"
+    page = statement.page(0)
+    text = statement.text(page, clip=rect) + "\n"
     lines = text.split('\n')
     
     credits = None
@@ -32,44 +39,76 @@ def diff_balances(doc):
         elif (line == '= Closing balance'):
             balance_flag = True
         elif balance_flag and (i == 0):
-            if ('CR' in line) or ('Cr' in line):
-                opening_balance = round(float(line.replace(',', '').replace('$', '').replace('CR', '').replace('Cr', '').strip()), 2)
-            elif ('DR' in line) or ('Dr' in line):
-                opening_balance = -round(float(line.replace(',', '').replace('$', '').replace('DR', '').replace('Dr', '').strip()), 2)
-            print(f"Obtained opening balance: ${opening_balance}")
+            opening_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=opening_balance)
             i += 1
         # Get total credits [0] and debits [1] and their difference [2] to compare to running amounts calculated
         elif balance_flag and (i == 1):
-            debits = -round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total debits: ${debits}")
+            debits = -parse_cents(line[1:])
+            emit('balance', "Obtained total debits: ${cents!d}", name='debits', source='statement', cents=debits)
             i += 1
         elif balance_flag and (i == 2):
-            credits = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total credits: ${credits}")
-            diff_amount = round(debits + credits, 2)
+            credits = parse_cents(line[1:])
+            emit('balance', "Obtained total credits: ${cents!d}", name='credits', source='statement', cents=credits)
+            diff_amount = debits + credits
             i += 1
         # Get closing balance
         elif balance_flag and (i == 3):
-            if ('CR' in line) or ('Cr' in line):
-                closing_balance = round(float(line.replace(',', '').replace('$', '').replace('CR', '').replace('Cr', '').strip()), 2)
-            elif ('DR' in line) or ('Dr' in line):
-                closing_balance = -round(float(line.replace(',', '').replace('$', '').replace('DR', '').replace('Dr', '').strip()), 2)
-            print(f"Obtained closing balance: ${closing_balance}")
-            print(f"-------------------------------------------------")
+            closing_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
+            emit('section')
             break
     
-    return (round(credits, 2), round(debits, 2), diff_amount, opening_balance, closing_balance)
+    return (credits, debits, diff_amount, opening_balance, closing_balance)
 
 """
-Get the transactions
+Extract the text of the table cells of one page, or None if it has no table
 """
-def get_transactions(pdf_path: str):        
-    doc = check_page_rotation(pdf_path)
+def page_cells(statement, page):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+    line_art = statement.line_art(page)  # extract page's line art
+    if not line_art:
+        return None
+
+    # make list of row shading rectangles
+    # they must be large enough (width & height) and have a fill color
+    grids = [  # subselect shading rectangles
+        r for r in line_art.boxes if r.width > 58
+    ]
+    # the column coordinates are given
+    x_values = set([20,80,200,380,440,500,570])
+
+    y_values = set()  # these need to be computed now
+
+    for r in grids:  # walk through shading rectangles
+        # and add their coordinates to what we have
+        y_values.add(r.y0)  # top of shading
+        y_values.add(r.y1)  # bottom of shading
+
+    # the page bottom needs to be added as y-coordinate as well
+    y_values.add(800)
+
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = sorted(list(x_values))
+    y_values = boundaries(y_values)
 
-    amnt_checks = diff_balances(doc)
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
+
+"""
+Get the transactions
+Yields the transactions as they are read, in a TransactionBatch per page
+"""
+def get_transactions(statement):
+    amnt_checks = diff_balances(statement)
     init_credits, init_debits, diff_amount = amnt_checks[0], amnt_checks[1], amnt_checks[2]
     
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     running_balance = amnt_checks[3]
     closing_balance = amnt_checks[4]
     t_line = 0     
@@ -79,126 +118,98 @@ def get_transactions(pdf_path: str):
     
     year = '0'
               
-    for page in doc[1:]:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        if not page.get_drawings():
-            continue
+    for _, cells in statement.map_pages(page_cells, start=1):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        paths = page.get_drawings()  # extract page's line art
-        
-        # make list of row shading rectangles
-        # they must be large enough (width & height) and have a fill color
-        grids = [  # subselect shading rectangles
-            p for p in paths if p["rect"].width > 58
-        ]
-        # the column coordinates are given
-        x_values = set([20,80,200,380,440,500,570])
-
-        y_values = set()  # these need to be computed now
-
-        for p in grids:  # walk through shading rectangles
-            # and add their coordinates to what we have
-            r = p["rect"]
-            y_values.add(r.y0)  # top of shading
-            y_values.add(r.y1)  # bottom of shading
-
-        # the page bottom needs to be added as y-coordinate as well
-        y_values.add(800)
-
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        y_values = sorted(list(y_values))
-        y_values = clean_up_values(y_values)
-
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
+        if cells is None:  # empty page, or no table on it
+            continue
             
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         transaction = ''
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if is_datetime(text, "%b %Y"):
                         year = text[-4:]
                         break               
                     elif is_datetime(str(text + " " + year), "%b %d %Y"):
                         current_date = str(text + " " + year)
-                        comb_data[t_line+1].append(reformat_date(current_date))
+                        ordinal = date_ordinal(current_date)
+                        row_data.append(reformat_date(current_date))
                     else:
                         break
                 elif j == 1:
                     transaction = transaction + text
                 elif j == 2:
                     transaction = transaction + " " + text
-                    comb_data[t_line+1].append(transaction.strip())
+                    row_data.append(transaction.strip())
                     transaction = ''
                 elif j == 3:
                     if text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                 elif j == 4:
                     if text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_balance += float(amount_str)
-                        tot_running += float(amount_str)
-                        tot_credit += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_credit += cents
                 elif j == 5:
-                    if text[-2:] == 'CR':
-                        given_balance = round(float(text.replace('CR','').replace(',', '').strip()), 2)
-                        if round(running_balance, 2) == given_balance:
-                            continue
-                        else:
-                            raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
-                                        Find at row: {i}"))
-                    elif text[-2:] == 'DR':
-                        given_balance = -round(float(text.replace('DR','').replace(',', '').strip()), 2)
-                        if round(running_balance, 2) == given_balance:
+                    if text[-2:] in ('CR', 'DR'):
+                        given_balance = parse_cents(text) # negative if 'DR'
+                        if running_balance == given_balance:
                             continue
                         else:
-                            raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                            raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                         Find at row: {i}"))                                                                            
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
             t_line += 1
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated closing balance: ${round(running_balance, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    batch.opening, batch.closing = amnt_checks[3], amnt_checks[4]  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
     
-    if (round(running_balance, 2) == closing_balance):
-        print('Running closing balance matches given closing balance.')
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated closing balance: ${cents!d}", name='closing', source='calculated', cents=running_balance)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
+    
+    if (running_balance == closing_balance):
+        emit('check', 'Running closing balance matches given closing balance.')
     else:
-        raise (ValueError(f"Running closing balance and given closing balance do not match: {running_balance}, {closing_balance}"))
+        raise (ValueError(f"Running closing balance and given closing balance do not match: {dollars(running_balance)}, {dollars(closing_balance)}"))
             
-    if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits):
-        print('Running amount and difference between total credits and total debits same.')
-        print(f"-------------------------------------------------")
+    if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits):
+        emit('check', 'Running amount and difference between total credits and total debits same.')
+        emit('section')
     else:
-        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {tot_running}, {diff_amount}"))
+        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {dollars(tot_running)}, {dollars(diff_amount)}"))
 
-    return comb_data_clean
+"""
+Get the transactions as TransactionBatch objects, yielded as they are read.
+account_type is only there to match the other converters, this bank has one
+statement type
+"""
+def extract_mqg(statement, account_type: str | None = None):
+    return get_transactions(statement)
 
-def convert_mqg(pdf_path: str):
-    data = get_transactions(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+def convert_mqg(pdf_path):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(get_transactions(statement)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
@@ -1,19 +1,27 @@
 import fitz
 import os.path
-from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, check_page_rotation, clean_up_values, remove_annots
+from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, clean_up_values
+from .document import open_statement
+from .table import extract_cells, boundaries
+from .events import emit
+from .dates import date_ordinal
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows
 import re
 
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
+
 """
 Get the total credits/debits and their difference, and opening and closing balances from the first page and prints them
 Returns the total credits [0], total debits [1] and their difference [2].
 Also returns the opening balance [3] and closing balance [4], mainly for Business Everyday Acc
 """
-def diff_balances(doc):
+def diff_balances(statement):
     
     rect = fitz.Rect(0,10,600,740)
-    page = doc[0]
-    remove_annots(page)
-    text = page.get_text(clip=rect) + "\n"
+    page = statement.page(0)
+    text = statement.text(page, clip=rect) + "\n"
     lines = text.split('\n')
     
     credits = None
@@ -34,23 +42,17 @@ def diff_balances(doc):
             balance_flag = True
             continue
         if balance_flag == True:
-            if ('CR' in line) or ('Cr' in line):
-                opening_balance = round(float(line.replace(',', '').replace('$', '').replace('CR', '').replace('Cr', '').strip()), 2)
-            elif ('DR' in line) or ('Dr' in line):
-                opening_balance = -round(float(line.replace(',', '').replace('$', '').replace('DR', '').replace('Dr', '').strip()), 2)
-            print(f"Obtained opening balance: ${opening_balance}")
+            opening_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=opening_balance)
             balance_flag = False
             continue
         if (line == 'Closing Balance') or (line == 'Closing balance'):
             closing_flag = True
             continue
         if closing_flag == True:
-            if ('CR' in line) or ('Cr' in line):
-                closing_balance = round(float(line.replace(',', '').replace('$', '').replace('CR', '').replace('Cr', '').strip()), 2)
-            elif ('DR' in line) or ('Dr' in line):
-                closing_balance = -round(float(line.replace(',', '').replace('$', '').replace('DR', '').replace('Dr', '').strip()), 2)
-            print(f"Obtained closing balance: ${closing_balance}")
-            print(f"-------------------------------------------------")
+            closing_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
+            emit('section')
             break
         # Get total credits [0] and debits [1] and their difference [2] to compare to running amounts calculated
         # Difference between opening and closing balance can be different than running amount
@@ -58,30 +60,29 @@ def diff_balances(doc):
             credits_flag = True
             continue
         if credits_flag == True:
-            credits = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total credits: ${credits}")
+            credits = parse_cents(line[1:])
+            emit('balance', "Obtained total credits: ${cents!d}", name='credits', source='statement', cents=credits)
             credits_flag = False
             continue
         if (line == 'Total Debits') or (line == 'Total debits'):
             debits_flag = True
             continue
         if debits_flag == True:
-            debits = -round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total debits: ${debits}")
-            diff_amount = round(debits + credits, 2)
+            debits = -parse_cents(line[1:])
+            emit('balance', "Obtained total debits: ${cents!d}", name='debits', source='statement', cents=debits)
+            diff_amount = debits + credits
             
     # For transaction listings without opening/closing balances        
     if credits == None:
         return None
     
-    return (round(credits, 2), round(debits, 2), diff_amount, opening_balance, closing_balance)
+    return (credits, debits, diff_amount, opening_balance, closing_balance)
 
 """
 Get x-values for NAB transactions account dynamically as changes with different statements
 """
-def get_x_coords(doc, amnt_check):
-    page = doc[0]
-    remove_annots(page)
+def get_x_coords(statement, amnt_check):
+    page = statement.page(0)
     x_coords = []
 
     # Find the top Y coord
@@ -122,99 +123,102 @@ def get_x_coords(doc, amnt_check):
     
     return x_coords
      
+"""
+Extract the text of the table cells of one page, or None if it has no table
+"""
+def page_cells_acc(statement, page, x_coords, amnt_checks):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+
+    # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
+    line_art = statement.line_art(page)  # extract page's line art
+
+    # make list of row shading rectangles
+    # they must be large enough (width & height) and have a fill color
+    grids = [  # subselect shading rectangles
+        r for r in line_art.boxes if r.width > 80 and r.height > 1 and r.fill
+    ]
+    # the column coordinates are given ... by someone
+    x_values = set(x_coords)
+    # NEED TO DYNAMICALLY FIND X_VALUES
+
+    y_values = set()  # these need to be computed now
+
+    for r in grids:  # walk through shading rectangles
+        # and add their coordinates to what we have
+        x_values.add(r.x0)  # left of shading
+        x_values.add(r.x1)  # right of shading
+        y_values.add(round(r.y0))  # top of shading
+        y_values.add(round(r.y1))  # bottom of shading
+
+    # the page top and bottom needs to be added as y-coordinate as well
+    # top transaction otherwise will not be found if first transaction is not shaded
+    r = page.search_for("Important")[0]  # do not include footer line
+    y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
+
+    # In one version of statements there is no transaction details after first page
+    try:
+        r2 = page.search_for("Transaction Details")[0] # do not include header line
+    except:
+        r2 = page.search_for("Page")[0] # do not include header line
+
+    if amnt_checks is None:
+        y_values.add(round(r2.y0 + 10))  # add top of header line as y-coord
+    else:
+        y_values.add(round(r2.y0 + 30))  # add top of header line as y-coord
+
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = boundaries(x_values)
+    y_values = boundaries(y_values)
+
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
+
 """
 Get the transactions for Transaction Account
+Yields the transactions as they are read, in a TransactionBatch per page
 """
-def get_transactions_acc(pdf_path: str):        
-    doc = check_page_rotation(pdf_path)
-    
-    amnt_checks = diff_balances(doc)
+def get_transactions_acc(statement):
+    amnt_checks = diff_balances(statement)
     if amnt_checks is not None:
         init_credits, init_debits, diff_amount = amnt_checks[0], amnt_checks[1], amnt_checks[2]
     
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     t_line = 0     
     tot_credit = 0
     tot_debit = 0
     tot_running = 0
     
-    x_coords = get_x_coords(doc, amnt_checks)
+    x_coords = get_x_coords(statement, amnt_checks)
                   
-    for page in doc:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        
-        # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
-        paths = page.get_drawings()  # extract page's line art
-
-        # make list of row shading rectangles
-        # they must be large enough (width & height) and have a fill color
-        grids = [  # subselect shading rectangles
-            p for p in paths if p["rect"].width > 80 and p["rect"].height > 1 and p["fill"]
-        ]
-        # the column coordinates are given ... by someone
-        x_values = set(x_coords)
-        # NEED TO DYNAMICALLY FIND X_VALUES
-
-        y_values = set()  # these need to be computed now
-
-        for p in grids:  # walk through shading rectangles
-            # and add their coordinates to what we have
-            r = p["rect"]
-            x_values.add(r.x0)  # left of shading
-            x_values.add(r.x1)  # right of shading
-            y_values.add(round(r.y0))  # top of shading
-            y_values.add(round(r.y1))  # bottom of shading
-
-        # the page top and bottom needs to be added as y-coordinate as well
-        # top transaction otherwise will not be found if first transaction is not shaded
-        r = page.search_for("Important")[0]  # do not include footer line
-        y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
+    for _, cells in statement.map_pages(page_cells_acc, x_coords, amnt_checks):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        # In one version of statements there is no transaction details after first page
-        try:
-            r2 = page.search_for("Transaction Details")[0] # do not include header line
-        except:
-            r2 = page.search_for("Page")[0] # do not include header line
-        
-        if amnt_checks is None:
-            y_values.add(round(r2.y0 + 10))  # add top of header line as y-coord
-        else:
-            y_values.add(round(r2.y0 + 30))  # add top of header line as y-coord
-
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        x_values = clean_up_values(x_values)
-        y_values = sorted(list(y_values))
-        y_values = clean_up_values(y_values)
-        
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
+        if cells is None:  # empty page, or no table on it
+            continue
 
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if is_datetime(text, "%d %b %y"):
-                        comb_data[t_line+1].append(reformat_date(text))
+                        ordinal = date_ordinal(text)
+                        row_data.append(reformat_date(text))
                         continue
                     # If function stops working may be because final row too close to 'Important' line
                     # This statement will include Important and adjust if change footer line as y-coord
                     if is_datetime(text[:9], "%d %b %y") and (text[-9:] == 'Important'):
-                        comb_data[t_line+1].append(reformat_date(text[:9]))
+                        ordinal = date_ordinal(text[:9])
+                        row_data.append(reformat_date(text[:9]))
                         continue
                     else:
                         break
@@ -222,59 +226,67 @@ def get_transactions_acc(pdf_path: str):
                     if text[-1] == '$':
                         text = text[:-1].strip()
                     elif text[:27] == 'PLEASE NOTE FROM TODAY YOUR':
-                        comb_data[t_line+1].pop()
+                        row_data.pop()
                         break       
-                    comb_data[t_line+1].append(text)
+                    row_data.append(text)
                     continue
                 if j == 2:
                     if text:
                         amount_str = str(text.replace(',', '').replace('$', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        tot_running += cents
+                        tot_debit += cents
                         break
                     continue
                 if j == 3:
                     if text:
                         if amnt_checks is None:
                             amount_str = str(text.replace(',', '').replace('$', '').strip())
-                            comb_data[t_line+1].append('-' + amount_str)
-                            tot_running -= float(amount_str)
-                            tot_debit -= float(amount_str)
+                            row_data.append('-' + amount_str)
+                            cents = -parse_cents(amount_str)
+                            tot_running += cents
+                            tot_debit += cents
                             break
                         else:
                             amount_str = str(text.replace(',', '').replace('$', '').strip())
-                            comb_data[t_line+1].append(amount_str)
-                            tot_running += float(amount_str)
-                            tot_credit += float(amount_str)
+                            row_data.append(amount_str)
+                            cents = parse_cents(amount_str)
+                            tot_running += cents
+                            tot_credit += cents
                             break
                     continue
                 if (j == 4) and (amnt_checks is None):
                     if text:
                         amount_str = str(text.replace(',', '').replace('$', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        tot_running += float(amount_str)
-                        tot_credit += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        tot_running += cents
+                        tot_credit += cents
                         break
                     break
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
             t_line += 1
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    if amnt_checks is not None:
+        batch.opening, batch.closing = amnt_checks[3], amnt_checks[4]  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
+    
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
     
     if amnt_checks is not None:        
-        if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits):
-            print('Running amount and difference between total credits and total debits same.')
-            print(f"-------------------------------------------------")
+        if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits):
+            emit('check', 'Running amount and difference between total credits and total debits same.')
+            emit('section')
         else:
-            raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {tot_running}, {diff_amount}"))
+            raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {dollars(tot_running)}, {dollars(diff_amount)}"))
     else:
-        print("IMPORTANT: Please note that there are no checks for this conversion; please check manually if necessary.")
-        
-    return comb_data_clean
+        emit('warning', "IMPORTANT: Please note that there are no checks for this conversion; please check manually if necessary.")
 
 """
 Function to remove leading and trailing dots (For Business Everyday Account)
@@ -283,16 +295,73 @@ def remove_dots(text):
     """Removes leading and trailing dots with spaces."""
     return re.sub(r"^[.\s]+|[.\s]+$", "", text)
 
+"""
+Extract the text of the table cells of one page, or None if it has no table
+"""
+def page_cells_business_everyday(statement, page):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+
+    text_wanted = ".........."
+    text_instances = page.search_for(text_wanted)
+    y_values = []
+
+    for found in text_instances:
+        y_values.append(found.y1)
+
+    # Add the top of the page as a y-coord
+    try:
+        r2 = page.search_for("Transaction Details")[0]
+        y_values.append(round(r2.y0 + 40))  # NOTE: can probably change this to r2.y1 + 10?
+    except:
+        return None
+
+    # The "Please Note From Today Your Dr Interest Rate Is x%" lines needs to be added as y-coordinates
+    #  as it does not have dots and is not a transaction line; add both the top and bottom y-coord
+    try:
+        r3 = page.search_for("Please Note From Today Your ")[0]
+        y_values.append(r3.y0)
+        y_values.append(r3.y1)
+    except:
+        pass
+
+    # The "Important As part of your loan agreement ... moneysmart.gov.au" lines needs to be added as y-coordinates
+    #  as it does not have dots and is not a transaction line
+    try:
+        r3 = page.search_for("Important")[0]
+        y_values.append(r3.y0) # Only get the top y-coord of the line
+    except:
+        pass
+
+    # Separate try as they may be on different pages
+    try:
+        r4 = page.search_for("moneysmart.gov.au")[0]
+        y_values.append(r4.y1) # Only get the bottom y-coord of the line
+    except:
+        pass
+
+    x_values = [35,97,320,410,480,580]
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = sorted(list(x_values))
+    x_values = clean_up_values(x_values)
+    y_values = sorted(list(set(y_values)))
+
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
+
 """
 Get the transactions for Business Everyday Account
+Yields the transactions as they are read, in a TransactionBatch per page
 """
-def get_business_everyday(pdf_path: str, account_type: str):        
-    doc = check_page_rotation(pdf_path)
-    
-    amnt_checks = diff_balances(doc)
+def get_business_everyday(statement, account_type: str):
+    amnt_checks = diff_balances(statement)
     init_credits, init_debits, diff_amount = amnt_checks[0], amnt_checks[1], amnt_checks[2]
     
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     running_balance = amnt_checks[3]
     t_line = 0     
     tot_credit = 0
@@ -301,83 +370,33 @@ def get_business_everyday(pdf_path: str, account_type: str):
     balance_flag = False
     trans_sum_flag = False
 
-    for page in doc:
-        remove_annots(page)
-        
-        # To skip empty pages
-        if not page.get_text():
-            continue
+    for _, cells in statement.map_pages(page_cells_business_everyday):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        text_wanted = ".........."
-        text_instances = page.search_for(text_wanted)
-        y_values = []
         
-        for found in text_instances:
-            y_values.append(found.y1)
-            
-        # Add the top of the page as a y-coord
-        try:
-            r2 = page.search_for("Transaction Details")[0]
-            y_values.append(round(r2.y0 + 40))  # NOTE: can probably change this to r2.y1 + 10?
-        except:
+        if cells is None:  # empty page, or no table on it
             continue
-        
-        # The "Please Note From Today Your Dr Interest Rate Is x%" lines needs to be added as y-coordinates
-        #  as it does not have dots and is not a transaction line; add both the top and bottom y-coord
-        try:
-            r3 = page.search_for("Please Note From Today Your ")[0]
-            y_values.append(r3.y0)
-            y_values.append(r3.y1)
-        except:
-            pass
-        
-        # The "Important As part of your loan agreement ... moneysmart.gov.au" lines needs to be added as y-coordinates
-        #  as it does not have dots and is not a transaction line
-        try:
-            r3 = page.search_for("Important")[0]
-            y_values.append(r3.y0) # Only get the top y-coord of the line
-        except:
-            pass
-        
-        # Separate try as they may be on different pages
-        try:
-            r4 = page.search_for("moneysmart.gov.au")[0]
-            y_values.append(r4.y1) # Only get the bottom y-coord of the line
-        except:
-            pass
-
-        x_values = [35,97,320,410,480,580]
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        x_values = clean_up_values(x_values)
-        y_values = sorted(list(set(y_values)))
-
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
             
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = remove_dots(page.get_textbox(cell).replace("\n", " ").strip())
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
+                text = remove_dots(text)
                 if j == 0:
                     if text[:4] == 'Date':
                         balance_flag = True
                         continue
                     elif is_datetime(text, "%d %b %Y"):
                         current_date = text
-                        comb_data[t_line+1].append(reformat_date(current_date))
+                        ordinal = date_ordinal(current_date)
+                        row_data.append(reformat_date(current_date))
                     elif not text: # Append the date of last transaction if date cell is empty
-                        comb_data[t_line+1].append(reformat_date(current_date))
+                        ordinal = date_ordinal(current_date)
+                        row_data.append(reformat_date(current_date))
                 elif j == 1:
                     if balance_flag == True:
                         continue
@@ -386,21 +405,21 @@ def get_business_everyday(pdf_path: str, account_type: str):
                     elif (text[:20] == 'TRANSACTION SUMMARY ') and (account_type == 'BUSINESS CHEQUE ACCOUNT'):
                         str_to_find = 'Total Fees Charged'
                         start_index = text.rfind(str_to_find)
-                        comb_data[t_line+1].append(text[start_index + len(str_to_find) + 1:])
+                        row_data.append(text[start_index + len(str_to_find) + 1:])
                         trans_sum_flag = True
                         continue
                     elif not text:
-                        comb_data[t_line+1].pop()
+                        row_data.pop()
                         break    
                     elif text[:27] == 'Please Note From Today Your':
-                        current_date = comb_data[t_line+1][0]
-                        comb_data[t_line+1].pop()
+                        current_date = row_data[0]
+                        row_data.pop()
                         break            
                     elif (text[:40] == 'Important As part of your loan agreement') or ('moneysmart.gov.au.' in text):
-                        current_date = comb_data[t_line+1][0]
-                        comb_data[t_line+1].pop()
+                        current_date = row_data[0]
+                        row_data.pop()
                         break                  
-                    comb_data[t_line+1].append(text)
+                    row_data.append(text)
                 elif j == 2:
                     if balance_flag == True:
                         continue
@@ -411,16 +430,18 @@ def get_business_everyday(pdf_path: str, account_type: str):
                         # May be error here in future as always assumes transaction summary is followed by debit
                         # In future if this occurs, add 'Total Fees Charged' as a y-coord and skip the cell
                         amount_str = str(text_clean.replace(',', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                     elif text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                 elif j == 3:
                     if balance_flag == True:
                         continue
@@ -429,52 +450,65 @@ def get_business_everyday(pdf_path: str, account_type: str):
                         continue                    
                     elif text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_balance += float(amount_str)
-                        tot_running += float(amount_str)
-                        tot_credit += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_credit += cents
                 elif j == 4:
                     if balance_flag == True:
-                        given_balance = round(float(text.replace('Balance','').replace('Cr','').replace(',', '').strip()), 2)
-                        if round(running_balance, 2) == given_balance:
+                        given_balance = parse_cents(text.replace('Balance',''))
+                        if running_balance == given_balance:
                             balance_flag = False
                         else:
-                            raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                            raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                         Find at row: {i}"))
                     elif text:
-                        given_balance = round(float(text.replace('Cr','').replace(',', '').strip()), 2)
-                        if round(running_balance, 2) == given_balance:
+                        given_balance = parse_cents(text)
+                        if running_balance == given_balance:
                             continue
                         else:
-                            raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                            raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                         Find at row: {i}"))                                                                            
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
             t_line += 1
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated closing balance: ${round(running_balance, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    batch.opening, batch.closing = amnt_checks[3], amnt_checks[4]  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
+    
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated closing balance: ${cents!d}", name='closing', source='calculated', cents=running_balance)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
             
-    if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits):
-        print('Running amount and difference between total credits and total debits same.')
-        print(f"-------------------------------------------------")
+    if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits):
+        emit('check', 'Running amount and difference between total credits and total debits same.')
+        emit('section')
     else:
-        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {tot_running}, {diff_amount}"))
-
-    return comb_data_clean
+        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {dollars(tot_running)}, {dollars(diff_amount)}"))
             
 """
-Convert NAB pdf depending on statement type
+Get the transactions of a NAB statement depending on statement type
 """
-def convert_nab(pdf_path: str, account_type: str):
+def extract_nab(statement, account_type: str):
     if account_type == 'Transaction Account':
-        data = get_transactions_acc(pdf_path)
+        return get_transactions_acc(statement)
     elif account_type == 'BUSINESS EVERYDAY AC':
-        data = get_business_everyday(pdf_path, account_type)
+        return get_business_everyday(statement, account_type)
     elif account_type == 'BUSINESS CHEQUE ACCOUNT':
-        data = get_business_everyday(pdf_path, account_type)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+        return get_business_everyday(statement, account_type)
+    raise ValueError(f"No NAB converter implemented for account type {account_type!r}")
+
+"""
+Convert NAB pdf depending on statement type
+"""
+def convert_nab(pdf_path, account_type: str):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(extract_nab(statement, account_type)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
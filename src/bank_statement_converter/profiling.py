@@ -0,0 +1,235 @@
+import contextlib
+import os
+import threading
+import time
+from typing import NamedTuple
+
+"""
+Timing of the stages of a conversion.
+
+The conversion code marks its stages with span():
+
+    with span('detection') as s:
+        ...
+        s.info['bank'] = bank
+
+and every hook added with add_hook() is called with a SpanRecord when a span
+ends, from the thread that ran it. Spans nest (text extraction happens while a
+converter parses a page, which happens while the rows are exported), so a
+record has both the span's total time and its self time: the part not spent in
+the spans inside it. Self times add up to the time the spans cover, without
+counting anything twice.
+
+Stages: 'open' (reading the PDF), 'rotation' (unrotating page 0), 'detection',
+'drawings' (line art of a page), 'text' (page and cell text), 'parse' (a
+converter working out the transactions of a page and its balance checks) and
+'export' (writing the CSV/QIF). Pages handed to worker processes by
+StatementDocument.map_pages() are timed as 'parse' of the page that waits for
+them.
+
+Without hooks span() returns a shared do-nothing context manager, so the
+marks cost next to nothing when nobody is listening.
+
+StageTimes is a hook that adds the records up per stage; that's what
+`bstc --profile` prints. The GUI can add its own hook to show progress.
+"""
+
+class SpanRecord(NamedTuple):
+    stage: str
+    seconds: float         # from entering the span to leaving it
+    self_seconds: float    # seconds not spent in spans inside this one
+    info: dict             # whatever the code that made the span added, e.g. bank, page
+
+
+_hooks = ()               # replaced, never changed in place, so it can be read without the lock
+_hooks_lock = threading.Lock()
+_local = threading.local()
+
+"""Call hook(record) with a SpanRecord whenever a span ends, in any thread"""
+def add_hook(hook):
+    global _hooks
+    with _hooks_lock:
+        _hooks = _hooks + (hook,)
+
+def remove_hook(hook):
+    global _hooks
+    with _hooks_lock:
+        hooks = list(_hooks)
+        if hook in hooks:
+            hooks.remove(hook)
+        _hooks = tuple(hooks)
+
+
+class _NullSpan:
+    """What span() returns while there are no hooks"""
+    __slots__ = ()
+
+    @property
+    def info(self) -> dict:
+        return {}  # a new one every time: what's put in it goes nowhere
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('stage', 'info', 'start', 'inner')
+
+    def __init__(self, stage: str, info: dict):
+        self.stage = stage
+        self.info = info
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.inner = 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        if stack:
+            stack[-1].inner += seconds
+        record = SpanRecord(self.stage, seconds, seconds - self.inner, self.info)
+        for hook in _hooks:
+            hook(record)
+        return False
+
+"""Context manager timing a stage of the conversion; info goes into its SpanRecord"""
+def span(stage: str, **info):
+    if not _hooks:
+        return _NULL_SPAN
+    return _Span(stage, info)
+
+"""Iterate over iterable, timing each step (e.g. each page a converter yields) as a span"""
+def iter_spans(stage: str, iterable, **info):
+    iterator = iter(iterable)
+    while True:
+        with span(stage, **info):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+class StageTimes:
+    """
+    Hook adding up the time of each stage while it is installed, e.g.
+
+        with StageTimes() as times:
+            pdf2csv_qif(...)
+        print(times.summary())
+
+    The info of the spans (bank, account type, pages, ...) is collected in labels.
+    """
+    def __init__(self, **labels):
+        self.labels = dict(labels)
+        self.stages = {}          # stage -> [count, seconds, self seconds]
+        self.wall = 0.0
+        self._lock = threading.Lock()
+        self._start = None
+
+    def __call__(self, record: SpanRecord):
+        with self._lock:
+            totals = self.stages.get(record.stage)
+            if totals is None:
+                totals = self.stages[record.stage] = [0, 0.0, 0.0]
+            totals[0] += 1
+            totals[1] += record.seconds
+            totals[2] += record.self_seconds
+            if record.info:
+                self.labels.update(record.info)
+
+    def __enter__(self):
+        add_hook(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall += time.perf_counter() - self._start
+        remove_hook(self)
+        return False
+
+    def add(self, other):
+        """Add the totals of another StageTimes, or of its as_dict() (e.g. from a worker process)"""
+        if isinstance(other, StageTimes):
+            other = other.as_dict()
+        with self._lock:
+            for stage, data in other['stages'].items():
+                totals = self.stages.setdefault(stage, [0, 0.0, 0.0])
+                totals[0] += data['count']
+                totals[1] += data['seconds']
+                totals[2] += data['self_seconds']
+            self.wall += other['wall_seconds']
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'labels': dict(self.labels),
+                'wall_seconds': self.wall,
+                'stages': {stage: {'count': count, 'seconds': seconds, 'self_seconds': own}
+                           for stage, (count, seconds, own) in self.stages.items()},
+            }
+
+    def summary(self) -> str:
+        """Table of the stages, slowest first, with their share of the wall time"""
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][2], reverse=True)
+            wall = self.wall
+        lines = [f"{'stage':<12}{'calls':>8}{'self s':>10}{'total s':>10}{'% wall':>8}"]
+        for stage, (count, seconds, own) in stages:
+            share = 100 * own / wall if wall else 0.0
+            lines.append(f"{stage:<12}{count:>8}{own:>10.3f}{seconds:>10.3f}{share:>7.1f}%")
+        untimed = wall - sum(own for _, (_, _, own) in stages)
+        lines.append(f"{'(untimed)':<12}{'':>8}{max(untimed, 0.0):>10.3f}{'':>10}"
+                     f"{100 * max(untimed, 0.0) / wall if wall else 0.0:>7.1f}%")
+        lines.append(f"{'wall':<12}{'':>8}{wall:>10.3f}")
+        return "\n".join(lines)
+
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+"""
+Run a profiler while a file is converted and write its output to dump_dir,
+named after the file: '<name>.prof' for cProfile (read it with pstats or
+snakeviz), '<name>.html' for pyinstrument (optional, not a dependency).
+Does nothing without a dump_dir.
+"""
+@contextlib.contextmanager
+def dump_profile(dump_dir, name: str, profiler: str = 'cprofile'):
+    if profiler not in PROFILERS:
+        raise (ValueError(f"Unknown profiler {profiler!r}, expected one of {PROFILERS}"))
+    if dump_dir is None:
+        yield None
+        return
+    stem = os.path.join(dump_dir, os.path.splitext(os.path.basename(name))[0])
+    os.makedirs(dump_dir, exist_ok=True)
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler  # ImportError if it isn't installed
+        profile = Profiler()
+        profile.start()
+        try:
+            yield stem + ".html"
+        finally:
+            profile.stop()
+            with open(stem + ".html", 'w', encoding='utf-8') as f:
+                f.write(profile.output_html())
+    else:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield stem + ".prof"
+        finally:
+            profile.disable()
+            profile.dump_stats(stem + ".prof")
@@ -0,0 +1,102 @@
+from importlib import import_module
+
+"""
+Registry of converters: maps a detected (bank, account type) to the function
+that extracts the CSV rows from an open StatementDocument.
+
+Converters are given as 'module:function' strings and only imported the first
+time a statement of that bank is converted, so a process that only ever sees
+NAB statements never imports the other converters.
+
+Every converter is called as converter(statement, account_type) and returns an
+iterable of TransactionBatch objects (see transactions.py), usually a generator
+that yields them while it reads the statement; at least one batch, so the CSV
+header is known even without transactions. Converters that return the CSV rows
+themselves (header row first) still work. A converter registered for a
+specific account type takes precedence over one registered for the whole bank
+(account_type None).
+
+Other packages can add converters through the 'bank_statement_converter.converters'
+entry point group, named either 'bank' or 'bank:account type', e.g. in setup.py:
+
+    entry_points={'bank_statement_converter.converters': [
+        'ing = bstc_ing.converter:extract_ing',
+    ]}
+"""
+
+ENTRY_POINT_GROUP = 'bank_statement_converter.converters'
+
+# Converters that ship with the package
+BUILTIN_CONVERTERS = {
+    ('anz', None): 'bank_statement_converter.anz_converter:extract_anz',
+    ('ben', None): 'bank_statement_converter.ben_converter:extract_ben',
+    ('cba', None): 'bank_statement_converter.cba_converter:extract_cba',
+    ('mqg', None): 'bank_statement_converter.mqg_converter:extract_mqg',
+    ('nab', None): 'bank_statement_converter.nab_converter:extract_nab',
+    ('wbc', None): 'bank_statement_converter.wbc_converter:extract_wbc',
+    ('zel', None): 'bank_statement_converter.zel_converter:extract_zel',
+}
+
+_converters = dict(BUILTIN_CONVERTERS)  # (bank, account_type) -> target, see _load()
+_loaded = {}                            # (bank, account_type) -> imported function
+_entry_points_read = False
+
+"""
+Register a converter for a bank, or for one account type of a bank.
+target is a 'module:function' string or the function itself.
+"""
+def register_converter(bank: str, target, account_type: str | None = None):
+    _converters[(bank, account_type)] = target
+    _loaded.pop((bank, account_type), None)
+
+"""Add converters from installed packages; they don't replace ones already registered"""
+def _read_entry_points():
+    global _entry_points_read
+    if _entry_points_read:
+        return
+    _entry_points_read = True
+    from importlib.metadata import entry_points
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        bank, _, account_type = ep.name.partition(':')
+        _converters.setdefault((bank.strip(), account_type.strip() or None), ep)
+
+def _load(target):
+    if isinstance(target, str):
+        module, _, name = target.partition(':')
+        return getattr(import_module(module), name)
+    if hasattr(target, 'load'):  # importlib.metadata.EntryPoint
+        return target.load()
+    return target
+
+"""
+Return the converter for a detected bank and account type, importing it on
+first use. Raises ValueError if there is none.
+"""
+def find_converter(bank: str, account_type: str | None = None):
+    _read_entry_points()
+    for key in ((bank, account_type), (bank, None)):
+        if key in _loaded:
+            return _loaded[key]
+        if key in _converters:
+            converter = _load(_converters[key])
+            _loaded[key] = converter
+            return converter
+    raise ValueError(f"No converter implemented for bank {bank!r}")
+
+"""Banks that have a converter registered"""
+def registered_banks() -> list:
+    _read_entry_points()
+    return sorted({bank for bank, _ in _converters})
+
+"""
+Convert an open statement of the given bank; returns its TransactionBatch
+objects. The converter's work for each one is timed as 'parse' (see profiling.py).
+"""
+def extract_transactions(statement, bank: str, account_type: str | None = None):
+    from .profiling import iter_spans
+    return iter_spans('parse', find_converter(bank, account_type)(statement, account_type))
+
+"""Convert an open statement of the given bank; yields the CSV rows (header first)"""
+def extract_rows(statement, bank: str, account_type: str | None = None):
+    from .transactions import csv_rows
+    return csv_rows(extract_transactions(statement, bank, account_type))
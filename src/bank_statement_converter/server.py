@@ -0,0 +1,360 @@
+import heapq
+import itertools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+"""
+`bstc serve`: a local HTTP conversion service, standard library only.
+
+    POST /jobs?priority=interactive|bulk[&wait=SECONDS][&format=json|csv|qif]
+         body: the PDF (e.g. curl --data-binary @statement.pdf)
+         -> 202 {"id": ..., "status": "queued", ...}; with wait, the result
+            once it's ready (or the status if it isn't by then)
+    GET  /jobs/<id>                       status of a job
+    GET  /jobs/<id>/result?format=json|csv|qif
+    GET  /metrics                         Prometheus text format
+    GET  /health
+
+Conversions run on a pool of worker processes started once, with PyMuPDF and
+every converter imported up front, so a request doesn't pay for that. The
+pool is only ever given as many jobs as it has workers; the rest wait in a
+bounded queue where interactive jobs go before bulk ones (first come, first
+served within a priority), so an upload from a user isn't stuck behind a
+batch of 300 page statements. When the queue is full, uploads are turned away
+with 503 rather than piling up.
+
+Finished jobs are kept (with their CSV, QIF and JSON) for `keep` seconds.
+"""
+
+PRIORITIES = {'interactive': 0, 'bulk': 1}
+CONTENT_TYPES = {'json': 'application/json', 'csv': 'text/csv; charset=utf-8', 'qif': 'application/qif'}
+
+
+"""Worker process initializer: import PyMuPDF and the converters before the first job"""
+def _warm_up():
+    from bank_statement_converter.registry import BUILTIN_CONVERTERS, find_converter
+    import fitz  # noqa: F401
+    for bank, account_type in BUILTIN_CONVERTERS:
+        find_converter(bank, account_type)
+
+"""Convert a PDF in a worker process; returns the bank, account type and the outputs as text"""
+def convert_upload(data: bytes) -> dict:
+    from bank_statement_converter.api import convert
+    result = convert(data)
+    return {
+        'bank': result.bank,
+        'account_type': result.account_type,
+        'transactions': len(result),
+        'csv': result.to_csv(),
+        'qif': result.to_qif(),
+        'json': result.to_json(),
+    }
+
+
+class Job:
+    __slots__ = ('id', 'priority', 'arrival', 'data', 'size', 'status', 'error', 'result', 'submitted', 'started', 'finished', 'done')
+
+    def __init__(self, data: bytes, priority: str):
+        self.id = uuid.uuid4().hex
+        self.priority = priority
+        self.arrival = None             # place in the queue, see ConversionService.submit()
+        self.data = data
+        self.size = len(data)
+        self.status = 'queued'          # queued, running, done or failed
+        self.error = None
+        self.result = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+    def as_dict(self) -> dict:
+        info = {
+            'id': self.id,
+            'status': self.status,
+            'priority': self.priority,
+            'size': self.size,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+        if self.result is not None:
+            info.update(bank=self.result['bank'], account_type=self.result['account_type'],
+                        transactions=self.result['transactions'])
+        if self.error is not None:
+            info['error'] = self.error
+        return info
+
+
+class ConversionService:
+    """The queue, the worker pool and the jobs, shared by the request threads"""
+    def __init__(self, workers: int = 1, max_queue: int = 100, keep: float = 3600.0, warm: bool = True):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.keep = keep
+        self._warm = warm
+        self._pool = self._new_pool()
+        self._cond = threading.Condition()
+        self._queue = []                # heap of (priority, arrival, job)
+        self._arrival = itertools.count()
+        self._jobs = {}                 # id -> Job, oldest first
+        self._running = 0
+        self._closed = False
+        # for /metrics
+        self.counts = {'submitted': 0, 'done': 0, 'failed': 0, 'rejected': 0}
+        self.seconds = {'waiting': 0.0, 'converting': 0.0}
+        self.started = time.time()
+        self._dispatcher = threading.Thread(target=self._dispatch, name="bstc-dispatch", daemon=True)
+        self._dispatcher.start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_up if self._warm else None)
+
+    def submit(self, data: bytes, priority: str = 'interactive') -> Job | None:
+        """Queue a PDF; returns its Job, or None if the queue is full"""
+        job = Job(data, priority)
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self.counts['rejected'] += 1
+                return None
+            self._forget_old()
+            self._jobs[job.id] = job
+            job.arrival = next(self._arrival)
+            heapq.heappush(self._queue, (PRIORITIES[priority], job.arrival, job))
+            self.counts['submitted'] += 1
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int | None:
+        """Number of queued jobs that go before this one, None if it isn't queued"""
+        with self._cond:
+            if job.status != 'queued':
+                return None
+            key = (PRIORITIES[job.priority], job.arrival)
+            return sum(1 for priority, arrival, _ in self._queue if (priority, arrival) < key)
+
+    def _dispatch(self):
+        # hand jobs to the pool one free worker at a time, so the priorities hold
+        while True:
+            with self._cond:
+                while not self._closed and (not self._queue or self._running >= self.workers):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                _, _, job = heapq.heappop(self._queue)
+                self._running += 1
+                job.status = 'running'
+                job.started = time.time()
+                self.seconds['waiting'] += job.started - job.submitted
+                pool = self._pool
+            try:
+                future = pool.submit(convert_upload, job.data)
+            except RuntimeError as e:
+                # BrokenProcessPool: a worker died (e.g. out of memory, or a crash in PyMuPDF on a
+                # hostile PDF) before its job reported it; the job goes back to its place in the
+                # queue for a new pool. When the service is stopping, the job fails.
+                with self._cond:
+                    if not self._closed:
+                        self._running -= 1
+                        job.status = 'queued'
+                        self.seconds['waiting'] -= job.started - job.submitted
+                        job.started = None
+                        heapq.heappush(self._queue, (PRIORITIES[job.priority], job.arrival, job))
+                        self._replace_pool(pool)
+                        continue
+                self._finish(job, error=e)
+                continue
+            future.add_done_callback(lambda f, job=job, pool=pool: self._finish(job, future=f, pool=pool))
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        # with self._cond held; the jobs that were running on a broken pool all report it
+        if broken is self._pool and not self._closed:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    def _finish(self, job: Job, future=None, error: BaseException | None = None, pool=None):
+        if future is not None:
+            error = RuntimeError("cancelled, the service is stopping") if future.cancelled() else future.exception()
+        with self._cond:
+            if isinstance(error, BrokenProcessPool):  # the worker converting this job died
+                self._replace_pool(pool)
+            self._running -= 1
+            job.finished = time.time()
+            job.data = None              # the PDF isn't needed any more
+            if error is None:
+                job.result = future.result()
+                job.status = 'done'
+                self.counts['done'] += 1
+            else:
+                job.error = str(error)
+                job.status = 'failed'
+                self.counts['failed'] += 1
+            self.seconds['converting'] += job.finished - job.started
+            self._cond.notify_all()
+        job.done.set()
+
+    def _forget_old(self):
+        # jobs are in submission order; drop finished ones older than keep
+        cutoff = time.time() - self.keep
+        old = []
+        for job_id, job in self._jobs.items():
+            if job.submitted >= cutoff:
+                break
+            if job.finished is not None:
+                old.append(job_id)
+        for job_id in old:
+            del self._jobs[job_id]
+
+    def metrics(self) -> str:
+        with self._cond:
+            queued = {name: 0 for name in PRIORITIES}
+            for _, _, job in self._queue:
+                queued[job.priority] += 1
+            lines = [
+                "# HELP bstc_jobs_total Conversion jobs by outcome",
+                "# TYPE bstc_jobs_total counter",
+            ]
+            lines += [f'bstc_jobs_total{{outcome="{name}"}} {count}' for name, count in self.counts.items()]
+            lines += ["# HELP bstc_queue_depth Jobs waiting for a worker",
+                      "# TYPE bstc_queue_depth gauge"]
+            lines += [f'bstc_queue_depth{{priority="{name}"}} {count}' for name, count in queued.items()]
+            lines += [
+                "# HELP bstc_workers_busy Workers converting a statement",
+                "# TYPE bstc_workers_busy gauge",
+                f"bstc_workers_busy {self._running}",
+                "# HELP bstc_workers Worker processes",
+                "# TYPE bstc_workers gauge",
+                f"bstc_workers {self.workers}",
+                "# HELP bstc_job_seconds_total Seconds jobs spent waiting in the queue and converting",
+                "# TYPE bstc_job_seconds_total counter",
+            ]
+            lines += [f'bstc_job_seconds_total{{phase="{name}"}} {seconds:.6f}' for name, seconds in self.seconds.items()]
+            lines += [
+                "# HELP bstc_uptime_seconds Seconds since the service started",
+                "# TYPE bstc_uptime_seconds gauge",
+                f"bstc_uptime_seconds {time.time() - self.started:.3f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "bstc"
+    service: ConversionService = None     # set by make_server()
+    max_upload = 50 * 1024 * 1024
+
+    def _send(self, status: int, body, content_type: str = 'application/json'):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body, indent=2) + "\n"
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status: int, message: str):
+        self._send(status, {'error': message})
+
+    def _status(self, job: Job) -> dict:
+        info = job.as_dict()
+        info['url'] = f"/jobs/{job.id}"
+        position = self.service.position(job)
+        if position is not None:
+            info['ahead'] = position
+        return info
+
+    def _result(self, job: Job, fmt: str):
+        if fmt not in CONTENT_TYPES:
+            return self._error(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(CONTENT_TYPES)}")
+        if job.status == 'failed':
+            return self._send(HTTPStatus.UNPROCESSABLE_ENTITY, self._status(job))
+        if job.status != 'done':
+            return self._send(HTTPStatus.ACCEPTED, self._status(job))
+        self._send(HTTPStatus.OK, job.result[fmt], CONTENT_TYPES[fmt])
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['health']:
+            return self._send(HTTPStatus.OK, {'status': 'ok'})
+        if parts == ['metrics']:
+            return self._send(HTTPStatus.OK, self.service.metrics(), 'text/plain; version=0.0.4')
+        if len(parts) in (2, 3) and parts[0] == 'jobs':
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._error(HTTPStatus.NOT_FOUND, "no such job")
+            if len(parts) == 2:
+                return self._send(HTTPStatus.OK, self._status(job))
+            if parts[2] == 'result':
+                return self._result(job, query.get('format', ['json'])[0])
+        self._error(HTTPStatus.NOT_FOUND, "not found")
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query, keep_blank_values=True)
+        if [part for part in url.path.split('/') if part] != ['jobs']:
+            return self._error(HTTPStatus.NOT_FOUND, "not found")
+        priority = query.get('priority', ['interactive'])[0]
+        if priority not in PRIORITIES:
+            return self._error(HTTPStatus.BAD_REQUEST, f"priority must be one of {', '.join(PRIORITIES)}")
+        try:
+            length = int(self.headers.get('Content-Length', ''))
+        except ValueError:
+            return self._error(HTTPStatus.LENGTH_REQUIRED, "Content-Length required")
+        if length < 0:
+            return self._error(HTTPStatus.BAD_REQUEST, "Content-Length can't be negative")
+        if length > self.max_upload:
+            self.close_connection = True  # the body isn't read
+            return self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"PDF larger than {self.max_upload} bytes")
+        data = self.rfile.read(length)
+        if not data.startswith(b'%PDF'):
+            return self._error(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "body is not a PDF")
+        wait = None
+        if 'wait' in query:
+            try:
+                wait = float(query['wait'][0] or 60)
+            except ValueError:
+                return self._error(HTTPStatus.BAD_REQUEST, "wait must be a number of seconds")
+        fmt = query.get('format', ['json'])[0]
+        if fmt not in CONTENT_TYPES:
+            return self._error(HTTPStatus.BAD_REQUEST, f"format must be one of {', '.join(CONTENT_TYPES)}")
+
+        job = self.service.submit(data, priority)
+        if job is None:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, "queue is full, try again later")
+        if wait is not None:
+            job.done.wait(wait)
+            if job.status in ('done', 'failed'):
+                return self._result(job, fmt)
+        self._send(HTTPStatus.ACCEPTED, self._status(job))
+
+    def log_message(self, format, *args):
+        pass  # no line per request on stderr
+
+
+"""The HTTP server for a ConversionService; serve_forever() it, then close the service"""
+def make_server(service: ConversionService, host: str = '127.0.0.1', port: int = 8765,
+                max_upload: int = 50 * 1024 * 1024) -> ThreadingHTTPServer:
+    handler = type('BoundHandler', (Handler,), {'service': service, 'max_upload': max_upload})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,109 @@
+import csv
+import os
+from .csv2qif import WRITE_BATCH, QifRecords
+from .profiling import span
+
+"""
+Streaming sinks for converted rows.
+
+Converters yield their rows (header row first) while they read the statement,
+and the rows are written out as they arrive instead of being collected into one
+list first, so memory stays flat however many pages a statement has.
+
+A sink has write(row), close() once every row was written, and abort() if the
+conversion failed part way. The balance checks of a converter only run after
+its last row, so output is written to a '.part' file next to the target and
+only moved into place by close(): a statement that fails its checks leaves no
+half written file behind, same as before rows were streamed.
+
+CsvSink writes the CSV and QifSink the QIF; fed the same rows, a statement is
+converted to both in one pass, and to QIF without a CSV in between.
+"""
+
+class _PartFile:
+    """Output file that is written as '<path>.part' and moved into place on close()"""
+    def __init__(self, path, newline=None):
+        self.path = os.fspath(path)
+        self.part_path = self.path + ".part"
+        self._file = open(self.part_path, "w", newline=newline)
+        self.rows = 0
+
+    def close(self):
+        self._file.close()
+        os.replace(self.part_path, self.path)
+
+    def abort(self):
+        self._file.close()
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvSink(_PartFile):
+    """Writes rows to a CSV file as they arrive"""
+    def __init__(self, path):
+        super().__init__(path, newline="")
+        self._writer = csv.writer(self._file)
+
+    def write(self, row):
+        self._writer.writerow(row)
+        self.rows += 1
+
+
+class QifSink(_PartFile):
+    """
+    Writes the QIF records of rows as they arrive: the same file csv_to_qif()
+    makes from the CSV of those rows, without writing and reading back the CSV
+    """
+    def __init__(self, path):
+        super().__init__(path)
+        self._file.write("!Type:Bank \n")
+        self._records = QifRecords()
+        self._batch = []
+
+    def write(self, row):
+        if not all(isinstance(cell, str) for cell in row):
+            row = ['' if cell is None else str(cell) for cell in row]  # as it reads back from a CSV
+        record = self._records(row)
+        if record:
+            self._batch.append(record)
+            if len(self._batch) == WRITE_BATCH:
+                self._file.write(''.join(self._batch))
+                self._batch.clear()
+        self.rows += 1
+
+    def close(self):
+        self._file.write(''.join(self._batch))
+        super().close()
+
+"""
+Feed every row to each of the sinks, then close them; if the rows raise (e.g.
+a balance check failed) every sink is aborted and the error re-raised.
+Returns the number of rows written, header included. Timed as 'export' (see
+profiling.py), less the converter's own time for making the rows.
+"""
+def write_rows(rows, sinks) -> int:
+    count = 0
+    with span('export'):
+        try:
+            for row in rows:
+                for sink in sinks:
+                    sink.write(row)
+                count += 1
+        except BaseException:
+            for sink in sinks:
+                sink.abort()
+            raise
+        for sink in sinks:
+            sink.close()
+    return count
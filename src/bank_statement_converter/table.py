@@ -0,0 +1,114 @@
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple
+from . import profiling
+from .utils import clean_up_values
+
+class PathBox(NamedTuple):
+    """Bounding box of a path of a page's line art, and whether the path is filled"""
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    fill: bool
+
+    @property
+    def width(self) -> float:
+        return max(0, self.x1 - self.x0)  # same as fitz.Rect
+
+    @property
+    def height(self) -> float:
+        return max(0, self.y1 - self.y0)
+
+class LineArt:
+    """
+    The line art of a page, reduced to what the table converters use to find
+    the rows and columns of a table: the bounding box of every path (shadings,
+    rules) and the y of the first point of every path item.
+
+    Made from page.get_cdrawings() in one go, so the drawings are read once per
+    page and without creating the fitz.Rect and fitz.Point objects of
+    page.get_drawings() for every path and item.
+    """
+    __slots__ = ('boxes', 'item_ys')
+
+    def __init__(self, page):
+        self.boxes = []
+        self.item_ys = []
+        for path in page.get_cdrawings():
+            x0, y0, x1, y1 = path['rect']
+            self.boxes.append(PathBox(x0, y0, x1, y1, bool(path.get('fill'))))
+            self.item_ys.extend(item[1][1] for item in path['items'])
+
+    def __bool__(self):
+        return bool(self.boxes)
+
+"""
+Sorted, de-duplicated table boundaries (x or y values) with values too close
+to the one before merged into it, see utils.clean_up_values
+"""
+def boundaries(values) -> list:
+    return clean_up_values(sorted(set(values)))
+
+"""
+Return the index range of the grid cells along one axis that overlap the
+interval (lo, hi). A cell k spans values[k]..values[k + 1] and overlaps when
+values[k] < hi and values[k + 1] > lo, the same test MuPDF uses for textboxes.
+"""
+def _span(values: list, lo: float, hi: float) -> range:
+    start = max(bisect_right(values, lo) - 1, 0)
+    stop = min(bisect_left(values, hi), len(values) - 1)
+    return range(start, stop)
+
+"""
+Extract the text of every cell of the table grid spanned by x_values and
+y_values (both sorted) in one pass over the page.
+
+cells[i][j] is exactly what
+    page.get_textbox(fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])).replace("\\n", " ").strip()
+returns, but the page text is only extracted once and each character is
+dropped into the cells its bounding box overlaps, instead of walking the
+whole page again for every cell.
+"""
+def extract_cells(page, x_values: list, y_values: list) -> list:
+    with profiling.span('text'):
+        return _extract_cells(page, x_values, y_values)
+
+def _extract_cells(page, x_values: list, y_values: list) -> list:
+    n_rows = len(y_values) - 1
+    n_cols = len(x_values) - 1
+    if n_rows < 1:
+        return []
+    if n_cols < 1:
+        return [[] for _ in range(n_rows)]
+
+    parts = [[[] for _ in range(n_cols)] for _ in range(n_rows)]
+    last_line = [[None] * n_cols for _ in range(n_rows)]  # line that last added text to a cell
+
+    line_no = 0
+    for block in page.get_textpage().extractRAWDICT()["blocks"]:
+        if block["type"] != 0:  # skip images
+            continue
+        for line in block["lines"]:
+            line_no += 1
+            for span in line["spans"]:
+                for char in span["chars"]:
+                    x0, y0, x1, y1 = char["bbox"]
+                    cols = _span(x_values, x0, x1)
+                    if not cols:
+                        continue
+                    c = char["c"]
+                    for i in _span(y_values, y0, y1):
+                        row_parts = parts[i]
+                        row_last = last_line[i]
+                        for j in cols:
+                            # Text from a new line of the page starts on a new line of the cell
+                            if row_last[j] != line_no:
+                                if row_last[j] is not None:
+                                    row_parts[j].append("\n")
+                                row_last[j] = line_no
+                            row_parts[j].append(c)
+
+    return [
+        ["".join(cell).replace("\n", " ").strip() for cell in row]
+        for row in parts
+    ]
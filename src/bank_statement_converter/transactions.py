@@ -0,0 +1,178 @@
+from array import array
+from datetime import date
+from .dates import parse_date
+from .money import parse_cents
+
+# Transactions per batch for converters that don't work page by page
+BATCH_SIZE = 500
+
+"""
+Typed transactions.
+
+A converter yields its transactions as TransactionBatch objects, one per page
+(or every few hundred transactions for the converters that read the statement
+as lines of text). A batch keeps the dates and amounts in arrays and only the
+descriptions as strings, so sums, date ranges and duplicate checks work on
+numbers without parsing the CSV text again.
+
+Each converter still writes the same CSV it always did: its RowLayout knows
+the column order and date format. Converters hand over the date and cents they
+parsed along with each row, so a row is only checked against the layout by its
+amount text; a row that doesn't fit the layout (a missing cell, an amount like
+'0.4') is kept as it was.
+"""
+
+class Transaction:
+    __slots__ = ('ordinal', 'cents', 'description', 'row')
+
+    def __init__(self, ordinal: int, cents: int, description: str, row: tuple | None = None):
+        self.ordinal = ordinal          # date.toordinal() of the transaction date
+        self.cents = cents              # amount in cents, negative for debits
+        self.description = description
+        self.row = row                  # the converter's own CSV row, if the layout can't reproduce it
+
+    @property
+    def date(self) -> date | None:
+        return date.fromordinal(self.ordinal) if self.ordinal else None  # 0: row without a date
+
+    def __eq__(self, other):
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return (self.ordinal, self.cents, self.description, self.row) == \
+               (other.ordinal, other.cents, other.description, other.row)
+
+    def __repr__(self):
+        if not self.ordinal:
+            return f"Transaction(row={self.row!r})"
+        return f"Transaction({self.date.isoformat()}, {self.cents}, {self.description!r})"
+
+"""
+Amount in cents as the converters write it, e.g. -123456 -> '-1234.56', or
+'-1,234.56' with thousands separators
+"""
+def format_cents(cents: int, thousands: bool = False) -> str:
+    whole, frac = divmod(abs(cents), 100)
+    sign = '-' if cents < 0 else ''
+    return f"{sign}{whole:,}.{frac:02d}" if thousands else f"{sign}{whole}.{frac:02d}"
+
+
+class RowLayout:
+    """The CSV columns of a converter and how it writes dates and amounts"""
+    __slots__ = ('header', 'date_format', 'thousands', '_date', '_amount', '_details')
+
+    def __init__(self, header: tuple, date_format: str = "%d/%m/%Y", thousands: bool = False):
+        self.header = tuple(header)
+        self.date_format = date_format
+        self.thousands = thousands
+        self._date = self.header.index('Date')
+        self._amount = self.header.index('Amount')
+        self._details = self.header.index('Transaction Details')
+
+    def render(self, ordinal: int, cents: int, description: str) -> list:
+        row = [None, None, None]
+        row[self._date] = date.fromordinal(ordinal).strftime(self.date_format)
+        row[self._amount] = format_cents(cents, self.thousands)
+        row[self._details] = description
+        return row
+
+    def parse(self, row) -> Transaction:
+        """Transaction for a row the converter made; keeps the row itself if render() can't reproduce it"""
+        row = list(row)
+        if len(row) == len(self.header) and all(isinstance(cell, str) for cell in row):
+            text = row[self._details]
+            day = parse_date(row[self._date], self.date_format)
+            try:
+                cents = parse_cents(row[self._amount])
+            except ValueError:
+                cents = None
+            if day is not None and cents is not None:
+                ordinal = day.toordinal()
+                if self.render(ordinal, cents, text) == row:
+                    return Transaction(ordinal, cents, text)
+                return Transaction(ordinal, cents, text, tuple(row))
+        return Transaction(0, 0, '', tuple(row))
+
+
+class TransactionBatch:
+    """
+    Columnar list of transactions: dates (as ordinals) and cents in arrays,
+    descriptions in a list, and the few rows the layout can't reproduce by index.
+    The last batch of a statement has its opening and closing balances (in
+    cents), where the statement gives them.
+    """
+    __slots__ = ('layout', 'ordinals', 'cents', 'descriptions', 'rows_kept', 'opening', 'closing')
+
+    def __init__(self, layout: RowLayout):
+        self.layout = layout
+        self.ordinals = array('l')
+        self.cents = array('q')
+        self.descriptions = []
+        self.rows_kept = {}
+        self.opening = None
+        self.closing = None
+
+    def __len__(self):
+        return len(self.descriptions)
+
+    def append(self, transaction: Transaction):
+        if transaction.row is not None:
+            self.rows_kept[len(self.descriptions)] = transaction.row
+        self.ordinals.append(transaction.ordinal)
+        self.cents.append(transaction.cents)
+        self.descriptions.append(transaction.description)
+
+    def append_row(self, row, ordinal: int | None = None, cents: int | None = None):
+        """
+        Add a CSV row as the converter made it. Converters pass the date (as an
+        ordinal, the row's date in the layout's format) and the cents they already
+        parsed, so the row isn't parsed again; it is only kept as text if its
+        amount isn't written the way the layout writes it. Rows without them go
+        through RowLayout.parse().
+        """
+        layout = self.layout
+        if not ordinal or cents is None or len(row) != len(layout.header):
+            self.append(layout.parse(row))
+            return
+        if row[layout._amount] != format_cents(cents, layout.thousands):
+            self.rows_kept[len(self.descriptions)] = tuple(row)
+        self.ordinals.append(ordinal)
+        self.cents.append(cents)
+        self.descriptions.append(row[layout._details])
+
+    def __getitem__(self, i: int) -> Transaction:
+        return Transaction(self.ordinals[i], self.cents[i], self.descriptions[i], self.rows_kept.get(i))
+
+    def __iter__(self):
+        for i in range(len(self.descriptions)):
+            yield self[i]
+
+    def rows(self):
+        """The CSV rows of the batch (no header), same as the converter made them"""
+        render = self.layout.render
+        kept = self.rows_kept
+        for i, (ordinal, cents, text) in enumerate(zip(self.ordinals, self.cents, self.descriptions)):
+            row = kept.get(i)
+            yield list(row) if row is not None else render(ordinal, cents, text)
+
+    def total(self) -> int:
+        """Sum of the amounts in cents, without the rows that have no date or amount"""
+        if not self.rows_kept:
+            return sum(self.cents)
+        return sum(cents for ordinal, cents in zip(self.ordinals, self.cents) if ordinal)
+
+"""
+CSV rows, header first, for the batches a converter yields. Converters always
+yield at least one batch (possibly empty), so the header is there even for a
+statement without transactions. Converters from other packages written before
+batches existed return the CSV rows themselves; those are passed through.
+"""
+def csv_rows(batches):
+    header = None
+    for batch in batches:
+        if not isinstance(batch, TransactionBatch):
+            yield batch
+            continue
+        if header is None:
+            header = list(batch.layout.header)
+            yield header
+        yield from batch.rows()
@@ -1,10 +1,9 @@
-import csv
-from datetime import datetime
 import os
 import pymupdf
 import fitz
-from dateutil import parser
 from pathlib import Path
+from .dates import parse_date, reformat_date
+from .sinks import CsvSink, write_rows
 
 # From https://stackoverflow.com/questions/72916381/read-specific-region-from-pdf
 # For visualizing the rects that PyMuPDF uses compared to what you see in the PDF
@@ -18,27 +17,14 @@ def vis_pdf(input_path):
     viz_name = os.path.join(head, "viz_" + tail)
     doc.save(viz_name)
     
-# Function to check whether line is a date using datetime
+# Function to check whether line is a date, same as datetime.strptime succeeding
 def is_datetime(line, date_format):
-    try:
-        datetime.strptime(line, date_format)
-        return True
-    except ValueError:
-        return False
+    return parse_date(line, date_format) is not None
 
-# Export data array from pdf to csv
+# Export rows from pdf to csv; data can be a list or a converter's generator,
+# rows are written as they come and the file only appears once all were written
 def export_to_csv(data, output_file):
-    with open(output_file, "w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerows(data)
-
-# To parse datetime
-def reformat_date(date: str, output_format: str = "%d/%m/%Y") -> str | None:
-    try:
-        dt = parser.parse(date, dayfirst=True) # AUS day is first in statements
-    except (ValueError, OverflowError):
-        return None
-    return dt.strftime(output_format)
+    write_rows(data, [CsvSink(output_file)])
 
 def csv_rename(pdf_path: str):
     return str(Path(pdf_path).with_suffix(".csv"))
@@ -56,11 +42,9 @@ def clean_up_values(values):
     Can be given a sorted list of floats. Will remove the larger one of any
     two in sequence if it is closer than 3 to its predecessor.
     """
-    for i in range(len(values) - 1, -1, -1):
-        if i == 0:  # reached start of list
-            continue
-        if values[i] - values[i - 1] <= 8:  # too close: remove larger one
-            values.pop(i)
+    # each value is compared to the one before it in the given list, so a run
+    # of close values keeps only its first; one pass instead of popping
+    values[1:] = [b for a, b in zip(values, values[1:]) if b - a > 8]  # too close: remove larger one
     return values
 
 """
@@ -68,7 +52,12 @@ Read original file and process page 0. If rotated, make an intermediate,
 unrotated page first to ease processing it
 """
 def check_page_rotation(pdf_path: str):
-    src = fitz.open(pdf_path)  # original file
+    return normalize_page_rotation(fitz.open(pdf_path))  # original file
+
+"""
+Same as check_page_rotation but for a document that is already open
+"""
+def normalize_page_rotation(src):
     spage = src[0]
     spage.clean_contents()  # make sure we have a clean PDF page source
     rotation = spage.rotation  # check page rotation
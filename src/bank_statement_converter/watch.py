@@ -0,0 +1,95 @@
+import os
+import time
+
+"""
+Finding the statements that arrive in an inbox folder, for `bstc watch`.
+
+The folder is polled (the standard library has no portable file system
+notifications, and polling one folder every second costs next to nothing).
+A poll only lists the folder when something happened: the folder's own mtime
+changes whenever a file is added, removed or renamed, so a quiet inbox is one
+os.stat() per poll, with a full listing every `rescan` seconds to also notice
+PDFs that are rewritten in place.
+
+A PDF is handed out once its size and mtime have stayed the same for `settle`
+seconds, so files still being copied or downloaded aren't converted half
+written, and again only when it changes. PDFs that were already converted
+when watching starts (a CSV or QIF next to them that is newer) are skipped.
+"""
+
+class FolderWatcher:
+    def __init__(self, folder, settle: float = 2.0, rescan: float = 10.0, skip_converted: bool = True,
+                 clock=time.monotonic):
+        self.folder = os.fspath(folder)
+        self.settle = settle
+        self.rescan = rescan
+        self._clock = clock
+        self._seen = {}           # path -> (size, mtime_ns) when it was handed out or skipped
+        self._pending = {}        # path -> ((size, mtime_ns), when that was first seen)
+        self._folder_mtime = None
+        self._last_scan = None
+        if skip_converted:
+            for path, signature in self._scan():
+                if _converted(path, signature):
+                    self._seen[path] = signature
+
+    def _scan(self):
+        """(path, (size, mtime_ns)) of every PDF in the folder (not in subfolders)"""
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.lower().endswith('.pdf'):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except FileNotFoundError:  # removed while listing
+                    continue
+                yield entry.path, (stat.st_size, stat.st_mtime_ns)
+
+    def poll(self) -> list:
+        """PDFs that are new or changed and have settled, oldest first"""
+        now = self._clock()
+        folder_mtime = os.stat(self.folder).st_mtime_ns
+        if (folder_mtime == self._folder_mtime and not self._pending
+                and self._last_scan is not None and now - self._last_scan < self.rescan):
+            return []
+        self._folder_mtime = folder_mtime
+        self._last_scan = now
+
+        ready = []
+        present = set()
+        for path, signature in self._scan():
+            present.add(path)
+            if self._seen.get(path) == signature:
+                continue
+            pending = self._pending.get(path)
+            if pending is None or pending[0] != signature:
+                self._pending[path] = (signature, now)  # new, or still being written
+            elif now - pending[1] >= self.settle and signature[0] > 0:
+                del self._pending[path]
+                self._seen[path] = signature
+                ready.append((signature[1], path))
+        for path in list(self._pending):
+            if path not in present:
+                del self._pending[path]
+        for path in list(self._seen):
+            if path not in present:
+                del self._seen[path]
+        return [path for _, path in sorted(ready)]
+
+    @property
+    def pending(self) -> int:
+        """Number of PDFs waiting to settle"""
+        return len(self._pending)
+
+"""Whether a PDF has a CSV or QIF next to it that was written after the PDF last changed"""
+def _converted(pdf_path: str, signature: tuple) -> bool:
+    stem = os.path.splitext(pdf_path)[0]
+    for output in (stem + ".csv", stem + ".qif"):
+        try:
+            if os.stat(output).st_mtime_ns >= signature[1]:
+                return True
+        except FileNotFoundError:
+            pass
+    return False
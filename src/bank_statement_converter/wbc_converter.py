@@ -1,16 +1,25 @@
 import fitz
 import pymupdf
 import os.path
-from .utils import export_to_csv, is_datetime, reformat_date, csv_rename, check_page_rotation, clean_up_values, remove_annots
+from .utils import export_to_csv, is_datetime, reformat_date, csv_rename
+from .document import open_statement
+from .table import extract_cells, boundaries
+from .events import emit
+from .dates import date_ordinal
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows, BATCH_SIZE
+
+# CSV columns and date/amount format of each statement type's output
+CSV_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
+SEARCH_LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'), thousands=True)
+RECENT_LAYOUT = RowLayout(('Date', 'Amount', 'Transaction Details'), thousands=True)
 
 """
 Checks in opening balance whether line is positive or negative and returns the amount
 """
 def get_amount(line: str):
-    if '+' in line:
-        return round(float(line.replace('+', '').replace(',', '').replace('$', '').strip()), 2)
-    elif '-' in line:
-        return -round(float(line.replace('-', '').replace(',', '').replace('$', '').strip()), 2)
+    if ('+' in line) or ('-' in line):
+        return parse_cents(line)
     else:
         return None
 
@@ -18,12 +27,11 @@ def get_amount(line: str):
 Get the opening and closing balances from the first page and prints them
 Returns the difference in balances to compare to running amount at the end
 """
-def diff_balances(doc):
+def diff_balances(statement):
     
     rect = fitz.Rect(0,10,600,350)
-    page = doc[0]
-    remove_annots(page)
-    text = page.get_text(clip=rect) + "\n"
+    page = statement.page(0)
+    text = statement.text(page, clip=rect) + "\n"
     lines = text.split('\n')
     
     running_balance = 0
@@ -45,150 +53,215 @@ def diff_balances(doc):
             balance_flag = True
         elif balance_flag == True:
             running_balance = get_amount(line)
-            print(f"Obtained opening balance: ${running_balance}")
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
             balance_flag = False
         elif line == 'Total Credits':
             credits_flag = True
         elif credits_flag == True:
             credits = get_amount(line)
-            print(f"Obtained total credits: ${credits}")
+            emit('balance', "Obtained total credits: ${cents!d}", name='credits', source='statement', cents=credits)
             credits_flag = False
         elif line == 'Total Debits':
             debits_flag = True
         elif debits_flag == True:
             debits = get_amount(line)
-            print(f"Obtained total debits: ${debits}")
+            emit('balance', "Obtained total debits: ${cents!d}", name='debits', source='statement', cents=debits)
             debits_flag = False
         elif line == 'Closing Balance':
             closing_flag = True
         elif closing_flag == True:
             closing_balance = get_amount(line)
-            print(f"Obtained closing balance: ${closing_balance}")
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
             closing_flag = False            
-            diff_amount = round(closing_balance - running_balance, 2)
-            print(f"Obtained difference between opening and closing balance: ${diff_amount}")
-            print(f"-------------------------------------------------")
+            diff_amount = closing_balance - running_balance
+            emit('balance', "Obtained difference between opening and closing balance: ${cents!d}", name='difference', source='statement', cents=diff_amount)
+            emit('section')
             break
     
-    return (round(credits, 2), round(debits, 2), diff_amount, running_balance, closing_balance)
+    return (credits, debits, diff_amount, running_balance, closing_balance)
 
 """
-Get the transactions for Westpac Business One Plus account Transaction Search
+Extract the text of the table cells of one page, or None if it has no table
 """
-def get_transactions_search(pdf_path: str):        
-    doc = check_page_rotation(pdf_path)
-    
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
-    running_amount = 0
-    t_line = 0
+def page_cells_search(statement, page):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+    # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
+    line_art = statement.line_art(page)  # extract page's line art
+    if not line_art:
+        return None
 
-    print(f"-------------------------------------------------")
-    print('WARNING: There are no balance checks for this converter. Please manually review the output(s).')
-    print(f"-------------------------------------------------")     
-              
-    for page in doc:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        if not page.get_drawings():
-            continue
-        
-        # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
-        paths = page.get_drawings()  # extract page's line art
+    # make list of row shading rectangles
+    # they must be large enough (width & height) and have a fill color
+    grids = [  # subselect shading rectangles
+        r for r in line_art.boxes if r.width > 80 and r.height > 20 and r.fill
+    ]
+    # the column coordinates are given ... by someone
+    x_values = set([40,105,215,365,410,500])
 
-        # make list of row shading rectangles
-        # they must be large enough (width & height) and have a fill color
-        grids = [  # subselect shading rectangles
-            p for p in paths if p["rect"].width > 80 and p["rect"].height > 20 and p["fill"]
-        ]
-        # the column coordinates are given ... by someone
-        x_values = set([40,105,215,365,410,500])
+    y_values = set()  # these need to be computed now
 
-        y_values = set()  # these need to be computed now
+    for r in grids:  # walk through shading rectangles
+        # and add their coordinates to what we have
+        x_values.add(round(r.x0))  # left of shading
+        x_values.add(round(r.x1))  # right of shading
+        y_values.add(r.y0 + 8)  # top of shading
+        y_values.add(r.y1 - 2)  # bottom of shading
 
-        for p in grids:  # walk through shading rectangles
-            # and add their coordinates to what we have
-            r = p["rect"]
-            x_values.add(round(r.x0))  # left of shading
-            x_values.add(round(r.x1))  # right of shading
-            y_values.add(r.y0 + 8)  # top of shading
-            y_values.add(r.y1 - 2)  # bottom of shading
+    # the page top and bottom needs to be added as y-coordinate as well
+    # top transaction otherwise will not be found if first transaction is not shaded
+    r = page.search_for("Copyright")[0]  # do not include footer line
+    y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
 
-        # the page top and bottom needs to be added as y-coordinate as well
-        # top transaction otherwise will not be found if first transaction is not shaded
-        r = page.search_for("Copyright")[0]  # do not include footer line
-        y_values.add(round(r.y0 - 5))  # add top of footer line as y-coord
-        
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        x_values = clean_up_values(x_values)
-        y_values = sorted(list(y_values))
-        y_values = clean_up_values(y_values)
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = boundaries(x_values)
+    y_values = boundaries(y_values)
 
-        cells = []  # will be container for table cells
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
 
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
+"""
+Get the transactions for Westpac Business One Plus account Transaction Search
+Yields the transactions as they are read, in a TransactionBatch per page
+"""
+def get_transactions_search(statement):
+    batch = TransactionBatch(SEARCH_LAYOUT)
+    n_rows = 0
+    running_amount = 0
+    t_line = 0
+
+    emit('section')
+    emit('warning', 'WARNING: There are no balance checks for this converter. Please manually review the output(s).')
+    emit('section')
+              
+    for _, cells in statement.map_pages(page_cells_search):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(SEARCH_LAYOUT)
+        
+        if cells is None:  # empty page, or no table on it
+            continue
 
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells[::2]): # Every even transaction from cells correspond to statement
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if is_datetime(text, "%d %b %Y"):
-                        comb_data[t_line+1].append(reformat_date(text))
+                        ordinal = date_ordinal(text)
+                        row_data.append(reformat_date(text))
                         continue
                     else:
                         break
                 if j == 2:
-                    comb_data[t_line+1].append(text)
+                    row_data.append(text)
                     continue
                 if j == 3:
                     if '-' in text:
                         dollar_idx = text.index("$")
                         amount_str = str(text[dollar_idx:].replace('$', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_amount -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_amount += cents
                         break
                     continue
                 if j == 4:
                     if text:
                         dollar_idx = text.index("$")
                         amount_str = str(text[dollar_idx:].replace('$', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_amount += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_amount += cents
                         break
                     break
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
             t_line += 1
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
+    
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
         
-    print(f"Running balance: {round(running_amount, 2)}")
-    print(f"-------------------------------------------------")
+    emit('balance', "Running balance: {cents!d}", name='running', source='calculated', cents=running_amount)
+    emit('section')
+
+# page_cells_acc() for a page without the table header: the transactions have ended
+NO_HEADER = 'no header'
+
+"""
+Extract the text of the table cells of one page, None if it has no table, or
+NO_HEADER. The first page with a table (first_table) has its footer elsewhere.
+"""
+def page_cells_acc(statement, page, first_table: bool):
+    # To skip empty pages
+    if not statement.text(page):
+        return None
+    # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
+    line_art = statement.line_art(page)  # extract page's line art
+    if not line_art:
+        return None
+
+    # make list of row shading rectangles
+    # they must be large enough (width & height) and have a fill color
+    grids = [  # subselect shading rectangles
+        r for r in line_art.boxes if r.width > 80 and r.height > 10 and r.fill
+    ]
+
+    # Set the x_coords
+    x_values = set([60,110,325,410,480,560])
+
+    y_values = set()  # these need to be computed now
 
-    return comb_data_clean
+    for r in grids:  # walk through shading rectangles
+        # and add their coordinates to what we have
+        y_values.add(r.y0 + 2)  # top of shading
+        y_values.add(r.y1 - 2)  # bottom of shading
+
+    # the page top and bottom needs to be added as y-coordinate as well
+    # top transaction otherwise will not be found if first transaction is not shaded
+    try:
+        if first_table:
+            r = page.search_for("CLOSING BALANCE", clip=fitz.INFINITE_RECT())[1]  # Find footer line (Use second in list as search_for is not case sensitive)
+        else:
+            r = page.search_for("CLOSING BALANCE", clip=fitz.INFINITE_RECT())[0]
+        y_values.add(r.y0 - 1) # add top of footer line
+        y_values.add(r.y1 + 2)# add bottom of footer line as y-coord
+    except:
+        y_values.add(760) # Add line just above "Statement No." at the bottom of the page just in case no CLOSING BALANCE        
+
+    try:
+        r2 = page.search_for("TRANSACTION DESCRIPTION")[0]
+        y_values.add(r2.y1)  # add bot of header line as y-coord
+    except:
+        return NO_HEADER
+
+    # x- and y-coordinates are now extracted, do further clean-up
+    x_values = sorted(list(x_values))
+    y_values = sorted(list(y_values))
+    y_values = [i for i in y_values if i > (r2.y0)]
+
+    # Extract the text of all table cells in one pass over the page.
+    # The cells of each row form a sublist.
+    # So each table cell can be addressed as "cells[i][j]" via its row / col.
+    return extract_cells(page, x_values, y_values)
 
 """
 Get the transactions for Westpac Business One account electronic statement
+Yields the transactions as they are read, in a TransactionBatch per page
 """
-def get_transactions_acc(pdf_path: str):
-    doc = check_page_rotation(pdf_path)
-    
-    amnt_checks = diff_balances(doc)
+def get_transactions_acc(statement):
+    amnt_checks = diff_balances(statement)
     init_credits, init_debits = amnt_checks[0], amnt_checks[1]
     diff_amount, running_balance, closing_balance = amnt_checks[2], amnt_checks[3], amnt_checks[4]
     
-    comb_data = [['Date', 'Transaction Details', 'Amount']]
+    batch = TransactionBatch(CSV_LAYOUT)
+    n_rows = 0
     t_line = 0
     tot_credit = 0
     tot_debit = 0
@@ -198,113 +271,71 @@ def get_transactions_acc(pdf_path: str):
     # To check page number for "CLOSING BALANCE"  
     page_no = 0 
               
-    for page in doc:
-        remove_annots(page)
-        # To skip empty pages
-        if not page.get_text():
-            continue
-        if not page.get_drawings():
-            continue
+    for number, cells in statement.map_pages(page_cells_acc, False):
+        # hand over the transactions of the previous page
+        if batch:
+            yield batch
+            batch = TransactionBatch(CSV_LAYOUT)
         
-        # ADAPTED FROM: https://github.com/pymupdf/PyMuPDF/discussions/1842
-        paths = page.get_drawings()  # extract page's line art
-
-        # make list of row shading rectangles
-        # they must be large enough (width & height) and have a fill color
-        grids = [  # subselect shading rectangles
-            p for p in paths if p["rect"].width > 80 and p["rect"].height > 10 and p["fill"]
-        ]
-        
-        # Set the x_coords
-        x_values = set([60,110,325,410,480,560])
-
-        y_values = set()  # these need to be computed now
-
-        for p in grids:  # walk through shading rectangles
-            # and add their coordinates to what we have
-            r = p["rect"]
-            y_values.add(r.y0 + 2)  # top of shading
-            y_values.add(r.y1 - 2)  # bottom of shading
-            
-        # the page top and bottom needs to be added as y-coordinate as well
-        # top transaction otherwise will not be found if first transaction is not shaded
-        try:
-            if page_no == 0:
-                r = page.search_for("CLOSING BALANCE", clip=fitz.INFINITE_RECT())[1]  # Find footer line (Use second in list as search_for is not case sensitive)
-            else:
-                r = page.search_for("CLOSING BALANCE", clip=fitz.INFINITE_RECT())[0]
-            y_values.add(r.y0 - 1) # add top of footer line
-            y_values.add(r.y1 + 2)# add bottom of footer line as y-coord
-        except:
-            y_values.add(760) # Add line just above "Statement No." at the bottom of the page just in case no CLOSING BALANCE        
+        if cells is None:  # empty page, or no table on it
+            continue
+        if page_no == 0:
+            # only known now that this is the first page with a table
+            cells = page_cells_acc(statement, statement.page(number), True)
         page_no += 1
-        
-        try:
-            r2 = page.search_for("TRANSACTION DESCRIPTION")[0]
-            y_values.add(r2.y1)  # add bot of header line as y-coord
-        except:
+        if cells == NO_HEADER:
             break
 
-        # x- and y-coordinates are now extracted, do further clean-up
-        x_values = sorted(list(x_values))
-        y_values = sorted(list(y_values))
-        y_values = [i for i in y_values if i > (r2.y0)]
-
-        cells = []  # will be container for table cells
-
-        # Create all table cells as PyMuPDF rectangles.
-        # The cells of each row form a sublist.
-        # So each table cell can be addressed as "cells[i][j]" via its row / col.
-        for i in range(len(y_values) - 1):
-            row = []
-            for j in range(len(x_values) - 1):
-                cell = fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])
-                row.append(cell)
-            cells.append(row)
-
-        # Now extract the text of each of the cells
+        # Now go through the text of each of the cells
         for i, row in enumerate(cells):
-            comb_data.append([])
-            for j, cell in enumerate(row):  # extract text of each table cell
-                text = page.get_textbox(cell).replace("\n", " ").strip()
+            row_data = []
+            ordinal = cents = None  # date and amount of the row, as parsed
+            for j, text in enumerate(row):  # text of each table cell
                 if j == 0:
                     if not text:
                         break
                     elif is_datetime(text, "%d/%m/%y"):
-                        comb_data[t_line+1].append(reformat_date(text))
+                        ordinal = date_ordinal(text)
+                        row_data.append(reformat_date(text))
                     else:
                         break
                 elif j == 1:
                     if text == 'STATEMENT OPENING BALANCE':
-                        comb_data[t_line+1].pop()
+                        row_data.pop()
                         break
                     elif text == 'CLOSING BALANCE':
-                        comb_data[t_line+1].pop()
+                        row_data.pop()
                         closing_flag = True
                         break
-                    comb_data[t_line+1].append(text)
+                    row_data.append(text)
                 elif j == 2:
                     if text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append('-' + amount_str)
-                        running_balance -= float(amount_str)
-                        tot_running -= float(amount_str)
-                        tot_debit -= float(amount_str)
+                        row_data.append('-' + amount_str)
+                        cents = -parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_debit += cents
                 elif j == 3:
                     if text:
                         amount_str = str(text.replace(',', '').strip())
-                        comb_data[t_line+1].append(amount_str)
-                        running_balance += float(amount_str)
-                        tot_running += float(amount_str)
-                        tot_credit += float(amount_str)
+                        row_data.append(amount_str)
+                        cents = parse_cents(amount_str)
+                        running_balance += cents
+                        tot_running += cents
+                        tot_credit += cents
                 elif j == 4:
-                    given_balance = round(float(text.replace(',', '').strip()), 2)
-                    if round(running_balance, 2) == given_balance:
+                    given_balance = parse_cents(text)
+                    if running_balance == given_balance:
                         continue
                     else:
-                        raise (ValueError(f"Running balance and given balance do not match: {running_balance}, {given_balance} \n \
+                        raise (ValueError(f"Running balance and given balance do not match: {dollars(running_balance)}, {dollars(given_balance)} \n \
                                     Find at row: {i}"))
             
+            if row_data:
+                n_rows += 1
+                batch.append_row(row_data, ordinal, cents)
+
             if closing_flag:
                 break
             
@@ -313,50 +344,47 @@ def get_transactions_acc(pdf_path: str):
         if closing_flag:
             break
             
-    comb_data_clean = [x for x in comb_data if x != []]
-    print(f"Number of transactions: {len(comb_data_clean) - 1}")
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated closing balance: ${round(running_balance, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    batch.opening, batch.closing = amnt_checks[3], amnt_checks[4]  # balances as the statement gives them
+    yield batch  # the last page's, possibly empty: converters yield at least one batch
+    
+    emit('count', "Number of transactions: {transactions}", transactions=n_rows)
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated closing balance: ${cents!d}", name='closing', source='calculated', cents=running_balance)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
             
-    if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits) and \
-        (round(running_balance, 2) == round(closing_balance, 2)):
-        print('Running balance, closing balance and difference between total credits and total debits same.')
-        print(f"-------------------------------------------------")
+    if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits) and \
+        (running_balance == closing_balance):
+        emit('check', 'Running balance, closing balance and difference between total credits and total debits same.')
+        emit('section')
     else:
-        raise (ValueError(f"Running balance and difference between total credits and total debits do not match: {running_balance}, {diff_amount}"))
-
-    return comb_data_clean       
+        raise (ValueError(f"Running balance and difference between total credits and total debits do not match: {dollars(running_balance)}, {dollars(diff_amount)}"))
             
 """
 Get the transactions for Westpac Business One Plus statement of recent transactions
+Yields the transactions as they are read, in TransactionBatch objects
 """
-def get_transactions_recent(pdf_path: str):
-    doc = check_page_rotation(pdf_path)    
-    
-    text = ''
-    
-    for page_number in range(doc.page_count):
-        page = doc[page_number]
-        remove_annots(page)
-        text += page.get_text() + "\n"
-        
-    lines = text.split('\n')        
+def get_transactions_recent(statement):
+    # lines of every page, one page at a time
+    lines = (line for page in statement.pages() for line in statement.text(page).split('\n'))
     
     # Date format of pdf, and what is needed for QIF format
     date_format = "%d %b %Y"
     date_flag = False
-    dates = []
+    date = ''
+    ordinal = None
+    n_dates = 0
     
     transaction = ''
-    transactions = []
+    n_transactions = 0
     
-    amounts = []
+    n_amounts = 0
 
-    print(f"-------------------------------------------------")
-    print('WARNING: There are no balance checks for this converter. Please manually review the output(s).')
-    print(f"-------------------------------------------------")
+    emit('section')
+    emit('warning', 'WARNING: There are no balance checks for this converter. Please manually review the output(s).')
+    emit('section')
+
+    batch = TransactionBatch(RECENT_LAYOUT)
 
     for line in lines:
         if not line.strip():
@@ -364,7 +392,9 @@ def get_transactions_recent(pdf_path: str):
         
         # Checks whether line is a date using datetime function; also adds start of transaction name
         elif is_datetime(line, date_format) and (not date_flag):
-            dates.append(reformat_date(line))
+            date = reformat_date(line)
+            ordinal = date_ordinal(line)
+            n_dates += 1
             date_flag = True
         
         # Test for date flag first; if not find, skip
@@ -373,8 +403,17 @@ def get_transactions_recent(pdf_path: str):
         
         # Test for transaction amounts
         elif (line[0] == '$') or (line[1] == '$'):
-            amounts.append(str(line.replace('$', '').strip()))
-            transactions.append(transaction.strip())
+            n_amounts += 1
+            n_transactions += 1
+            amount = str(line.replace('$', '').strip())
+            try:
+                cents = parse_cents(amount)
+            except ValueError:
+                cents = None  # the row is kept as it is
+            batch.append_row([date, amount, transaction.strip()], ordinal, cents)
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = TransactionBatch(RECENT_LAYOUT)
             date_flag = False
             transaction = ''
         
@@ -382,29 +421,33 @@ def get_transactions_recent(pdf_path: str):
         else:
             transaction = transaction + ' ' + line.strip()
 
-    if (len(dates) == len(transactions)) and (len(transactions) == len(amounts)):
-        print(f"Number of transactions match: {len(dates)}")
+    yield batch  # the rest, possibly empty: converters yield at least one batch
+    
+    if (n_dates == n_transactions) and (n_transactions == n_amounts):
+        emit('count', "Number of transactions match: {transactions}", transactions=n_dates)
     else:
-        raise (ValueError(f"Length of transactions does not match: \n Dates: {len(dates)} \n \
-                            Transactions: {len(transactions)} \n Amounts: {len(amounts)}"))
-        
-    # Combine the data into a single array so it is easier to convert to csv
-    print(f"-------------------------------------------------")
-    comb_data = [['Date', 'Amount', 'Transaction Details']]
-    for i in range(len(dates)):
-        comb_data.append([dates[i], amounts[i], transactions[i]])
-
-    return comb_data
+        raise (ValueError(f"Length of transactions does not match: \n Dates: {n_dates} \n \
+                            Transactions: {n_transactions} \n Amounts: {n_amounts}"))
+    emit('section')
             
-def convert_wbc(pdf_path: str, account_type: str):
+"""
+Get the transactions of a Westpac statement depending on statement type
+"""
+def extract_wbc(statement, account_type: str):
     if account_type == 'Transaction Search':
-        data = get_transactions_search(pdf_path)
+        return get_transactions_search(statement)
     elif account_type == 'Electronic Statement':
-        data = get_transactions_acc(pdf_path)
+        return get_transactions_acc(statement)
     elif account_type == 'Statement of recent transactions':
-        data = get_transactions_recent(pdf_path)
+        return get_transactions_recent(statement)
     elif account_type == 'Transactions report':
-        data = get_transactions_recent(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+        return get_transactions_recent(statement)
+    raise ValueError(f"No Westpac converter implemented for account type {account_type!r}")
+
+def convert_wbc(pdf_path, account_type: str):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(extract_wbc(statement, account_type)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
@@ -1,42 +1,48 @@
 import os.path
 import fitz
 import pymupdf
-from datetime import datetime
-from .utils import is_datetime, export_to_csv, csv_rename, remove_annots
+from .utils import is_datetime, export_to_csv, csv_rename
+from .dates import parse_date
+from .events import emit
+from .money import parse_cents, dollars
+from .transactions import RowLayout, TransactionBatch, csv_rows, BATCH_SIZE
+from .document import open_statement
 
-# Function to extract text from a rectangular area on a PDF page
-def text_from_area(pdf_path: str):
-    doc = fitz.open(pdf_path)
-    
-    text = ''
+# CSV columns and date format of this converter's output
+CSV_LAYOUT = RowLayout(('Date', 'Amount', 'Transaction Details'), date_format="%d-%b-%y")
+
+# Function to extract the lines of text from a rectangular area on each PDF page,
+# one page at a time
+def lines_from_area(statement):
     rect = fitz.Rect(0,0,600,800)
     
-    for page_number in range(doc.page_count):
-        page = doc[page_number]
-        remove_annots(page)
-        text += page.get_text(clip=rect) + "\n"
-        
-    return text
+    for page in statement.pages(raw=True):
+        yield from statement.text(page, clip=rect).split('\n')
     
-def get_transactions(pdf_path: str):
-    text = text_from_area(pdf_path)
-    lines = text.split('\n')
+"""
+Yield the transactions in TransactionBatch objects as they are read.
+Raises ValueError after the last row if the balances don't add up.
+"""
+def get_transactions(statement):
+    lines = lines_from_area(statement)
     
     # Date format of pdf, and what is needed for QIF format
     date_format = "%d %b %Y"
     new_datef = "%d-%b-%y"
     date_flag = False
-    dates = []
+    date = ''
+    day = None
+    n_dates = 0
     year = ''
     year_flag = False
     first_year_flag = True
     
     transaction = ''
-    transactions = []
+    n_transactions = 0
     
-    amounts = []
+    n_amounts = 0
     
-    running_balance = 0
+    running_balance = opening_balance = 0
     balance_flag = False
     closing_balance = 0
     closing_flag = False
@@ -50,6 +56,8 @@ def get_transactions(pdf_path: str):
     tot_debit = 0
     tot_running = 0
     
+    batch = TransactionBatch(CSV_LAYOUT)
+    
     for line in lines:
         if not line.strip():
             continue
@@ -66,49 +74,56 @@ def get_transactions(pdf_path: str):
         elif line == 'Opening Balance':
             balance_flag = True
         elif balance_flag == True:
-            running_balance = round(float(line[1:-2].replace(',', '').strip()), 2)
-            print(f"Obtained opening balance: ${running_balance}")
+            running_balance = opening_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained opening balance: ${cents!d}", name='opening', source='statement', cents=running_balance)
             balance_flag = False
         
         elif line == 'Closing Balance':
             closing_flag = True
         elif closing_flag == True:
-            closing_balance = round(float(line[1:-2].replace(',', '').strip()), 2)
-            print(f"Obtained closing balance: ${closing_balance}")
+            closing_balance = parse_cents(line) # negative if 'DR'
+            emit('balance', "Obtained closing balance: ${cents!d}", name='closing', source='statement', cents=closing_balance)
             closing_flag = False
         
         elif line == 'Total Credit':
             credits_flag = True
         elif credits_flag == True:
-            init_credits = round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total credits: ${init_credits}")
+            init_credits = parse_cents(line[1:])
+            emit('balance', "Obtained total credits: ${cents!d}", name='credits', source='statement', cents=init_credits)
             credits_flag = False
             
         elif line == 'Total Debit':
             debits_flag = True
         elif debits_flag == True:
-            init_debits = -round(float(line[1:].replace(',', '').strip()), 2)
-            print(f"Obtained total debits: ${init_debits}")
-            print(f"-------------------------------------------------")
-            diff_amount = round(init_debits + init_credits, 2)
+            init_debits = -parse_cents(line[1:])
+            emit('balance', "Obtained total debits: ${cents!d}", name='debits', source='statement', cents=init_debits)
+            emit('section')
+            diff_amount = init_debits + init_credits
             debits_flag = False
             
         # To get transaction names
         elif (line[0] == '$' or line[1] == '$') and date_flag == True:
             if line[0] == '$':
                 amount = line[1:].replace(',', '').strip()
-                running_balance += float(amount)
-                tot_credit += float(amount)
-                tot_running += float(amount)
-                amounts.append(str(amount))
+                cents = parse_cents(amount)
+                running_balance += cents
+                tot_credit += cents
+                tot_running += cents
+                amount = str(amount)
             elif line[1] == '$':
                 amount = line[2:].replace(',', '').strip()
-                running_balance -= float(amount)
-                tot_debit -= float(amount)
-                tot_running -= float(amount)
-                amounts.append('-' + str(amount))
+                cents = -parse_cents(amount)
+                running_balance += cents
+                tot_debit += cents
+                tot_running += cents
+                amount = '-' + str(amount)
+            n_amounts += 1
 
-            transactions.append(transaction.strip())
+            n_transactions += 1
+            batch.append_row([date, amount, transaction.strip()], day.toordinal(), cents)
+            if len(batch) == BATCH_SIZE:
+                yield batch
+                batch = TransactionBatch(CSV_LAYOUT)
             date_flag = False
             transaction = ''
         
@@ -132,38 +147,48 @@ def get_transactions(pdf_path: str):
                     
         # Checks whether line is a date using datetime function; also adds start of transaction name
         elif is_datetime(str(line[:6] + " " + year), date_format):
-            dates.append((datetime.strptime((line[:6] + " " + year), date_format).strftime(new_datef)))
+            day = parse_date(line[:6] + " " + year, date_format)
+            date = day.strftime(new_datef)
+            n_dates += 1
             date_flag = True
     
-    print(f"Calculated total credits: ${round(tot_credit, 2)}")
-    print(f"Calculated total debits: ${round(tot_debit, 2)}")
-    print(f"Calculated difference between opening and closing balance: ${round(tot_running, 2)}")
+    batch.opening, batch.closing = opening_balance, closing_balance  # balances as the statement gives them
+    yield batch  # the rest, possibly empty: converters yield at least one batch
     
-    if (round(tot_running, 2) == diff_amount) and (round(tot_credit, 2) == init_credits) and (round(tot_debit, 2) == init_debits):
-        print('Running amount and difference between total credits and total debits same.')
+    emit('balance', "Calculated total credits: ${cents!d}", name='credits', source='calculated', cents=tot_credit)
+    emit('balance', "Calculated total debits: ${cents!d}", name='debits', source='calculated', cents=tot_debit)
+    emit('balance', "Calculated difference between opening and closing balance: ${cents!d}", name='difference', source='calculated', cents=tot_running)
+    
+    if (tot_running == diff_amount) and (tot_credit == init_credits) and (tot_debit == init_debits):
+        emit('check', 'Running amount and difference between total credits and total debits same.')
     else:
-        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {tot_running}, {diff_amount}"))
+        raise (ValueError(f"Running amount and difference between total credits and total debits do not match: {dollars(tot_running)}, {dollars(diff_amount)}"))
     
-    if (len(dates) == len(transactions)) and (len(transactions) == len(amounts)):
-        print(f"Number of transactions match: {len(dates)}")
+    if (n_dates == n_transactions) and (n_transactions == n_amounts):
+        emit('count', "Number of transactions match: {transactions}", transactions=n_dates)
     else:
-        raise (ValueError(f"Length of transactions does not match: \n Dates: {len(dates)} \n \
-                            Transactions: {len(transactions)} \n Amounts: {len(amounts)}"))
+        raise (ValueError(f"Length of transactions does not match: \n Dates: {n_dates} \n \
+                            Transactions: {n_transactions} \n Amounts: {n_amounts}"))
         
-    # Combine the data into a single array so it is easier to convert to csv
-    if round(running_balance, 2) == round(closing_balance, 2):
-        print('Running balance and closing balance match.')
-        print(f"-------------------------------------------------")
-        comb_data = [['Date', 'Amount', 'Transaction Details']]
-        for i in range(len(dates)):
-            comb_data.append([dates[i], amounts[i], transactions[i]])
+    # The rows were already yielded; check them now that the closing balance is known
+    if running_balance == closing_balance:
+        emit('check', 'Running balance and closing balance match.')
+        emit('section')
     else:
-        raise (ValueError(f"Running balance and closing balance do not match: {running_balance}, {closing_balance}"))
-
-    return comb_data
+        raise (ValueError(f"Running balance and closing balance do not match: {dollars(running_balance)}, {dollars(closing_balance)}"))
         
-def convert_zel(pdf_path: str):
-    data = get_transactions(pdf_path)
-    csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
-    export_to_csv(data, (os.path.dirname(pdf_path) + '/' + csv_name))
+"""
+Get the transactions as TransactionBatch objects, yielded as they are read.
+account_type is only there to match the other converters, this bank has one
+statement type
+"""
+def extract_zel(statement, account_type: str | None = None):
+    return get_transactions(statement)
+
+def convert_zel(pdf_path):
+    with open_statement(pdf_path) as statement:
+        pdf_path = statement.path
+        csv_name = (os.path.splitext(os.path.basename(pdf_path))[0] + '.csv')
+        # rows are written as they are read, so the statement stays open until done
+        export_to_csv(csv_rows(get_transactions(statement)), (os.path.dirname(pdf_path) + '/' + csv_name))
     return csv_rename(pdf_path)
\ No newline at end of file
@@ -1,3 +1,5 @@
+import multiprocessing
 from bank_statement_converter.gui import main
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    multiprocessing.freeze_support()  # before anything else in a worker process of the frozen exe
+    main()
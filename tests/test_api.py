@@ -0,0 +1,69 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+import synthetic  # noqa: E402
+
+from bank_statement_converter import StatementResult, convert, csv_to_qif  # noqa: E402
+from bank_statement_converter.utils import export_to_csv  # noqa: E402
+
+# layouts whose statements give both balances
+BALANCES = ['anz', 'ben', 'cba', 'mqg', 'nab_acc', 'nab_everyday', 'wbc_acc', 'zel']
+
+
+@pytest.fixture(scope="module")
+def statement(tmp_path_factory):
+    pdf_path, count = synthetic.make_statement('nab_acc', tmp_path_factory.mktemp("api") / "nab.pdf", pages=2)
+    return pdf_path, count
+
+
+def test_convert_path_bytes_and_file(statement):
+    pdf_path, count = statement
+    data = Path(pdf_path).read_bytes()
+    results = [convert(str(pdf_path)), convert(data), convert(io.BytesIO(data))]
+    for result in results:
+        assert isinstance(result, StatementResult)
+        assert (result.bank, len(result)) == ('nab', count)
+    assert results[0].to_csv() == results[1].to_csv() == results[2].to_csv()
+
+
+def test_outputs_match_the_files(tmp_path, statement):
+    pdf_path, _ = statement
+    result = convert(Path(pdf_path).read_bytes())
+    csv_path = tmp_path / "nab.csv"
+    export_to_csv(result.rows(), str(csv_path))
+    assert result.to_csv().encode() == csv_path.read_bytes()
+    assert result.to_qif() == Path(csv_to_qif(str(csv_path))).read_text()
+
+    result.to_qif(tmp_path / "out.qif")
+    assert (tmp_path / "out.qif").read_text() == result.to_qif()
+
+    data = json.loads(result.to_json())
+    assert data['bank'] == 'nab'
+    assert len(data['transactions']) == len(result)
+    first = next(iter(result))
+    assert data['transactions'][0]['date'] == first.date.isoformat()
+
+
+@pytest.mark.parametrize("layout", BALANCES)
+def test_balances(tmp_path, layout):
+    pdf_path, count = synthetic.make_statement(layout, tmp_path / f"{layout}.pdf", count=30, seed=3)
+    ledger = synthetic.Ledger(count, seed=3)
+    result = convert(str(pdf_path))
+    assert (result.opening, result.closing) == (ledger.opening, ledger.closing)
+    assert result.total == ledger.closing - ledger.opening
+    assert (result.credits, result.debits) == (ledger.credits, -ledger.debits)
+
+
+def test_undetectable_pdf():
+    import fitz
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), "Not a bank statement")
+    with pytest.raises(ValueError, match="Could not detect bank"):
+        convert(doc.tobytes())
@@ -0,0 +1,133 @@
+import random
+import subprocess
+
+import fitz
+import pytest
+
+from bank_statement_converter.bank_detector import (
+    BANK_KEYWORDS, AmbiguousBankError, best_match, detect_bank, extract_first_page_text, find_keywords,
+    rank_banks, rank_text,
+)
+
+NAB = BANK_KEYWORDS['nab'][0]
+ZEL = BANK_KEYWORDS['zel'][0]
+WBC = BANK_KEYWORDS['wbc'][0]
+
+
+def first_match(text):
+    """The detector before ranking: the first bank (and type) in BANK_KEYWORDS order"""
+    for bank_key, phrases in BANK_KEYWORDS.items():
+        if phrases[0] not in text:
+            continue
+        for phrase in phrases[1:]:
+            if phrase in text:
+                return [bank_key, phrase]
+    return None
+
+
+def detect_text(text):
+    best = best_match(rank_text(text))
+    return None if best is None else [best.bank, best.account_type]
+
+
+def test_find_keywords_matches_substring_search():
+    rng = random.Random(9)
+    keywords = sorted({p for phrases in BANK_KEYWORDS.values() for p in phrases})
+    for _ in range(200):
+        parts = rng.sample(keywords, rng.randint(0, 5)) + ["Opening balance", "01 Jan 2024", " "]
+        rng.shuffle(parts)
+        text = "\n".join(parts) * rng.randint(1, 2)
+        found = find_keywords(text)
+        for keyword in keywords:
+            starts = [i for i in range(len(text)) if text.startswith(keyword, i)]
+            assert [s for s, _ in found.get(keyword, [])] == starts, keyword
+
+
+@pytest.mark.parametrize("bank_key", list(BANK_KEYWORDS))
+def test_each_statement_type_is_detected(bank_key):
+    phrases = BANK_KEYWORDS[bank_key]
+    for phrase in phrases[1:]:
+        text = f"{phrases[0]}\nStatement period 01 Jan 2024\n{phrase}\nOpening balance $0.00"
+        assert detect_text(text) == [bank_key, phrase] == first_match(text)
+
+
+def test_no_bank():
+    assert detect_text("Some other bank\nTransaction Account") is None
+    assert rank_text("") == []
+
+
+def test_bank_phrase_alone_is_ranked_but_not_detected():
+    matches = rank_text(f"{NAB}\nCredit card statement")
+    assert [(m.bank, m.account_type) for m in matches] == [('nab', None)]
+    assert matches[0].confidence < 1
+    assert detect_text(f"{NAB}\nCredit card statement") is None
+
+
+def test_shadowed_phrase_loses_to_the_longer_keyword():
+    # NAB's 'Transaction Account' only occurs as part of ZEL's 'Transaction Account Statement'
+    text = f"{ZEL}\nTransaction Account Statement\nPayment to {NAB}"
+    matches = rank_text(text)
+    assert [(m.bank, m.account_type, m.shadowed) for m in matches] == [
+        ('zel', 'Transaction Account Statement', False),
+        ('nab', 'Transaction Account', True),
+    ]
+    assert matches[0].confidence > matches[1].confidence
+    assert detect_text(text) == ['zel', 'Transaction Account Statement']
+    assert first_match(text) == ['nab', 'Transaction Account']  # what used to happen
+
+
+def test_phrase_also_found_on_its_own_is_not_shadowed():
+    text = f"{NAB}\nTransaction Account\n{ZEL}\nTransaction Account Statement"
+    matches = rank_text(text)
+    assert not any(m.shadowed for m in matches)
+    with pytest.raises(AmbiguousBankError) as err:
+        best_match(matches)
+    assert [m.bank for m in err.value.matches] == ['nab', 'zel']
+    assert isinstance(err.value, ValueError)
+
+
+def test_several_types_of_one_bank_keep_keyword_order():
+    text = f"{WBC}\nTransactions report\nElectronic Statement"
+    assert detect_text(text) == ['wbc', 'Electronic Statement'] == first_match(text)
+
+
+def make_pdf(path, lines, metadata=None):
+    doc = fitz.open()
+    page = doc.new_page()
+    for i, line in enumerate(lines):
+        page.insert_text((40, 60 + 20 * i), line, fontsize=8)
+    if metadata:
+        doc.set_metadata(metadata)
+    doc.save(path)
+    return path
+
+
+def test_metadata_is_tried_before_the_page(tmp_path, monkeypatch):
+    pdf = make_pdf(tmp_path / "meta.pdf", ["Nothing to see here"],
+                   {"title": "Business Basic Account", "author": BANK_KEYWORDS['ben'][0]})
+    import bank_statement_converter.bank_detector as bank_detector
+    monkeypatch.setattr(bank_detector, "extract_first_page_text", None)  # must not be called
+    assert detect_bank(str(pdf)) == ['ben', 'Business Basic Account']
+
+
+def test_falls_back_to_the_first_page(tmp_path):
+    pdf = make_pdf(tmp_path / "page.pdf", [BANK_KEYWORDS['cba'][0], "Business Transaction Account"],
+                   {"title": "Statement", "producer": "Some PDF writer"})
+    assert detect_bank(str(pdf)) == ['cba', 'Business Transaction Account']
+    assert [m.bank for m in rank_banks(str(pdf))] == ['cba']
+
+
+def test_clipped_first_page_text(tmp_path):
+    pdf = make_pdf(tmp_path / "clip.pdf", ["top line", "second line"])
+    assert extract_first_page_text(str(pdf), fitz.Rect(0, 0, 600, 65)).strip() == "top line"
+
+
+def test_detect_command(tmp_path):
+    make_pdf(tmp_path / "a.pdf", [BANK_KEYWORDS['zel'][0], "Transaction Account Statement"])
+    make_pdf(tmp_path / "b.pdf", ["Some other bank"])
+    res = subprocess.run(["bstc", "detect", str(tmp_path), "-j", "1"], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    lines = res.stdout.splitlines()
+    assert lines[:2] == ["a.pdf: ZEL - Transaction Account Statement (confidence 1.00)",
+                         "b.pdf: could not detect bank"]
+    assert lines[-1].startswith("Detected 1 of 2 PDF(s)")
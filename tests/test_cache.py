@@ -0,0 +1,93 @@
+import pytest
+
+from bank_statement_converter.cache import ConversionCache
+
+ROWS = [['Date', 'Transaction Details', 'Amount'], ['01/01/2024', 'PAYMENT', '-12.50'], ['02/01/2024', None, '3.00']]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ConversionCache(tmp_path) as cache:
+        yield cache
+
+
+def test_round_trip(cache, tmp_path):
+    pdf = tmp_path / "statement.pdf"
+    pdf.write_bytes(b"%PDF-1.7 not really a statement")
+    key = cache.key(pdf)
+    assert cache.get(key) is None
+    cache.put(key, 'anz', 'Online Saver', ROWS)
+    assert cache.get(key) == ('anz', 'Online Saver', ROWS)
+
+    pdf.write_bytes(b"%PDF-1.7 a different statement")
+    assert cache.key(pdf) != key
+
+
+def test_evicts_least_recently_used(cache):
+    for n in range(3):
+        cache.put(f"key{n}", 'cba', None, ROWS * 20)
+    cache.get("key0")  # key1 is now the least recently used
+    _, total = cache.size()
+    removed = cache.prune(total - 1)
+    assert removed == 1
+    assert cache.get("key1") is None
+    assert cache.get("key0") is not None and cache.get("key2") is not None
+
+
+def test_max_bytes_applied_on_put(tmp_path):
+    with ConversionCache(tmp_path, max_bytes=0) as cache:
+        cache.put("key", 'cba', None, ROWS)
+        assert cache.size() == (0, 0)
+
+
+def test_rows_streamed_into_the_cache(cache):
+    writer = cache.writer("key", 'nab', 'Transaction Account')
+    for row in ROWS:
+        writer.write(row)
+    assert cache.get("key") is None  # only stored once closed
+    writer.close()
+    assert cache.get("key") == ('nab', 'Transaction Account', ROWS)
+
+    aborted = cache.writer("other", 'nab', None)
+    aborted.write(ROWS[0])
+    aborted.abort()
+    assert cache.get("other") is None
+
+
+def test_put_accepts_a_generator(cache):
+    cache.put("key", 'cba', None, (row for row in ROWS))
+    assert cache.get("key") == ('cba', None, ROWS)
+
+
+def test_identity_follows_plugin_versions(monkeypatch):
+    from types import SimpleNamespace
+    from bank_statement_converter import cache
+
+    def plugin(version):
+        dist = SimpleNamespace(name='bstc-extra-banks', version=version)
+        return lambda group: [SimpleNamespace(name='xyz', value='extra_banks:convert', dist=dist)]
+
+    identities = []
+    for version in ('1.0', '1.0', '1.1'):
+        monkeypatch.setattr(cache, '_fingerprint', None)
+        monkeypatch.setattr('importlib.metadata.entry_points', plugin(version))
+        identities.append(cache.converter_identity())
+    assert identities[0] == identities[1] != identities[2]
+
+
+def test_identity_ignores_the_cli(monkeypatch, tmp_path):
+    from bank_statement_converter import cache
+
+    package = tmp_path / "package"
+    package.mkdir()
+    for name in ("cba_converter.py", "cli.py", *cache.ROW_MODULES):
+        (package / name).write_text(f"# {name}\n")
+    monkeypatch.setattr(cache, '__file__', str(package / "cache.py"))
+    monkeypatch.setattr(cache, '_fingerprint', None)
+    before = cache.converter_identity()
+    (package / "cli.py").write_text("# changed\n")
+    monkeypatch.setattr(cache, '_fingerprint', None)
+    assert cache.converter_identity() == before
+    (package / "cba_converter.py").write_text("# changed\n")
+    monkeypatch.setattr(cache, '_fingerprint', None)
+    assert cache.converter_identity() != before
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+
+import pytest
+
+from bank_statement_converter import csv2qif
+from bank_statement_converter.csv2qif import csv_to_qif
+
+HEADER = "!Type:Bank \n"
+
+
+def convert(tmp_path, content: bytes, name="statement.csv") -> str:
+    csv_path = tmp_path / name
+    csv_path.write_bytes(content)
+    qif_path = csv_to_qif(str(csv_path))
+    assert qif_path == str(tmp_path / "statement.qif")
+    with open(qif_path, newline='') as f:
+        return f.read()
+
+
+def test_converter_csv(tmp_path):
+    qif = convert(tmp_path, b"Date,Transaction Details,Amount\r\n"
+                            b"01/02/2024,\"COFFEE, LATTE\",-4.50\r\n"
+                            b"02/02/2024,SALARY,2500.00\r\n")
+    assert qif == HEADER + "D01/02/2024\nT-4.50\nPCOFFEE, LATTE\n^\nD02/02/2024\nT2500.00\nPSALARY\n^\n"
+
+
+def test_utf8_bom_header(tmp_path):
+    # Excel's "CSV UTF-8" puts a byte order mark before the first header
+    qif = convert(tmp_path, "Date,Amount,Description,Balance\n05-Mar-24,-12.00,CAFÉ,100.00\n".encode('utf-8-sig'))
+    assert qif == HEADER + "D05/03/2024\nT-12.00\nPCAFÉ\n^\n"
+
+
+def test_cp1252_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv2qif.locale, "getpreferredencoding", lambda do_setlocale=True: "cp1252")
+    qif = convert(tmp_path, b"\xef\xbb\xbfDate,Amount,Description\n05/03/2024,1.00,CAF\xc9 \x80\n")
+    # the CSV is read as cp1252: the BOM bytes are dropped and the rest kept as cp1252 text
+    assert qif.startswith(HEADER + "D05/03/2024\nT1.00\nPCAF")
+
+
+def test_description_wins_over_details(tmp_path):
+    qif = convert(tmp_path, b"Date,Transaction Details,Amount,Description\n"
+                            b"01/02/2024,TD,1.00,DESC\n\n")
+    assert qif == HEADER + "D01/02/2024\nT1.00\nPDESC\n^\n"
+
+
+def test_without_header(tmp_path):
+    qif = convert(tmp_path, b"01/02/2024,+5.00,DEPOSIT\n2/3/24,-1.00,FEE\n")
+    assert qif == HEADER + "D01/02/2024\nT5.00\nPDEPOSIT\n^\nD02/03/2024\nT-1.00\nPFEE\n^\n"
+
+
+def test_record_builder():
+    records = csv2qif.QifRecords()
+    assert records.record is None
+    assert records(['Date', 'Amount', 'Transaction Details']) == ''
+    assert records.record(['05-Mar-24', '-12.00', 'FEE']) == "D05/03/2024\nT-12.00\nPFEE\n^\n"
+
+
+def test_empty_csv(tmp_path):
+    assert convert(tmp_path, b"") == HEADER
+
+
+def test_missing_columns(tmp_path):
+    with pytest.raises(ValueError, match="no 'Amount' column"):
+        convert(tmp_path, b"Date,Description\n01/02/2024,X\n")
+    with pytest.raises(ValueError, match="Expected date, amount and details"):
+        convert(tmp_path, b"01/02/2024,1.00\n")
+
+
+def test_writes_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv2qif, "WRITE_BATCH", 2)
+    rows = "".join(f"{day:02d}/01/2024,{day}.00,ROW {day}\n" for day in range(1, 6))
+    qif = convert(tmp_path, ("Date,Amount,Transaction Details\n" + rows).encode())
+    assert qif.count("^\n") == 5
+    assert qif.endswith("D05/01/2024\nT5.00\nPROW 5\n^\n")
+
+
+def test_cli_folder(tmp_path):
+    (tmp_path / "a.csv").write_text("Date,Amount,Transaction Details\n01/02/2024,1.00,A\n")
+    (tmp_path / "b.csv").write_text("Date,Amount,Transaction Details\n02/02/2024,2.00,B\n")
+    (tmp_path / "bad.csv").write_text("not,a\n")
+    res = subprocess.run([sys.executable, "-m", "bank_statement_converter.cli", "csv2qif",
+                          "--folder", str(tmp_path), "-j", "1"], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert "ERROR on bad.csv" in res.stdout
+    assert "Converted 2 of 3 CSV(s)" in res.stdout
+    assert (tmp_path / "b.qif").read_text() == HEADER + "D02/02/2024\nT2.00\nPB\n^\n"
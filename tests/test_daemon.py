@@ -0,0 +1,98 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+
+from bank_statement_converter import daemon  # noqa: E402
+
+pytestmark = pytest.mark.skipif(not daemon.SUPPORTED, reason="needs fork() and Unix sockets")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+import synthetic  # noqa: E402
+
+
+def bstc(*args, cwd, env):
+    return subprocess.run([sys.executable, "-m", "bank_statement_converter.cli", *args],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    monkeypatch.setenv("BSTC_SOCKET", str(tmp_path / "daemon.sock"))
+    monkeypatch.setenv("BSTC_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.delenv("BSTC_NO_DAEMON", raising=False)
+    return dict(os.environ)
+
+
+@pytest.fixture
+def running(env, tmp_path):
+    process = subprocess.Popen([sys.executable, "-m", "bank_statement_converter.cli", "daemon"],
+                               env=env, stdout=subprocess.PIPE, text=True)
+    assert process.stdout.readline().startswith("Daemon listening on")
+    yield process
+    if process.poll() is None:
+        process.terminate()
+        process.wait(10)
+
+
+def test_no_daemon_runs_in_process(env, tmp_path):
+    assert daemon.forward(["file", "missing.pdf"]) is None
+    assert daemon.status() is None
+    (tmp_path / "daemon.sock").write_text("")  # left behind by a killed daemon
+    assert daemon.forward(["file", "missing.pdf"]) is None
+
+
+def test_commands_are_forwarded(running, env, tmp_path):
+    work = tmp_path / "statements"
+    work.mkdir()
+    synthetic.make_statement('cba', work / "cba.pdf", pages=2)
+    synthetic.make_statement('zel', work / "zel.pdf", pages=1)
+
+    forwarded = bstc("file", "cba.pdf", "-q", "--no-cache", cwd=work, env=env)  # relative to the caller's directory
+    assert forwarded.returncode == 0, forwarded.stderr
+    csv, qif = (work / "cba.csv").read_text(), (work / "cba.qif").read_text()
+    local = bstc("file", "cba.pdf", "-q", "--no-cache", cwd=work, env={**env, "BSTC_NO_DAEMON": "1"})
+    assert forwarded.stdout == local.stdout
+    assert (work / "cba.csv").read_text() == csv and (work / "cba.qif").read_text() == qif
+
+    assert bstc("folder", ".", "-j", "2", cwd=work, env=env).returncode == 0
+    assert (work / "zel.csv").exists()
+    assert "Created QIF" in bstc("csv2qif", "zel.csv", cwd=work, env=env).stdout
+
+    failed = bstc("file", "missing.pdf", cwd=work, env=env)
+    assert failed.returncode == 1 and "FileNotFoundError" in failed.stderr
+
+    info = daemon.status()
+    assert info['pid'] == running.pid
+    assert info['commands'] == 5  # the four commands and this request
+
+
+def test_stop(running, env, tmp_path):
+    assert daemon.stop() == running.pid
+    assert running.wait(10) == 0
+    assert not (tmp_path / "daemon.sock").exists()
+    assert daemon.status() is None
+
+
+def test_untrusted_socket_directory(env, tmp_path, monkeypatch, capsys):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o755)
+    shared.chmod(0o755)
+    monkeypatch.setenv("BSTC_SOCKET", str(shared / "daemon.sock"))
+    with pytest.raises(RuntimeError, match="Refusing to listen"):
+        daemon.serve()
+    (shared / "daemon.sock").write_text("")
+    assert daemon.forward(["file", "missing.pdf"]) is None
+    assert "must be a directory owned by you with mode 0700" in capsys.readouterr().err
+    assert daemon.status() is None
+
+
+def test_peer_uid():
+    import socket
+    left, right = socket.socketpair(socket.AF_UNIX)
+    with left, right:
+        assert daemon._peer_uid(left) == os.getuid()
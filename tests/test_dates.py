@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from dateutil import parser
+
+from bank_statement_converter.dates import date_ordinal, parse_date, read_date, reformat_date
+
+FORMATS = ["%d %b %Y", "%d %b %y", "%b %Y", "%b %d %Y", "%d/%m/%y", "%d/%m/%Y", "%d %b", "%Y-%m-%dT%H"]
+
+SAMPLES = [
+    "01 Jan 2024", "1 jan 24", "31 DEC 1999", "29 Feb 2024", "29 Feb 2023", "29 Feb", "31 Apr 2024",
+    "00 Jan 2024", "32 Jan 2024", " 1 Jan 2024", "01  Jan 2024", "01 Jan 2024 ", "Jan 2024", "Jan 05 2024",
+    "01/02/24", "13/01/24", "01/13/24", "31/12/2024", "1/1/00", "99/99/99", "01-Jan-24", "01-Jan-2024",
+    "01 Sept 2024", "01 Xyz 2024", "01 Jan 0024", "01 Jan 124", "OPENING BALANCE", "2024", "", "1,234.56",
+    "2024-01-01T05",
+]
+
+
+def strptime_or_none(text, date_format):
+    try:
+        return datetime.strptime(text, date_format)
+    except ValueError:
+        return None
+
+
+def dateutil_reformat(date, output_format):
+    try:
+        return parser.parse(date, dayfirst=True).strftime(output_format)
+    except (ValueError, OverflowError):
+        return None
+
+
+@pytest.mark.parametrize("date_format", FORMATS)
+@pytest.mark.parametrize("text", SAMPLES)
+def test_parse_date_matches_strptime(text, date_format):
+    assert parse_date(text, date_format) == strptime_or_none(text, date_format)
+
+
+@pytest.mark.parametrize("output_format", ["%d/%m/%Y", "%d-%b-%y"])
+@pytest.mark.parametrize("text", SAMPLES)
+def test_reformat_date_matches_dateutil(text, output_format):
+    assert reformat_date(text, output_format) == dateutil_reformat(text, output_format)
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_read_date_matches_reformat_date(text):
+    day = read_date(text)
+    assert (day.strftime("%d/%m/%Y") if day else None) == reformat_date(text)
+
+
+@pytest.mark.parametrize("text", SAMPLES + ["202301 Jan 2023"])  # ANZ date cell run into the year
+def test_date_ordinal(text):
+    day = read_date(text)
+    assert date_ordinal(text) == (day.toordinal() if day else None)
+
+
+def test_two_digit_years_every_day():
+    for year in range(100):
+        for month in range(1, 13):
+            for day in (1, 12, 13, 28, 29, 30, 31):
+                for text in (f"{day:02d}/{month:02d}/{year:02d}", f"{day} {datetime(2000, month, 1):%b} {year:02d}"):
+                    assert reformat_date(text) == dateutil_reformat(text, "%d/%m/%Y"), text
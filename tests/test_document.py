@@ -0,0 +1,59 @@
+import fitz
+import pytest
+
+from bank_statement_converter.document import StatementDocument
+
+
+def make_pdf(path, pages: int):
+    doc = fitz.open()
+    for number in range(pages):
+        doc.new_page().insert_text((72, 72), f"Page {number}")
+    doc.save(path)
+    doc.close()
+
+
+# map_pages() functions have to be module level, for the worker processes
+def page_text(statement, page, suffix):
+    return statement.text(page).strip() + suffix
+
+
+def fail_on_page_5(statement, page):
+    if page.number == 5:
+        raise ValueError("no table on page 5")
+    return page.number
+
+
+@pytest.fixture
+def statement_pdf(tmp_path):
+    path = tmp_path / "statement.pdf"
+    make_pdf(path, 20)
+    return str(path)
+
+
+@pytest.mark.parametrize("page_jobs", [1, 3])
+def test_map_pages_in_order(statement_pdf, page_jobs):
+    with StatementDocument(statement_pdf, page_jobs=page_jobs) as statement:
+        results = list(statement.map_pages(page_text, "!", start=2))
+    assert results == [(number, f"Page {number}!") for number in range(2, 20)]
+
+
+@pytest.mark.parametrize("page_jobs", [1, 3])
+def test_map_pages_errors_come_in_turn(statement_pdf, page_jobs):
+    with StatementDocument(statement_pdf, page_jobs=page_jobs) as statement:
+        seen = []
+        for number, result in statement.map_pages(fail_on_page_5):
+            seen.append(result)
+            if number == 4:  # e.g. the closing balance was on page 4
+                break
+        assert seen == [0, 1, 2, 3, 4]
+
+        with pytest.raises(ValueError, match="no table on page 5"):
+            list(statement.map_pages(fail_on_page_5))
+
+
+def test_map_pages_short_statement_stays_in_process(tmp_path, monkeypatch):
+    path = tmp_path / "short.pdf"
+    make_pdf(path, 3)
+    monkeypatch.setattr("concurrent.futures.ProcessPoolExecutor", None)  # any use fails
+    with StatementDocument(str(path), page_jobs=8) as statement:
+        assert [n for n, _ in statement.map_pages(page_text, "")] == [0, 1, 2]
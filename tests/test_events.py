@@ -0,0 +1,133 @@
+import logging
+import os
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from bank_statement_converter import events
+from bank_statement_converter.events import Event, emit, job, print_event, subscribe, to_logging, unsubscribe
+
+
+def test_message_formatting():
+    event = Event('balance', "Obtained opening balance: ${cents!d}", {'cents': 123450}, None)
+    assert event.message == "Obtained opening balance: $1234.5"
+    assert Event('detected', "Detected bank: {bank!u}", {'bank': 'nab'}, None).message == "Detected bank: NAB"
+    assert Event('started', '', {}, None).message == ''
+
+
+def test_job_listener_gets_its_events():
+    seen = []
+    emit('count', "Number of transactions: {transactions}", transactions=1)  # nobody listening
+    with job("a.pdf", seen.append):
+        assert events.current_job() == "a.pdf"
+        emit('count', "Number of transactions: {transactions}", transactions=2)
+    assert events.current_job() is None
+    assert [e.kind for e in seen] == ['started', 'count', 'finished']
+    assert seen[1].data == {'transactions': 2} and seen[1].job == "a.pdf"
+    assert seen[2].data['error'] is None and seen[2].data['seconds'] >= 0
+
+
+def test_failed_job():
+    seen = []
+    with pytest.raises(ValueError):
+        with job("a.pdf", seen.append):
+            raise ValueError("Running balance and closing balance do not match")
+    assert seen[-1].kind == 'finished'
+    assert seen[-1].data['error'] == "Running balance and closing balance do not match"
+
+
+def test_jobs_in_threads_stay_apart():
+    logs = {name: [] for name in ("a", "b", "c", "d")}
+    everything = []
+    barrier = threading.Barrier(len(logs))
+
+    def convert(name):
+        with job(name, logs[name].append):
+            barrier.wait()
+            for n in range(200):
+                emit('count', "Number of transactions: {transactions}", transactions=n)
+
+    subscribe(everything.append)
+    try:
+        threads = [threading.Thread(target=convert, args=(name,)) for name in logs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        unsubscribe(everything.append)
+    for name, seen in logs.items():
+        assert {e.job for e in seen} == {name}
+        assert [e.data['transactions'] for e in seen if e.kind == 'count'] == list(range(200))
+    assert len(everything) == 4 * 202
+
+
+def test_print_and_logging(capsys, caplog):
+    with job("a.pdf", print_event):
+        emit('check', 'Running balance and closing balance match.')
+        emit('section')
+    assert capsys.readouterr().out == "Running balance and closing balance match.\n" + events.RULE + "\n"
+
+    subscribe(to_logging)
+    try:
+        with caplog.at_level(logging.INFO, logger='bank_statement_converter'):
+            emit('warning', 'WARNING: There are no balance checks for this converter.')
+    finally:
+        unsubscribe(to_logging)
+    record, = caplog.records
+    assert record.levelno == logging.WARNING and record.event.kind == 'warning'
+
+
+def test_converter_events(tmp_path):
+    pytest.importorskip("fitz")
+    sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+    import synthetic
+    from bank_statement_converter import convert
+
+    pdf_path, count = synthetic.make_statement('ben', tmp_path / "ben.pdf", count=30, seed=2)
+    ledger = synthetic.Ledger(count, seed=2)
+    seen = []
+    with job(str(pdf_path), seen.append):
+        convert(str(pdf_path))
+    balances = {(e.data['source'], e.data['name']): e.data['cents'] for e in seen if e.kind == 'balance'}
+    assert balances[('statement', 'opening')] == ledger.opening
+    assert balances[('calculated', 'closing')] == ledger.closing
+    assert {'transactions': count} in [e.data for e in seen if e.kind == 'count']
+
+
+def test_convert_job_collects_messages(tmp_path, monkeypatch, capsys):
+    fitz = pytest.importorskip("fitz")
+    sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+    import synthetic
+    from bank_statement_converter.cli import convert_job
+
+    monkeypatch.setenv("BSTC_CACHE_DIR", str(tmp_path / "cache"))
+    pdf_path, _ = synthetic.make_statement('cba', tmp_path / "cba.pdf", pages=2)
+    converted = convert_job(str(pdf_path), True, False)
+    assert converted.error is None and converted.times is None
+    assert converted.pages == fitz.open(pdf_path).page_count and converted.seconds > 0
+    assert "Detected bank: CBA" in converted.log and f"Created QIF: {tmp_path / 'cba.qif'}" in converted.log
+    cached = convert_job(str(pdf_path), True, False)
+    assert "Using cached conversion" in cached.log and cached.pages is None
+    assert capsys.readouterr().out == ""  # nothing went to stdout
+
+    failed = convert_job(str(tmp_path / "missing.pdf"), True, False)
+    assert failed.outputs == [] and failed.error
+
+
+def square_or_crash(n):
+    if n == 3:
+        os._exit(1)  # like a segfault in PyMuPDF, or the OOM killer
+    return n * n
+
+
+def test_dead_worker_fails_only_its_file():
+    from bank_statement_converter.cli import map_isolated
+
+    calls = [(n,) for n in range(6)]
+    assert list(map_isolated(square_or_crash, 1, calls, lambda error: 'failed')) == [0, 1, 4, 'failed', 16, 25]
+    results = list(map_isolated(square_or_crash, 2, calls, lambda error: None))
+    # at most the call on the other worker goes down with it
+    assert results[:2] == [0, 1] and results[3] is None and results.count(None) <= 2
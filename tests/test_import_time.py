@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time allowed for the CLI module, in milliseconds.
+# Generous on purpose (slow CI machines); importing PyMuPDF alone takes longer.
+BUDGET_MS = float(os.environ.get("BSTC_IMPORT_BUDGET_MS", 150))
+
+HEAVY = ("fitz", "pymupdf", "dateutil")
+
+
+def import_times(statement: str) -> dict:
+    """Run statement in a fresh interpreter with -X importtime; returns {module: cumulative us}"""
+    cmd = [sys.executable, "-X", "importtime", "-c", statement]
+    subprocess.run(cmd, capture_output=True, check=True)  # first run may compile .pyc files
+    res = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize("statement", [
+    "import bank_statement_converter",
+    "import bank_statement_converter.cli",
+    "from bank_statement_converter import csv_to_qif",
+])
+def test_no_heavy_imports(statement):
+    imported = import_times(statement)
+    heavy = sorted(m for m in imported if m.split(".")[0] in HEAVY)
+    assert not heavy, f"{statement!r} imports {heavy}"
+
+
+def test_cli_import_budget():
+    took_ms = import_times("import bank_statement_converter.cli")["bank_statement_converter.cli"] / 1000
+    assert took_ms < BUDGET_MS, f"importing the CLI took {took_ms:.1f} ms (budget {BUDGET_MS} ms)"
+
+
+def test_csv2qif_without_pymupdf(tmp_path):
+    csv_path = tmp_path / "statement.csv"
+    csv_path.write_text("Date,Amount,Transaction Details\n01-Jan-24,-12.50,COFFEE\n")
+    script = (
+        "import sys\n"
+        "sys.modules['fitz'] = sys.modules['pymupdf'] = None  # any import of them fails\n"
+        "from bank_statement_converter import csv_to_qif\n"
+        f"print(csv_to_qif({str(csv_path)!r}))\n"
+    )
+    res = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert res.returncode == 0, res.stderr
+    assert (tmp_path / "statement.qif").read_text() == "!Type:Bank \nD01/01/2024\nT-12.50\nPCOFFEE\n^\n"
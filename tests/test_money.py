@@ -0,0 +1,35 @@
+import pytest
+
+from bank_statement_converter.money import dollars, parse_cents
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("$1,234.56 CR", 123456),
+    ("-12.00", -1200),
+    ("1,000.00DR", -100000),
+    ("1,000.00 Dr", -100000),
+    ("(5.00)", -500),
+    ("($5.00)", -500),
+    ("+$5.00", 500),
+    ("$-5.00", -500),
+    ("  7 ", 700),
+    ("0.4", 40),
+    (".05", 5),
+    ("12.345", 1234),
+    ("12.355", 1236),
+])
+def test_parse_cents(text, cents):
+    assert parse_cents(text) == cents
+
+
+@pytest.mark.parametrize("text", ["", "$", "CR", "abc", "(5.00", "--5", "+-5", "1.2.3", "5 XX"])
+def test_parse_cents_rejects(text):
+    with pytest.raises(ValueError):
+        parse_cents(text)
+
+
+def test_sums_are_exact():
+    amounts = ["0.10", "0.20", "1,234.57", "0.01"] * 2500
+    total = sum(parse_cents(a) for a in amounts)
+    assert total == 308_720_000
+    assert dollars(total) == 3087200.0
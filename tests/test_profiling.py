@@ -0,0 +1,84 @@
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from bank_statement_converter import profiling
+from bank_statement_converter.profiling import StageTimes, add_hook, dump_profile, iter_spans, remove_hook, span
+
+
+def test_no_hooks_no_records():
+    assert span('parse') is span('export')  # the shared do-nothing span
+    with span('parse') as s:
+        pass
+    assert s.info == {}
+
+
+def test_nested_spans_have_self_times():
+    records = []
+    add_hook(records.append)
+    try:
+        with span('export'):
+            with span('parse', page=1):
+                time.sleep(0.02)
+            time.sleep(0.01)
+    finally:
+        remove_hook(records.append)
+    parse, export = records
+    assert (parse.stage, parse.info) == ('parse', {'page': 1})
+    assert parse.self_seconds == parse.seconds >= 0.02
+    assert export.seconds >= parse.seconds + 0.01
+    assert export.self_seconds == pytest.approx(export.seconds - parse.seconds)
+
+
+def test_iter_spans_times_each_step():
+    with StageTimes() as times:
+        assert list(iter_spans('parse', range(3))) == [0, 1, 2]
+    assert times.stages['parse'][0] == 4  # three items and the end of the iterator
+
+
+def test_stage_times_from_threads():
+    def work():
+        for _ in range(100):
+            with span('text'):
+                pass
+
+    with StageTimes() as times:
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert times.stages['text'][0] == 400
+    assert not profiling._hooks
+
+    total = StageTimes()
+    total.add(times.as_dict())
+    total.add(times)
+    assert total.stages['text'][0] == 800
+    assert 'text' in total.summary()
+
+
+def test_conversion_stages(tmp_path):
+    pytest.importorskip("fitz")
+    sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+    import synthetic
+    from bank_statement_converter.cli import convert_profiled
+
+    pdf_path, _ = synthetic.make_statement('nab_acc', tmp_path / "nab.pdf", pages=2)
+    outputs, times = convert_profiled(str(pdf_path), True, True, use_cache=False, dump_dir=str(tmp_path / "prof"))
+    assert outputs == [str(tmp_path / "nab.qif")]
+    assert {'open', 'detection', 'drawings', 'text', 'parse', 'export'} <= set(times['stages'])
+    assert times['labels']['bank'] == 'nab' and times['labels']['pages'] >= 2
+    own = sum(stage['self_seconds'] for stage in times['stages'].values())
+    assert own <= times['wall_seconds']
+    pstats.Stats(str(tmp_path / "prof" / "nab.prof"))  # a readable cProfile dump
+
+
+def test_unknown_profiler(tmp_path):
+    with pytest.raises(ValueError):
+        with dump_profile(tmp_path, "x.pdf", 'yappi'):
+            pass
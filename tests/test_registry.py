@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+import pytest
+
+from bank_statement_converter import registry
+
+
+def test_converters_are_imported_on_first_use():
+    script = (
+        "import sys\n"
+        "from bank_statement_converter.registry import find_converter\n"
+        "converter = find_converter('nab', 'Transaction Account')\n"
+        "print(converter.__name__)\n"
+        "print(sorted(m for m in sys.modules if m.startswith('bank_statement_converter.') and m.endswith('_converter')))\n"
+    )
+    res = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    name, modules = res.stdout.splitlines()
+    assert name == "extract_nab"
+    assert modules == "['bank_statement_converter.nab_converter']"
+
+
+def test_account_type_takes_precedence(monkeypatch):
+    monkeypatch.setattr(registry, "_converters", dict(registry._converters))
+    monkeypatch.setattr(registry, "_loaded", {})
+
+    def business_saver(statement, account_type):
+        return [['Date', 'Transaction Details', 'Amount'], [account_type, statement, '1.00']]
+
+    registry.register_converter('nab', business_saver, 'Business Saver')
+    assert registry.find_converter('nab', 'Business Saver') is business_saver
+    assert registry.find_converter('nab', 'Transaction Account').__name__ == 'extract_nab'
+    assert list(registry.extract_rows('doc', 'nab', 'Business Saver'))[1] == ['Business Saver', 'doc', '1.00']
+
+
+def test_unknown_bank():
+    with pytest.raises(ValueError, match="No converter implemented for bank 'xyz'"):
+        registry.find_converter('xyz')
@@ -0,0 +1,148 @@
+import http.client
+import json
+import os
+import sys
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+import synthetic  # noqa: E402
+
+from bank_statement_converter import convert  # noqa: E402
+from bank_statement_converter import server  # noqa: E402
+from bank_statement_converter.server import ConversionService, convert_upload, make_server  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def pdfs(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("serve")
+    return {layout: Path(synthetic.make_statement(layout, folder / f"{layout}.pdf", pages=1)[0]).read_bytes()
+            for layout in ('cba', 'zel', 'ben')}
+
+
+@pytest.fixture
+def service():
+    service = ConversionService(workers=1, max_queue=4, warm=False)
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def url(service):
+    httpd = make_server(service, port=0, max_upload=1024 * 1024)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def request(url, data=None):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, method='POST' if data else 'GET')) as res:
+            return res.status, res.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode()
+
+
+def test_convert_upload(url, pdfs):
+    status, body = request(f"{url}/jobs?wait=30&format=csv", pdfs['cba'])
+    assert status == 200
+    assert body == convert(pdfs['cba']).to_csv()
+
+    status, body = request(f"{url}/jobs?priority=bulk", pdfs['zel'])
+    assert status == 202
+    job = json.loads(body)
+    assert job['status'] in ('queued', 'running')
+    status, body = request(f"{url}{job['url']}/result?format=qif")
+    assert status in (200, 202)
+
+    status, body = request(f"{url}/metrics")
+    assert status == 200 and 'bstc_jobs_total{outcome="submitted"} 2' in body
+
+
+def test_bad_uploads(url):
+    assert request(f"{url}/jobs", b"not a pdf")[0] == 415
+    assert request(f"{url}/jobs?priority=urgent", b"%PDF-1.7")[0] == 400
+    connection = http.client.HTTPConnection(urlsplit(url).netloc)
+    connection.putrequest('POST', '/jobs')
+    connection.putheader('Content-Length', str(2 * 1024 * 1024))
+    connection.endheaders()
+    assert connection.getresponse().status == 413
+    connection.close()
+    assert request(f"{url}/jobs/nope")[0] == 404
+    status, body = request(f"{url}/jobs?wait=30", b"%PDF-1.7 broken")
+    assert status == 422 and json.loads(body)['status'] == 'failed'
+
+
+def test_interactive_jobs_go_first(service, pdfs):
+    with service._cond:  # nothing is dispatched until all three are queued
+        bulk = [service.submit(pdfs['ben'], 'bulk'), service.submit(pdfs['zel'], 'bulk')]
+        interactive = service.submit(pdfs['cba'], 'interactive')
+        assert service.position(interactive) == 0
+        assert service.position(bulk[1]) == 2
+    for job in bulk + [interactive]:
+        assert job.done.wait(30) and job.status == 'done'
+    assert interactive.started < bulk[0].started < bulk[1].started
+
+
+def test_full_queue_is_refused(service, pdfs):
+    with service._cond:
+        jobs = [service.submit(pdfs['cba'], 'bulk') for _ in range(5)]
+    assert jobs[-1] is None and service.counts['rejected'] == 1
+    for job in jobs[:-1]:
+        assert job.done.wait(30)
+
+
+def convert_or_crash(data):
+    if data.startswith(b'%PDF-crash'):
+        os._exit(1)  # like a segfault in PyMuPDF, or the OOM killer
+    return convert_upload(data)
+
+
+def test_crashed_worker_only_fails_its_job(service, pdfs, monkeypatch):
+    # the workers are forked on the first submit, so they see the patched function
+    monkeypatch.setattr(server, 'convert_upload', convert_or_crash)
+    with service._cond:  # queued behind the crash, dispatched once it happened
+        crash = service.submit(b'%PDF-crash')
+        behind = service.submit(pdfs['cba'], 'bulk')
+    assert crash.done.wait(30) and crash.status == 'failed'
+    assert behind.done.wait(30) and behind.status == 'done', behind.error
+    assert service._running == 0
+
+
+def test_broken_pool_on_submit_requeues_the_job(service, pdfs):
+    from concurrent.futures.process import BrokenProcessPool
+
+    class Broken:
+        def submit(self, *args):
+            raise BrokenProcessPool("a child process terminated abruptly")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    with service._cond:
+        service._pool.shutdown()
+        service._pool = Broken()
+        job = service.submit(pdfs['cba'])
+    assert job.done.wait(30) and job.status == 'done'
+    assert service.counts['failed'] == 0 and service._running == 0
+
+
+def test_invalid_requests_are_not_queued(service, url):
+    connection = http.client.HTTPConnection(urlsplit(url).netloc)
+    connection.putrequest('POST', '/jobs')
+    connection.putheader('Content-Length', '-1')
+    connection.endheaders()
+    assert connection.getresponse().status == 400
+    connection.close()
+    assert request(f"{url}/jobs?wait=abc", b"%PDF-1.7")[0] == 400
+    assert request(f"{url}/jobs?format=xlsx", b"%PDF-1.7")[0] == 400
+    assert service.counts['submitted'] == 0
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+import pytest
+
+from bank_statement_converter.csv2qif import csv_to_qif
+from bank_statement_converter.sinks import CsvSink, QifSink, write_rows
+from bank_statement_converter.utils import export_to_csv
+
+HEADER = ['Date', 'Transaction Details', 'Amount']
+
+
+def rows(count, fail=False):
+    yield HEADER
+    for n in range(count):
+        yield ['01/01/2024', f'PAYMENT {n}', '-1.00']
+    if fail:
+        raise ValueError("Running balance and closing balance do not match")
+
+
+def test_rows_are_streamed(tmp_path):
+    path = tmp_path / "out.csv"
+    assert write_rows(rows(3), [CsvSink(path)]) == 4
+    assert path.read_text().splitlines() == [
+        "Date,Transaction Details,Amount",
+        "01/01/2024,PAYMENT 0,-1.00",
+        "01/01/2024,PAYMENT 1,-1.00",
+        "01/01/2024,PAYMENT 2,-1.00",
+    ]
+    assert not (tmp_path / "out.csv.part").exists()
+
+
+def test_failed_conversion_leaves_no_file(tmp_path):
+    path = tmp_path / "out.csv"
+    path.write_text("previous conversion\n")
+    with pytest.raises(ValueError):
+        export_to_csv(rows(3, fail=True), path)
+    assert path.read_text() == "previous conversion\n"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_every_sink_gets_every_row(tmp_path):
+    class Collect:
+        def __init__(self):
+            self.rows, self.closed = [], False
+
+        def write(self, row):
+            self.rows.append(row)
+
+        def close(self):
+            self.closed = True
+
+        def abort(self):
+            raise AssertionError("not aborted")
+
+    collect = Collect()
+    write_rows(rows(2), [CsvSink(tmp_path / "out.csv"), collect])
+    assert collect.rows == list(rows(2)) and collect.closed
+
+
+def test_sink_as_context_manager(tmp_path):
+    path = tmp_path / "out.csv"
+    with pytest.raises(RuntimeError):
+        with CsvSink(path) as sink:
+            sink.write(HEADER)
+            raise RuntimeError
+    assert not path.exists()
+    with CsvSink(path) as sink:
+        sink.write(HEADER)
+    assert path.read_text() == "Date,Transaction Details,Amount\n"
+
+
+def test_qif_sink_matches_csv_to_qif(tmp_path):
+    data = [HEADER, ['01/01/2024', 'PAYMENT, "REF" 1', '-1.00'], ['02/01/2024', None, '2.50'],
+            [], ['3 Jan 2024', 'SHORT ROW']]
+    write_rows(data, [CsvSink(tmp_path / "out.csv"), QifSink(tmp_path / "direct.qif")])
+    qif_path = csv_to_qif(str(tmp_path / "out.csv"))
+    assert (tmp_path / "direct.qif").read_bytes() == Path(qif_path).read_bytes()
+
+
+def test_qif_sink_failed_conversion_leaves_no_file(tmp_path):
+    with pytest.raises(ValueError):
+        write_rows(rows(3, fail=True), [QifSink(tmp_path / "out.qif")])
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("fitz")
+
+sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+import synthetic  # noqa: E402
+
+from bank_statement_converter import StatementDocument, detect_bank  # noqa: E402
+from bank_statement_converter.registry import extract_rows  # noqa: E402
+
+BANKS = {
+    'anz': 'anz', 'ben': 'ben', 'cba': 'cba', 'mqg': 'mqg', 'nab_acc': 'nab', 'nab_everyday': 'nab',
+    'wbc_acc': 'wbc', 'wbc_search': 'wbc', 'wbc_recent': 'wbc', 'zel': 'zel',
+}
+
+
+@pytest.mark.parametrize("layout", sorted(synthetic.LAYOUTS))
+def test_synthetic_statements_convert(tmp_path, layout):
+    """The benchmarks only mean something if every converter parses its synthetic layout"""
+    pdf_path, count = synthetic.make_statement(layout, tmp_path / f"{layout}.pdf", pages=3)
+    with StatementDocument(str(pdf_path)) as statement:
+        assert statement.raw.page_count >= 3
+        bank, account_type = detect_bank(statement)
+        rows = list(extract_rows(statement, bank, account_type))
+    assert bank == BANKS[layout]
+    assert len(rows) - 1 == count
+
+
+def test_generator_is_deterministic(tmp_path):
+    first, _ = synthetic.make_statement('ben', tmp_path / "a.pdf", count=40, seed=7)
+    second, _ = synthetic.make_statement('ben', tmp_path / "b.pdf", count=40, seed=7)
+    with StatementDocument(str(first)) as a, StatementDocument(str(second)) as b:
+        assert [a.text(page) for page in a.pages()] == [b.text(page) for page in b.pages()]
+
+
+def test_qif_written_directly(tmp_path):
+    """bstc file -q -r writes the QIF straight from the rows, same as converting the CSV"""
+    from bank_statement_converter.cli import pdf2csv_qif
+    from bank_statement_converter.csv2qif import csv_to_qif
+    pdf_path, _ = synthetic.make_statement('cba', tmp_path / "cba.pdf", pages=2)
+    csv_path, qif_path = pdf2csv_qif(str(pdf_path), True, False, use_cache=False)
+    expected = Path(qif_path).read_bytes()
+    Path(qif_path).unlink()
+    assert Path(csv_to_qif(csv_path)).read_bytes() == expected
+    Path(csv_path).unlink()
+    assert pdf2csv_qif(str(pdf_path), True, True, use_cache=False) == [qif_path]
+    assert Path(qif_path).read_bytes() == expected
+    assert not Path(csv_path).exists()
+
+
+@pytest.mark.parametrize("layout", ['cba', 'zel'])
+def test_dr_balances_are_negative(tmp_path, layout):
+    """Opening and closing balances marked DR (overdrawn) are read as negative amounts"""
+    from bank_statement_converter import convert
+    pdf_path = synthetic.LAYOUTS[layout](str(tmp_path / f"{layout}.pdf"), 20, seed=3, opening=-1_234_567)
+    ledger = synthetic.Ledger(20, seed=3, opening=-1_234_567)
+    assert ledger.closing < 0
+    result = convert(pdf_path)
+    assert (result.opening, result.closing) == (-1_234_567, ledger.closing)
+    assert len(result) == 20
@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from bank_statement_converter.table import LineArt, boundaries, extract_cells
+from bank_statement_converter.utils import clean_up_values
+
+
+@pytest.fixture
+def page():
+    """A page with a few rows of small, tightly packed table text"""
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 60
+    for n in range(30):
+        page.insert_text((40, y), f"{n + 1:02d} Jan 24", fontsize=7)
+        page.insert_text((100, y), f"PAYMENT TO MERCHANT {n} REF {n * 7919}", fontsize=7)
+        page.insert_text((330, y), f"{n * 12.5:,.2f}", fontsize=7)
+        page.insert_text((480, y), f"${n * 1234.56:,.2f} CR", fontsize=7)
+        y += 8 if n % 3 else 17  # some rows sit close enough to share a cell
+    yield page
+    doc.close()
+
+
+def textbox_cells(page, x_values, y_values):
+    return [
+        [
+            page.get_textbox(fitz.Rect(x_values[j], y_values[i], x_values[j + 1], y_values[i + 1])).replace("\n", " ").strip()
+            for j in range(len(x_values) - 1)
+        ]
+        for i in range(len(y_values) - 1)
+    ]
+
+
+def test_matches_get_textbox_on_random_grids(page):
+    rng = random.Random(0)
+    for _ in range(15):
+        x_values = sorted(rng.uniform(0, 600) for _ in range(rng.randint(2, 6)))
+        y_values = sorted(rng.choice([rng.uniform(0, 400), 100.0]) for _ in range(rng.randint(2, 12)))
+        assert extract_cells(page, x_values, y_values) == textbox_cells(page, x_values, y_values)
+
+
+def test_degenerate_grids(page):
+    assert extract_cells(page, [0, 600], [50]) == []
+    assert extract_cells(page, [100], [0, 50, 100]) == [[], []]
+
+
+def popping_clean_up(values):
+    """clean_up_values as it was, popping the values one by one"""
+    for i in range(len(values) - 1, 0, -1):
+        if values[i] - values[i - 1] <= 8:
+            values.pop(i)
+    return values
+
+
+def test_clean_up_values_matches_popping():
+    rng = random.Random(1)
+    for _ in range(200):
+        values = sorted(rng.choice([rng.uniform(0, 800), rng.randint(0, 100)]) for _ in range(rng.randint(0, 40)))
+        expected = popping_clean_up(list(values))
+        result = clean_up_values(values)
+        assert result == expected
+        assert result is values  # still cleaned up in place
+
+
+def test_boundaries():
+    assert boundaries({300, 40, 41, 96, 96.5, 580}) == [40, 96, 300, 580]
+    assert boundaries([]) == []
+
+
+def test_line_art_matches_get_drawings():
+    doc = fitz.open()
+    page = doc.new_page()
+    for n in range(10):
+        y = 60 + 30 * n
+        page.draw_rect(fitz.Rect(40, y, 580, y + 22), color=(0, 0, 0), fill=(0.9, 0.9, 0.9) if n % 2 else None)
+        page.draw_line((41, y + 0.5), (563, y + 0.5))
+    art = LineArt(page)
+    paths = page.get_drawings()
+    assert [(b.x0, b.y0, b.x1, b.y1, b.width, b.height, b.fill) for b in art.boxes] == \
+           [(*p["rect"], p["rect"].width, p["rect"].height, bool(p["fill"])) for p in paths]
+    lines = [item[1].y for p in paths for item in p["items"] if item[0] == "l"]
+    assert lines and set(lines) <= set(art.item_ys)
+    assert art and not LineArt(doc.new_page())
+    doc.close()
@@ -0,0 +1,92 @@
+from datetime import date
+
+from bank_statement_converter.transactions import (
+    RowLayout, Transaction, TransactionBatch, csv_rows, format_cents,
+)
+
+LAYOUT = RowLayout(('Date', 'Transaction Details', 'Amount'))
+CBA_LAYOUT = RowLayout(('Date', 'Amount', 'Transaction Details'), date_format="%d-%b-%y")
+
+
+def test_format_cents():
+    assert format_cents(0) == '0.00'
+    assert format_cents(-5) == '-0.05'
+    assert format_cents(123456) == '1234.56'
+    assert format_cents(-123456, thousands=True) == '-1,234.56'
+
+
+def test_rows_round_trip():
+    rows = [
+        ['01/02/2024', 'COFFEE', '-4.50'],
+        ['29/02/2024', 'SALARY', '2500.00'],
+    ]
+    batch = TransactionBatch(LAYOUT)
+    for row in rows:
+        batch.append_row(row)
+    assert list(batch.rows()) == rows
+    assert not batch.rows_kept
+    assert list(batch.ordinals) == [date(2024, 2, 1).toordinal(), date(2024, 2, 29).toordinal()]
+    assert list(batch.cents) == [-450, 250000]
+    assert batch.total() == 249550
+
+
+def test_other_layout():
+    batch = TransactionBatch(CBA_LAYOUT)
+    batch.append_row(['05-Mar-24', '-12.00', 'Transfer to xx1234'])
+    assert batch[0] == Transaction(date(2024, 3, 5).toordinal(), -1200, 'Transfer to xx1234')
+    assert batch[0].date == date(2024, 3, 5)
+    assert list(batch.rows()) == [['05-Mar-24', '-12.00', 'Transfer to xx1234']]
+
+
+def test_irregular_rows_are_kept():
+    rows = [
+        ['01/02/2024', 'ROUNDING', '0.4'],          # parses, but renders as 0.40
+        ['02/02/2024', 'REFUND', '+1,299.75'],
+        ['03/02/2024', 'NO AMOUNT'],                # short row
+        ['', 'Opening balance', 'n/a'],
+    ]
+    batch = TransactionBatch(LAYOUT)
+    for row in rows:
+        batch.append_row(row)
+    assert list(batch.rows()) == rows
+    assert sorted(batch.rows_kept) == [0, 1, 2, 3]
+    # amounts that parse are still in the arrays
+    assert list(batch.cents[:2]) == [40, 129975]
+    assert batch[2].date is None
+
+
+def test_rows_with_parsed_values():
+    """Converters pass the date and cents they parsed; only the amount text is checked"""
+    batch = TransactionBatch(LAYOUT)
+    day = date(2024, 2, 1).toordinal()
+    batch.append_row(['01/02/2024', 'COFFEE', '-4.50'], day, -450)
+    batch.append_row(['01/02/2024', 'ROUNDING', '0.4'], day, 40)
+    assert list(batch.rows()) == [['01/02/2024', 'COFFEE', '-4.50'], ['01/02/2024', 'ROUNDING', '0.4']]
+    assert list(batch.rows_kept) == [1]
+    assert list(batch.cents) == [-450, 40] and list(batch.ordinals) == [day, day]
+
+
+def test_rows_without_a_date_or_amount():
+    batch = TransactionBatch(LAYOUT)
+    batch.append_row(['01/02/2024', 'COFFEE', '-4.50'])
+    batch.append_row(['', 'Opening balance', '1,000.00'])
+    assert batch[1] == Transaction(0, 0, '', ('', 'Opening balance', '1,000.00'))
+    assert repr(batch[1]) == "Transaction(row=('', 'Opening balance', '1,000.00'))"
+    assert repr(batch[0]) == "Transaction(2024-02-01, -450, 'COFFEE')"
+    assert batch.total() == -450
+
+
+def test_csv_rows():
+    first, second = TransactionBatch(LAYOUT), TransactionBatch(LAYOUT)
+    second.append_row(['01/02/2024', 'COFFEE', '-4.50'])
+    assert list(csv_rows([first, second])) == [
+        ['Date', 'Transaction Details', 'Amount'],
+        ['01/02/2024', 'COFFEE', '-4.50'],
+    ]
+    # an empty statement still gets its header
+    assert list(csv_rows([TransactionBatch(LAYOUT)])) == [['Date', 'Transaction Details', 'Amount']]
+
+
+def test_csv_rows_passes_plain_rows_through():
+    rows = [['Date', 'Transaction Details', 'Amount'], ['01/02/2024', 'COFFEE', '-4.50']]
+    assert list(csv_rows(iter(rows))) == rows
@@ -0,0 +1,92 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+from bank_statement_converter.watch import FolderWatcher
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write(path, data: bytes, mtime_ns: int):
+    path.write_bytes(data)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_settled_pdfs_are_handed_out_once(tmp_path):
+    clock = Clock()
+    watcher = FolderWatcher(tmp_path, settle=2, clock=clock)
+    assert watcher.poll() == []
+
+    write(tmp_path / "a.pdf", b"%PDF-1", 10**9)
+    (tmp_path / "notes.txt").write_text("not a statement")
+    assert watcher.poll() == []           # just arrived
+    assert watcher.pending == 1
+    clock.now = 1
+    write(tmp_path / "a.pdf", b"%PDF-1.7 more", 2 * 10**9)
+    clock.now = 2.5
+    assert watcher.poll() == []           # still growing a second ago
+    clock.now = 5
+    assert watcher.poll() == [str(tmp_path / "a.pdf")]
+    clock.now = 20
+    assert watcher.poll() == []           # converted already
+
+
+def test_changed_pdf_is_handed_out_again(tmp_path):
+    clock = Clock()
+    write(tmp_path / "a.pdf", b"%PDF-1", 10**9)
+    watcher = FolderWatcher(tmp_path, settle=0, rescan=5, clock=clock)
+    watcher.poll()
+    clock.now = 1
+    assert watcher.poll() == [str(tmp_path / "a.pdf")]
+
+    write(tmp_path / "a.pdf", b"%PDF-2", 3 * 10**9)  # rewritten in place: the folder's mtime may not change
+    clock.now = 6
+    watcher.poll()
+    clock.now = 7
+    assert watcher.poll() == [str(tmp_path / "a.pdf")]
+
+
+def test_converted_pdfs_are_skipped_at_start(tmp_path):
+    write(tmp_path / "old.pdf", b"%PDF-1", 10**9)
+    write(tmp_path / "old.csv", b"Date", 2 * 10**9)
+    write(tmp_path / "stale.pdf", b"%PDF-1", 3 * 10**9)
+    write(tmp_path / "stale.qif", b"!Type", 2 * 10**9)  # older than its PDF
+    clock = Clock()
+    watcher = FolderWatcher(tmp_path, settle=0, clock=clock)
+    watcher.poll()
+    clock.now = 1
+    assert watcher.poll() == [str(tmp_path / "stale.pdf")]
+
+
+def test_empty_and_removed_files(tmp_path):
+    clock = Clock()
+    watcher = FolderWatcher(tmp_path, settle=0, clock=clock)
+    (tmp_path / "empty.pdf").write_bytes(b"")
+    (tmp_path / "gone.pdf").write_bytes(b"%PDF")
+    watcher.poll()
+    (tmp_path / "gone.pdf").unlink()
+    clock.now = 1
+    assert watcher.poll() == []
+    assert watcher.pending == 1           # the empty one, until something is written to it
+
+
+def test_watch_once_converts_new_pdfs(tmp_path):
+    pytest.importorskip("fitz")
+    sys.path.insert(0, str(Path(__file__).parents[1] / "benchmarks"))
+    import synthetic
+    from bank_statement_converter.cli import watch_folder
+
+    synthetic.make_statement('zel', tmp_path / "zel.pdf", pages=1)
+    synthetic.make_statement('cba', tmp_path / "cba.pdf", pages=1)
+    (tmp_path / "cba.csv").write_text("converted before\n")
+    outputs = watch_folder(str(tmp_path), True, True, use_cache=False, jobs=2, interval=0.05, settle=0, once=True)
+    assert outputs == [str(tmp_path / "zel.qif")]
+    assert (tmp_path / "cba.csv").read_text() == "converted before\n"